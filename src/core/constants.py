@@ -16,6 +16,7 @@ COLOR_STEEL = (112, 128, 144)     # Slate Gray
 COLOR_SPAGHETTI = (255, 255, 100) # Pale Yellow
 
 COLOR_CURSOR = (255, 165, 0)      # Bright Orange
+COLOR_UNSTABLE = (255, 0, 200)    # Magenta (mechanism nodes)
 COLOR_TENSION = (255, 60, 60)     # Red
 COLOR_COMPRESSION = (60, 100, 255)# Blue
 COLOR_AXIS = (80, 80, 80)
@@ -29,6 +29,15 @@ class GameState:
         self.static_solver = None
         self.broken_beams = set()
         self.simulation_frozen = False
+        self.nonlinear_analysis = False  # P-delta (geometric nonlinear) solve
+        self.dynamic_analysis = False    # Transient (Newmark) solve
+        self.progressive_collapse = False  # Remove failed members, don't freeze
+        self.background_solve = False    # Solve in a worker thread
+        self.substructures = False       # Condense panels, recover on screen only
+        self.iterative_solve = False     # Conjugate gradients instead of factorizing
+        self.crowd_size = 0              # Walkers spawned besides the agent
+        self.mode_view = None            # Index of the natural mode on display
+        self.envelope = None             # Moving-load envelope on display
         
         # Volume display
         self.volume_timer = 0
@@ -39,6 +48,8 @@ class GameState:
         self.mode = GameMode.BUILD
         self.static_solver = None
         self.simulation_frozen = False
+        self.mode_view = None
+        self.envelope = None
         self.broken_beams.clear()
     
     def enter_analysis_mode(self, solver):
@@ -46,6 +57,8 @@ class GameState:
         self.mode = GameMode.ANALYSIS
         self.static_solver = solver
         self.simulation_frozen = False
+        self.mode_view = None
+        self.envelope = None
         self.broken_beams.clear()
     
     def freeze_simulation(self):
@@ -90,5 +103,6 @@ class GameState:
     
     @property
     def can_simulate(self):
-        """Check if simulation can run (not frozen)."""
-        return self.is_analysis_mode and not self.simulation_frozen
\ No newline at end of file
+        """Check if simulation can run (not frozen, no mode shape or envelope on display)."""
+        return (self.is_analysis_mode and not self.simulation_frozen
+                and self.mode_view is None and self.envelope is None)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import pygame
 import math
+import numpy as np
 from .constants import *
 
 class Grid:
@@ -19,6 +20,13 @@ class Grid:
         screen_y = int(self.offset_y - (world_y * PPM)) # Flip Y axis because Pygame Y is down
         return screen_x, screen_y
 
+    def world_to_screen_array(self, points):
+        """world_to_screen for an array of points (..., 2); returns int pixels."""
+        screen = np.empty(points.shape, dtype=int)
+        screen[..., 0] = (self.offset_x + points[..., 0] * PPM).astype(int)
+        screen[..., 1] = (self.offset_y - points[..., 1] * PPM).astype(int)
+        return screen
+
     def screen_to_world(self, screen_x, screen_y):
         """Converts Screen Pixels -> Physics Meters"""
         world_x = (screen_x - self.offset_x) / PPM
@@ -48,6 +48,35 @@ class MaterialManager:
         "speed": 5.0
     }
 
+    # --- CHANGE TRACKING ---
+    # Bumped by mark_dirty() whenever a value in MATERIALS changes
+    revision = 0
+    
+    # Derived properties of every material, rebuilt lazily per revision
+    _table = {}
+    _table_revision = -1
+
+    @staticmethod
+    def mark_dirty():
+        """Call after changing MATERIALS; invalidates the cached property table."""
+        MaterialManager.revision += 1
+
+    @staticmethod
+    def get_table():
+        """
+        Derived properties of every material, keyed by material type.
+        
+        Cached until the next mark_dirty(). The returned dicts are shared,
+        callers must not modify them.
+        """
+        if MaterialManager._table_revision != MaterialManager.revision:
+            MaterialManager._table = {
+                mat_type: MaterialManager._compute_properties(base)
+                for mat_type, base in MaterialManager.MATERIALS.items()
+            }
+            MaterialManager._table_revision = MaterialManager.revision
+        return MaterialManager._table
+
     @staticmethod
     def get_geometry(thickness, hollow_ratio):
         """Calculates Area (A) and Inertia (I) based on hollow ratio."""
@@ -62,8 +91,18 @@ class MaterialManager:
 
     @staticmethod
     def get_properties(mat_type, hollow_ratio=None):
-        base = MaterialManager.MATERIALS.get(mat_type, MaterialManager.MATERIALS["wood"])
+        table = MaterialManager.get_table()
+        props = table.get(mat_type, table["wood"])
+        
+        # Only a non-default hollow ratio needs a fresh calculation
+        if hollow_ratio is None or hollow_ratio == props["hollow_ratio"]:
+            return props
         
+        base = MaterialManager.MATERIALS.get(mat_type, MaterialManager.MATERIALS["wood"])
+        return MaterialManager._compute_properties(base, hollow_ratio)
+
+    @staticmethod
+    def _compute_properties(base, hollow_ratio=None):
         if hollow_ratio is None:
             hollow_ratio = base.get("hollow_ratio", 0.0)
             
@@ -76,6 +115,7 @@ class MaterialManager:
             "strength": base["strength"],
             "alpha": base["alpha"],
             "thickness": thickness,
+            "hollow_ratio": hollow_ratio,
             "area": area,
             "inertia": inertia
         }
\ No newline at end of file
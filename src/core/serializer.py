@@ -97,6 +97,7 @@ class Serializer:
                 for mat_key, mat_props in data["materials"].items():
                     if mat_key in MaterialManager.MATERIALS:
                         MaterialManager.MATERIALS[mat_key].update(mat_props)
+                MaterialManager.mark_dirty()
             
             if "settings" in data:
                 MaterialManager.SETTINGS.update(data["settings"])
@@ -121,6 +122,7 @@ class Serializer:
                     node_b = created_nodes[idx_b]
                     bridge.add_beam_direct(node_a, node_b, mat_type)
 
+            bridge.touch()
             name = os.path.basename(filename)
             return True, f"Loaded: {name}"
         except Exception as e:
@@ -1,7 +1,8 @@
 import pygame
-import math
 from core.constants import *
 from core.material_manager import MaterialManager
+from solvers.deformed import deformed_geometry
+from utils.spatial import DeckIndex
 
 class Ixchel:
     def __init__(self, audio_manager=None):
@@ -15,6 +16,11 @@ class Ixchel:
         # Audio
         self.audio = audio_manager
         self.was_moving = False 
+        
+        # Walkable beams with their connectivity graph and x-interval index
+        # (a DeckIndex), and the deck beam the agent is on (see _follow)
+        self._deck = None
+        self._current = None
 
     def spawn(self, x, y):
         self.x = x
@@ -23,6 +29,7 @@ class Ixchel:
         self.active = True
         self.velocity_x = 0
         self.was_moving = False
+        self._current = None
 
     def handle_input(self):
         if not self.active: return
@@ -53,7 +60,7 @@ class Ixchel:
             
         self.was_moving = is_moving
 
-    def update_static(self, dt, beams, displacements=None, exaggeration=1.0):
+    def update_static(self, dt, beams, result=None, exaggeration=1.0):
         if not self.active: return None
         
         self.handle_audio() 
@@ -64,10 +71,13 @@ class Ixchel:
         self.x += self.velocity_x * dt
         
         # PHYSICS CALCULATION: Always use exaggeration=1.0 for accurate physics
-        physics_result = self._find_beam_position(beams, displacements, exaggeration_factor=1.0)
+        physics_result = self._find_beam_position(beams, result, exaggeration_factor=1.0,
+                                                  start=self._current)
+        self._current = physics_result['index'] if physics_result else None
         
         # VISUAL CALCULATION: Use actual exaggeration for rendering
-        visual_result = self._find_beam_position(beams, displacements, exaggeration_factor=exaggeration)
+        visual_result = self._find_beam_position(beams, result, exaggeration_factor=exaggeration,
+                                                 start=self._current)
         
         # Update physics position (used for solver)
         if physics_result:
@@ -94,123 +104,128 @@ class Ixchel:
                 self.visual_y = self.y
             return None
     
-    def _find_beam_position(self, beams, displacements, exaggeration_factor):
+    def _find_beam_position(self, beams, result, exaggeration_factor, start=None):
         """
         Find which beam the agent is on and at what position.
         
+        The agent follows the deck graph from the beam it stood on (start):
+        that beam or one connected to it through a shared node, an O(1)
+        step. Only when it has left them (fell, was lifted, walked off a
+        loose end) is the highest walkable beam under it searched.
+        
         Args:
             beams: List of beams to check
-            displacements: Node displacements from solver
+            result: ResultSet from the solver (None: undeformed)
             exaggeration_factor: Displacement exaggeration (1.0 for physics, higher for visuals)
+            start: Deck index of the beam the agent stood on (None: search)
         
         Returns:
-            Dict with 'beam', 't', 'y' if on a beam, None otherwise
+            Dict with 'beam', 'index' (deck index), 't', 'y' if on a beam,
+            None otherwise
         """
-        best_beam_y = -9999
-        found_beam = None
-        t_val = 0.0
-
-        for beam in beams:
-            if beam.type != "wood": continue 
-
-            # Skip zero-length beams
-            if abs(beam.node_b.x - beam.node_a.x) < 0.001 and abs(beam.node_b.y - beam.node_a.y) < 0.001:
-                continue
-            
-            # --- CALCULATE DEFORMED GEOMETRY ---
-            node_a = beam.node_a
-            node_b = beam.node_b
-            
-            # Get original coordinates
-            x1_orig, y1_orig = node_a.x, node_a.y
-            x2_orig, y2_orig = node_b.x, node_b.y
-            
-            # Apply displacements if they exist
-            da_x, da_y, da_theta = 0, 0, 0
-            db_x, db_y, db_theta = 0, 0, 0
-            
-            if displacements:
-                da_x, da_y, da_theta = displacements.get(node_a, (0,0,0))
-                db_x, db_y, db_theta = displacements.get(node_b, (0,0,0))
+        # Deformed endpoints and curves, shared with the renderer
+        geometry = None
+        if result is not None:
+            geometry = deformed_geometry(result, exaggeration_factor)
+        
+        deck = self._get_deck(beams, result)
+        if self._current is None:
+            start = None  # The deck was rebuilt, its indices changed
+        
+        found = None
+        if start is not None:
+            found = self._follow(deck, start, result, geometry)
+        
+        if found is None:
+            best_beam_y = -9999
+            for i in deck.query(self.x, geometry):
+                position = self._position_on(deck, i, result, geometry)
+                if position is not None and position[1] > best_beam_y:
+                    best_beam_y = position[1]
+                    found = (i,) + position
+        
+        if found:
+            return {
+                'beam': deck.beams[found[0]],
+                'index': found[0],
+                't': found[1],
+                'y': found[2]
+            }
+        else:
+            return None
 
-            # Calculate Endpoints with specified exaggeration
-            p1_x = x1_orig + da_x * exaggeration_factor
-            p1_y = y1_orig + da_y * exaggeration_factor
-            p2_x = x2_orig + db_x * exaggeration_factor
-            p2_y = y2_orig + db_y * exaggeration_factor
+    def _follow(self, deck, start, result, geometry):
+        """
+        Position on deck beam start or, past its ends, on a beam sharing one
+        of its nodes. Where several connected beams are under the agent
+        (stacked beams, a junction), the one nearest its height is taken, so
+        it stays on the level it walks on.
+        
+        Returns:
+            (deck index, t, y) or None if the agent left them
+        """
+        position = self._position_on(deck, start, result, geometry)
+        if position is not None:
+            return (start,) + position
+        
+        found = None
+        for i in deck.neighbors[start]:
+            position = self._position_on(deck, i, result, geometry)
+            if position is not None and (found is None
+                                         or abs(position[1] - self.y) < abs(found[2] - self.y)):
+                found = (i,) + position
+        return found
 
-            # Check X bounds based on deformed positions
-            min_x, max_x = min(p1_x, p2_x), max(p1_x, p2_x)
-            
-            if min_x <= self.x <= max_x:
-                if max_x - min_x < 0.01: continue 
-                
-                beam_dx = p2_x - p1_x
-                beam_dy = p2_y - p1_y
-                beam_len_sq = beam_dx*beam_dx + beam_dy*beam_dy
-                
-                # Vector from Node A to Agent
-                agent_dx = self.x - p1_x
-                agent_dy = self.y - p1_y
+    def _position_on(self, deck, i, result, geometry):
+        """
+        (t, y) of the agent on deck beam i, or None if it is not above it.
+        """
+        beam = deck.beams[i]
+        
+        # --- DEFORMED GEOMETRY ---
+        k = deck.rows[i] if geometry is not None else -1
+        if k >= 0:
+            (p1_x, p1_y), (p2_x, p2_y) = geometry.p1[k], geometry.p2[k]
+        else:
+            p1_x, p1_y = beam.node_a.x, beam.node_a.y
+            p2_x, p2_y = beam.node_b.x, beam.node_b.y
 
-                if beam_len_sq > 0.00001:
-                    # Dot Product Projection: (AgentVector . BeamVector) / |BeamVector|^2
-                    dot = agent_dx * beam_dx + agent_dy * beam_dy
-                    t = dot / beam_len_sq
-                else:
-                    t = 0.5 # Fallback for zero-length beams
-                
-                # --- CUBIC HERMITE SPLINE INTERPOLATION (Matches Renderer) ---
-                if displacements:
-                    chord_dx = p2_x - p1_x
-                    chord_dy = p2_y - p1_y
-                    L_deformed = math.hypot(chord_dx, chord_dy)
-                    psi = math.atan2(chord_dy, chord_dx)
-                    
-                    orig_dx = x2_orig - x1_orig
-                    orig_dy = y2_orig - y1_orig
-                    alpha = math.atan2(orig_dy, orig_dx)
-                    
-                    # Rotations relative to the new chord
-                    rot1 = (alpha + da_theta * exaggeration_factor) - psi
-                    rot2 = (alpha + db_theta * exaggeration_factor) - psi
-                    
-                    # Normalize angles to [-pi, pi]
-                    while rot1 > math.pi: rot1 -= 2 * math.pi
-                    while rot1 < -math.pi: rot1 += 2 * math.pi
-                    while rot2 > math.pi: rot2 -= 2 * math.pi
-                    while rot2 < -math.pi: rot2 += 2 * math.pi
-                    
-                    # Shape functions
-                    s = t
-                    h1 = s**3 - 2*s**2 + s
-                    h2 = s**3 - s**2
-                    
-                    v = L_deformed * (h1 * rot1 + h2 * rot2) # Perpendicular deflection
-                    u = s * L_deformed                       # Axial distance along chord
-                    
-                    cp = math.cos(psi)
-                    sp = math.sin(psi)
-                    
-                    # Final calculated Y on the curve
-                    beam_y = p1_y + u*sp + v*cp
-                else:
-                    # Fallback to linear interpolation if no simulation data
-                    beam_y = p1_y + t * (p2_y - p1_y)
-                
-                if beam_y > best_beam_y:
-                    best_beam_y = beam_y
-                    found_beam = beam
-                    t_val = t
+        # Check X bounds based on deformed positions
+        min_x, max_x = min(p1_x, p2_x), max(p1_x, p2_x)
+        if not min_x <= self.x <= max_x or max_x - min_x < 0.01:
+            return None
+        
+        beam_dx = p2_x - p1_x
+        beam_dy = p2_y - p1_y
+        beam_len_sq = beam_dx*beam_dx + beam_dy*beam_dy
+        
+        # Vector from Node A to Agent
+        agent_dx = self.x - p1_x
+        agent_dy = self.y - p1_y
 
-        if found_beam:
-            return {
-                'beam': found_beam,
-                't': t_val,
-                'y': best_beam_y
-            }
+        if beam_len_sq > 0.00001:
+            # Dot Product Projection: (AgentVector . BeamVector) / |BeamVector|^2
+            dot = agent_dx * beam_dx + agent_dy * beam_dy
+            t = dot / beam_len_sq
         else:
-            return None
+            t = 0.5 # Fallback for zero-length beams
+        
+        if k >= 0:
+            # Cubic Hermite curve of the beam (matches the renderer)
+            beam_y = geometry.point(k, t)[1]
+        else:
+            # Fallback to linear interpolation if no simulation data
+            beam_y = p1_y + t * (p2_y - p1_y)
+        
+        return float(t), float(beam_y)
+
+    def _get_deck(self, beams, result):
+        """The walkable deck (see DeckIndex), rebuilt when the beams or the model change."""
+        model = result.model if result is not None else None
+        if self._deck is None or not self._deck.is_current(beams, model):
+            self._deck = DeckIndex(beams, model)
+            self._current = None  # Deck indices changed
+        return self._deck
 
     def draw(self, surface, grid):
         if not self.active: return
@@ -12,6 +12,13 @@ class Bridge:
     def __init__(self):
         self.nodes = []
         self.beams = []
+        # Bumped on every geometry/topology edit; solvers compare it to
+        # decide when cached models and factorizations are stale.
+        self.revision = 0
+
+    def touch(self):
+        """Marks the geometry or topology as changed."""
+        self.revision += 1
 
     def add_node(self, x, y, fixed=False):
         """Adds a unique node at (x,y). Returns existing node if found."""
@@ -21,6 +28,7 @@ class Bridge:
         
         new_node = Node(x, y, fixed)
         self.nodes.append(new_node)
+        self.touch()
         return new_node
 
     def fracture_beam(self, beam):
@@ -43,6 +51,7 @@ class Bridge:
 
         if beam in self.beams:
             self.beams.remove(beam)
+        self.touch()
 
     def split_beam(self, beam, x, y):
         """ Editor Tool: Splits a beam and WELDS them at the new node. """
@@ -67,6 +76,7 @@ class Bridge:
         
         self.add_beam_direct(beam.node_a, new_node, mat_type)
         self.add_beam_direct(new_node, beam.node_b, mat_type)
+        self.touch()
         
         return new_node
 
@@ -98,6 +108,7 @@ class Bridge:
         # Create two new beams connecting to this node
         self.add_beam_direct(beam.node_a, node, mat_type)
         self.add_beam_direct(node, beam.node_b, mat_type)
+        self.touch()
 
     def _get_intersection(self, p1, p2, p3, p4):
         x1, y1 = p1.x, p1.y
@@ -204,11 +215,14 @@ class Bridge:
         for b in self.beams:
             if (b.node_a == node_a and b.node_b == node_b) or \
                (b.node_a == node_b and b.node_b == node_a):
-                b.type = material_type
+                if b.type != material_type:
+                    b.type = material_type
+                    self.touch()
                 return b 
         
         new_beam = Beam(node_a, node_b, material_type)
         self.beams.append(new_beam)
+        self.touch()
         return new_beam
 
     def get_node_at(self, x, y, threshold=0.4):
@@ -0,0 +1,196 @@
+import numpy as np
+from core.material_manager import MaterialManager
+from solvers.deformed import deformed_geometry
+from utils.spatial import DeckIndex
+
+class Crowd:
+    """
+    Walkers and multi-axle vehicles crossing the deck on their own, kept as
+    arrays so a crowd of hundreds costs about as much as one agent.
+
+    Every body carries one or more load points (a walker one, a vehicle one
+    per axle) that rest on the deck and load the bridge independently:
+
+        x, velocity         (n_bodies,)   position and speed along the deck
+        kind                (n_bodies,)   WALKER or VEHICLE
+        owner, offset       (n_points,)   body of each load point and its
+                                          x-offset from the body
+        mass                (n_points,)   share of the body's mass (kg)
+        y, visual_y         (n_points,)   height at exaggeration 1 (physics)
+                                          and at the displayed exaggeration
+
+    Bodies turn around at the ends of the deck. All load points are placed
+    with one batched lookup per exaggeration (see _locate).
+    """
+    WALKER = 0
+    VEHICLE = 1
+
+    # Walker speeds (m/s) and masses (share of the agent mass) are drawn from these ranges
+    WALKER_SPEED = (0.8, 1.8)
+    WALKER_MASS = (0.7, 1.3)
+
+    # Vehicle: total mass (kg), speed (m/s) and axles spread over AXLE_SPACING (m)
+    VEHICLE_MASS = 1500.0
+    VEHICLE_SPEED = 3.0
+    VEHICLE_AXLES = 2
+    AXLE_SPACING = 2.5
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.clear()
+        self._deck = None
+
+    def clear(self):
+        """Removes every body."""
+        self.x = np.zeros(0)
+        self.velocity = np.zeros(0)
+        self.kind = np.zeros(0, dtype=int)
+        self.owner = np.zeros(0, dtype=int)
+        self.offset = np.zeros(0)
+        self.mass = np.zeros(0)
+        self.y = np.zeros(0)
+        self.visual_y = np.zeros(0)
+
+    @property
+    def walkers(self):
+        return int(np.count_nonzero(self.kind == self.WALKER))
+
+    @property
+    def vehicles(self):
+        return int(np.count_nonzero(self.kind == self.VEHICLE))
+
+    def add_walkers(self, count, x_range, y):
+        """
+        Spawns walkers evenly over the deck, each with its own speed,
+        direction and mass.
+
+        Args:
+            count: Number of walkers
+            x_range: (min_x, max_x) of the deck
+            y: Spawn height (they settle on the deck)
+        """
+        speed = self.rng.uniform(*self.WALKER_SPEED, count)
+        direction = self.rng.choice([-1.0, 1.0], count)
+        mass = self.rng.uniform(*self.WALKER_MASS, count) * MaterialManager.AGENT["mass"]
+        x = self.rng.uniform(x_range[0], x_range[1], count)
+        self._add(self.WALKER, x, speed * direction, np.zeros((count, 1)), mass[:, None], y)
+
+    def add_vehicle(self, x_range, y):
+        """Spawns a vehicle at the left end of the deck, driving right."""
+        offsets = (np.arange(self.VEHICLE_AXLES) - (self.VEHICLE_AXLES - 1) / 2) \
+            * self.AXLE_SPACING / max(self.VEHICLE_AXLES - 1, 1)
+        masses = np.full(self.VEHICLE_AXLES, self.VEHICLE_MASS / self.VEHICLE_AXLES)
+        x = x_range[0] - offsets[0]
+        self._add(self.VEHICLE, np.array([x]), np.array([self.VEHICLE_SPEED]),
+                  offsets[None, :], masses[None, :], y)
+
+    def _add(self, kind, x, velocity, offsets, masses, y):
+        """Appends bodies with offsets/masses of shape (count, points per body)."""
+        count, per_body = offsets.shape
+        owner = len(self.x) + np.repeat(np.arange(count), per_body)
+        self.x = np.concatenate([self.x, x])
+        self.velocity = np.concatenate([self.velocity, velocity])
+        self.kind = np.concatenate([self.kind, np.full(count, kind)])
+        self.owner = np.concatenate([self.owner, owner])
+        self.offset = np.concatenate([self.offset, offsets.ravel()])
+        self.mass = np.concatenate([self.mass, masses.ravel()])
+        self.y = np.concatenate([self.y, np.full(count * per_body, float(y))])
+        self.visual_y = np.concatenate([self.visual_y, np.full(count * per_body, float(y))])
+
+    def points_x(self):
+        """x of every load point."""
+        return self.x[self.owner] + self.offset
+
+    def update(self, dt, beams, result, exaggeration=1.0):
+        """
+        Moves every body and places its load points on the deformed deck.
+
+        Args:
+            dt: Frame time (s)
+            beams: Beams of the bridge
+            result: ResultSet to walk on (None: bodies stand still)
+            exaggeration: Displayed exaggeration (for visual_y)
+
+        Returns:
+            List of (beam, t, mass) for the supported load points
+        """
+        if not len(self.x) or result is None:
+            return []
+
+        deck = self._get_deck(beams, result)
+        if not deck.beams:
+            return []
+
+        # Walk, turning around where a body's points would leave the deck
+        self.x += self.velocity * dt
+        lo, hi = deck.x_range
+        first = np.full(len(self.x), np.inf)
+        last = np.full(len(self.x), -np.inf)
+        np.minimum.at(first, self.owner, self.offset)
+        np.maximum.at(last, self.owner, self.offset)
+        turn = ((self.x + first < lo) & (self.velocity < 0)) | ((self.x + last > hi) & (self.velocity > 0))
+        self.velocity[turn] = -self.velocity[turn]
+
+        x = self.points_x()
+
+        # PHYSICS: exaggeration 1.0, VISUAL: displayed exaggeration
+        physics = self._locate(deck, result, 1.0, x, self.y)
+        visual = self._locate(deck, result, exaggeration, x, self.visual_y)
+
+        supported, row, t, y = physics
+        self.y[supported] = y
+        self.visual_y[:] = self.y
+        self.visual_y[visual[0]] = visual[3]
+
+        # Falling
+        falling = np.ones(len(x), dtype=bool)
+        falling[supported] = False
+        falling &= self.y > -10
+        self.y[falling] -= 9.81 * dt
+        self.visual_y[falling] = self.y[falling]
+
+        walk = deck.beams
+        return [(walk[i], float(tk), float(m))
+                for i, tk, m in zip(row, t, self.mass[supported])]
+
+    def _locate(self, deck, result, exaggeration, x, y):
+        """
+        Highest walkable beam under every load point, all points at once.
+
+        Candidate (point, beam) pairs come from the deck's x-bucket index;
+        each pair is projected onto the deformed chord and evaluated on the
+        beam's Hermite curve, as Ixchel does for a single point. Beams the
+        model left out (not solved) carry no one.
+
+        Returns:
+            (points, beams, t, y): the supported points, their deck beam
+            (index into deck.beams), position on it and height
+        """
+        geometry = deformed_geometry(result, exaggeration)
+        point, cand = deck.query_many(x, geometry)
+        k = deck.rows[cand]
+        point, cand, k = point[k >= 0], cand[k >= 0], k[k >= 0]
+        px = x[point]
+        x1, x2 = geometry.p1[k, 0], geometry.p2[k, 0]
+        inside = ((np.minimum(x1, x2) <= px) & (px <= np.maximum(x1, x2))
+                  & (np.abs(x2 - x1) >= 0.01))
+        point, cand, k, px = point[inside], cand[inside], k[inside], px[inside]
+
+        # Dot Product Projection onto the deformed chord
+        p1, p2 = geometry.p1[k], geometry.p2[k]
+        d = p2 - p1
+        t = ((px - p1[:, 0]) * d[:, 0] + (y[point] - p1[:, 1]) * d[:, 1]) / np.einsum("ij,ij->i", d, d)
+        t = np.clip(t, 0.0, 1.0)
+        beam_y = geometry.point(k, t)[1]
+
+        # Highest beam per point: last of each point's run, sorted by height
+        order = np.lexsort((beam_y, point))
+        point, cand, t, beam_y = point[order], cand[order], t[order], beam_y[order]
+        last = np.r_[point[1:] != point[:-1], True] if len(point) else np.zeros(0, dtype=bool)
+        return point[last], cand[last], t[last], beam_y[last]
+
+    def _get_deck(self, beams, result):
+        """The walkable deck (see DeckIndex), rebuilt when the beams or the model change."""
+        if self._deck is None or not self._deck.is_current(beams, result.model):
+            self._deck = DeckIndex(beams, result.model)
+        return self._deck
@@ -3,8 +3,10 @@ Ixchel's Bridge - Engineering Laboratory
 
 A physics-based bridge building and analysis simulation.
 """
+import math
 import pygame
 import sys
+import threading
 from core.constants import *
 from core.grid import Grid
 from core.game_state import GameState, GameMode
@@ -12,12 +14,15 @@ from core.material_manager import MaterialManager
 from core.serializer import Serializer
 from entities.bridge import Bridge
 from entities.agent import Ixchel
+from entities.crowd import Crowd
 from ui.editor import Editor
 from ui.toolbar import Toolbar
 from ui.graph_overlay import GraphOverlay
 from ui.property_menu import PropertyMenu
-from ui.renderers import AnalysisRenderer, VolumePopup
+from ui.renderers import AnalysisRenderer, VolumePopup, draw_crowd
 from solvers.static_solver import StaticSolver
+from solvers.scheduler import SolveScheduler
+from solvers.worker import SolverJob, SolverWorker
 from audio.audio_manager import AudioManager
 
 
@@ -27,6 +32,12 @@ class BridgeBuilderApp:
     # Physics time step limit to prevent instability
     MAX_DT = 0.1
     
+    # Mode shapes are animated with this period (s), whatever their frequency
+    MODE_VIEW_PERIOD = 1.5
+    
+    # Crowd sizes stepped through with H
+    CROWD_SIZES = (0, 10, 50, 100)
+    
     def __init__(self):
         pygame.init()
         pygame.display.set_caption("Ixchel Hídja - Mérnöki Laboratórium")
@@ -50,6 +61,11 @@ class BridgeBuilderApp:
         
         # Simulation
         self.ghost_agent = Ixchel(None)  # Audio assigned later
+        self.crowd = Crowd()  # Walkers and vehicles besides the agent
+        self.scheduler = None  # SolveScheduler of the running simulation
+        self.worker = None  # SolverWorker while solving in the background
+        self.solver_lock = threading.RLock()  # Guards the solver, shared with the worker
+        self.envelope_job = None  # SolverJob computing the envelope
         
         # Audio
         self.audio = self._init_audio()
@@ -194,6 +210,91 @@ class BridgeBuilderApp:
             self.graph.toggle()
             return True
         
+        # Geometric nonlinear (P-delta) analysis toggle
+        if key == pygame.K_n:
+            self.state.nonlinear_analysis = not self.state.nonlinear_analysis
+            state_str = "BE" if self.state.nonlinear_analysis else "KI"
+            self.state.show_status(f"P-Delta Analízis: {state_str}")
+            return True
+        
+        # Transient dynamic analysis toggle (restarts from rest)
+        if key == pygame.K_d:
+            self.state.dynamic_analysis = not self.state.dynamic_analysis
+            if self.state.static_solver is not None:
+                with self._solver_lock():
+                    self.state.static_solver.reset_dynamic()
+            state_str = "BE" if self.state.dynamic_analysis else "KI"
+            self.state.show_status(f"Dinamikus Analízis: {state_str}")
+            return True
+        
+        # Progressive collapse: failed members are removed instead of freezing
+        if key == pygame.K_c:
+            self.state.progressive_collapse = not self.state.progressive_collapse
+            state_str = "BE" if self.state.progressive_collapse else "KI"
+            self.state.show_status(f"Progresszív Összeomlás: {state_str}")
+            return True
+        
+        # Background solver thread toggle
+        if key == pygame.K_b:
+            self.state.background_solve = not self.state.background_solve
+            if self.state.is_analysis_mode:
+                self._stop_worker()
+                if self.state.background_solve:
+                    self._start_worker()
+            state_str = "BE" if self.state.background_solve else "KI"
+            self.state.show_status(f"Háttér Számítás: {state_str}")
+            return True
+        
+        # Crowd size: 0 -> 10 -> 50 -> 100 -> 0 walkers
+        if key == pygame.K_h:
+            sizes = self.CROWD_SIZES
+            index = sizes.index(self.state.crowd_size) if self.state.crowd_size in sizes else -1
+            self.state.crowd_size = sizes[(index + 1) % len(sizes)]
+            if self.state.is_analysis_mode:
+                self._populate_crowd()
+            self.state.show_status(f"Tömeg: {self.state.crowd_size} járókelő")
+            return True
+        
+        # Send a vehicle across the deck
+        if key == pygame.K_j and self.state.is_analysis_mode:
+            extent = self._deck_extent()
+            if extent is not None:
+                self.crowd.add_vehicle(extent[:2], extent[2] + 1.0)
+                self.state.show_status(f"Jármű ({self.crowd.VEHICLE_MASS:.0f}kg) indul "
+                                       f"- járművek: {self.crowd.vehicles}")
+            return True
+        
+        # Panel condensation with recovery limited to the rendered part
+        if key == pygame.K_k:
+            self.state.substructures = not self.state.substructures
+            if self.state.is_analysis_mode:
+                self._configure_solver()
+            state_str = "BE" if self.state.substructures else "KI"
+            self.state.show_status(f"Panel Kondenzáció: {state_str}")
+            return True
+        
+        # Preconditioned conjugate gradient backend instead of factorizing
+        if key == pygame.K_i:
+            self.state.iterative_solve = not self.state.iterative_solve
+            if self.state.is_analysis_mode:
+                self._configure_solver()
+            state_str = "BE" if self.state.iterative_solve else "KI"
+            self.state.show_status(f"Iteratív Megoldó (PCG): {state_str}")
+            return True
+        
+        # Natural mode viewer: off -> mode 1 -> ... -> mode N -> off
+        if key == pygame.K_f and self.state.is_analysis_mode:
+            self.state.envelope = None
+            self.envelope_job = None
+            self._cycle_mode_view()
+            return True
+        
+        # Moving-load envelope and safe agent mass
+        if key == pygame.K_e and self.state.is_analysis_mode:
+            self.state.mode_view = None
+            self._toggle_envelope()
+            return True
+        
         # File operations (Ctrl+S, Ctrl+L)
         is_ctrl = (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL])
         if is_ctrl and self.state.is_build_mode:
@@ -224,10 +325,15 @@ class BridgeBuilderApp:
         # Prepare solver
         solver = StaticSolver(self.bridge)
         
+        # Solver backend options (panel condensation, conjugate gradients)
+        self._configure_solver(solver)
+        
         # Check stability
         if not solver.is_stable():
             if "Mechanism" in solver.error_msg:
-                self.state.show_error("Instabil szerkezet! (Mechanizmus)")
+                self.editor.highlight_unstable(solver.unstable_nodes)
+                count = len(solver.unstable_nodes)
+                self.state.show_error(f"Instabil szerkezet! (Mechanizmus, {count} csomópont)")
             else:
                 self.state.show_error(solver.error_msg)
             return
@@ -238,17 +344,33 @@ class BridgeBuilderApp:
             self.state.show_error("Instabil: Szinguláris Mátrix")
             return
         
+        # Precompute moving-load responses for the walkable (wood) deck
+        solver.build_influence([b for b in self.bridge.beams if b.type == "wood"])
+        
+        # Unsupported parts were skipped; mark them for when editing resumes
+        self.editor.highlight_unstable(solver.floating_nodes)
+        
         # Enter analysis mode
         self.state.enter_analysis_mode(solver)
+        self.scheduler = SolveScheduler(solver)
+        if self.state.background_solve:
+            self._start_worker()
         self.prop_menu.set_analysis_mode(True)  # Switch temp slider to sim mode
         self.graph.reset_data()
         self.graph.visible = True
         
-        # Spawn agent at leftmost wood beam
+        # Spawn agent at leftmost wood beam, and the crowd over the deck
         self._spawn_agent()
+        self._populate_crowd()
         
         agent_mass = MaterialManager.AGENT["mass"]
-        self.state.show_status(f"Szimuláció (Tömeg: {agent_mass:.1f}kg)")
+        if solver.floating_nodes:
+            skipped = len(solver.floating_nodes)
+            self.state.show_status(
+                f"Szimuláció (Tömeg: {agent_mass:.1f}kg) - {skipped} rögzítetlen csomópont kihagyva"
+            )
+        else:
+            self.state.show_status(f"Szimuláció (Tömeg: {agent_mass:.1f}kg)")
 
     def _spawn_agent(self):
         """Spawn agent at the leftmost wood beam."""
@@ -269,13 +391,144 @@ class BridgeBuilderApp:
         else:
             self.ghost_agent.active = False
 
+    def _deck_extent(self):
+        """(min_x, max_x, max_y) of the wood beams, or None if there are none."""
+        nodes = [n for beam in self.bridge.beams if beam.type == "wood"
+                 for n in (beam.node_a, beam.node_b)]
+        if not nodes:
+            return None
+        return (min(n.x for n in nodes), max(n.x for n in nodes), max(n.y for n in nodes))
+
+    def _populate_crowd(self):
+        """Replace the crowd with state.crowd_size walkers spread over the deck."""
+        self.crowd.clear()
+        extent = self._deck_extent()
+        if extent is not None and self.state.crowd_size:
+            self.crowd.add_walkers(self.state.crowd_size, extent[:2], extent[2] + 1.0)
+
     def _stop_simulation(self):
         """Exit simulation mode and return to build mode."""
+        self._stop_worker()
+        self.scheduler = None
+        self.envelope_job = None
+        self.crowd.clear()
         self.state.enter_build_mode()
         self.toolbar.active_index = 0
         self.state.show_status("Épí­tés Mód")
         self.audio.stop_sfx("step")
 
+    def _configure_solver(self, solver=None):
+        """Apply the backend options of the game state to the (running) solver."""
+        solver = solver or self.state.static_solver
+        with self._solver_lock():
+            if self.state.substructures:
+                # Panel interiors are only recovered on screen (and under load)
+                x_min = self.grid.screen_to_world(0, 0)[0]
+                x_max = self.grid.screen_to_world(self.screen.get_width(), 0)[0]
+                solver.use_substructures("auto")
+                solver.set_recovery_window((x_min, x_max))
+            else:
+                solver.use_substructures(None)
+                solver.set_recovery_window(None)
+            solver.use_iterative("ilu" if self.state.iterative_solve else None)
+            if self.scheduler is not None:
+                self.scheduler.clear()
+
+    def _start_worker(self):
+        """Start solving in a background thread (see SolverWorker)."""
+        self.worker = SolverWorker(self.state.static_solver, self.scheduler, self.solver_lock)
+
+    def _stop_worker(self):
+        """Stop the background solver thread, if running."""
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
+    def _solver_lock(self):
+        """
+        Context for using the solver outside of the worker thread. Taken by
+        the frame's own solves as well, as an envelope job may be running.
+        """
+        return self.solver_lock
+
+    def _current_result(self):
+        """The result on display: the worker's front buffer, or the last solve."""
+        solver = self.state.static_solver
+        if self.worker is not None:
+            snapshot = self.worker.latest()
+            if snapshot is not None:
+                return snapshot.result
+        return solver.current if solver else None
+
+    def _cycle_mode_view(self):
+        """
+        Show the next natural mode shape (modal analysis), then the global
+        buckling mode, then switch back to the loads.
+        """
+        solver = self.state.static_solver
+        with self._solver_lock():
+            modes = solver.modal_analysis()
+            buckling = solver.buckling_analysis()
+        if modes is None:
+            self.state.show_error(solver.error_msg)
+            return
+        
+        index = 0 if self.state.mode_view is None else self.state.mode_view + 1
+        if index == len(modes) and buckling is not None and math.isfinite(buckling.factor):
+            self.state.mode_view = index
+            self.state.show_status(f"Kihajlási Alak: λ = {buckling.factor:.2f} (önsúly)")
+            return
+        if index >= len(modes):
+            self.state.mode_view = None
+            self.state.show_status("Rezgésalak Nézet: KI")
+            return
+        
+        self.state.mode_view = index
+        self.state.show_status(
+            f"Rezgésalak {index + 1}/{len(modes)}: {modes.frequencies[index]:.2f} Hz"
+        )
+
+    def _toggle_envelope(self):
+        """
+        Start computing the moving-load envelope of the agent over the deck
+        (in the background, see _poll_envelope), or switch back.
+        """
+        if self.state.envelope is not None or self.envelope_job is not None:
+            self.state.envelope = None
+            self.envelope_job = None  # A job still running is left to finish unseen
+            self.state.show_status("Burkológörbe: KI")
+            return
+        
+        solver = self.state.static_solver
+        delta_T = MaterialManager.SETTINGS["sim_temp"] - MaterialManager.SETTINGS["base_temp"]
+        self.envelope_job = SolverJob(
+            solver, self._solver_lock(), solver.moving_load_envelope,
+            [b for b in self.bridge.beams if b.type == "wood"],
+            MaterialManager.AGENT["mass"], temperature=delta_T
+        )
+        self.state.show_status("Burkológörbe számítása...", duration=600)
+
+    def _poll_envelope(self):
+        """Show the envelope once its job is done."""
+        snapshot = self.envelope_job.snapshot
+        if snapshot is None:
+            return
+        self.envelope_job = None
+        if not snapshot.solved:
+            self.state.show_error(snapshot.error_msg)
+            return
+        
+        envelope = snapshot.result
+        self.state.envelope = envelope
+        if math.isinf(envelope.safe_mass):
+            safe = "korlátlan"
+        else:
+            safe = f"{envelope.safe_mass:.1f} kg"
+        self.state.show_status(
+            f"Burkológörbe: max {envelope.max_ratio() * 100:.0f}% | Biztonságos tömeg: {safe}",
+            duration=600
+        )
+
     def _save_file(self):
         """Save bridge design to file."""
         success, msg = Serializer.save_as(self.bridge)
@@ -298,6 +551,9 @@ class BridgeBuilderApp:
         self.state.update(dt)
         self.prop_menu.update()
         
+        if self.envelope_job is not None:
+            self._poll_envelope()
+        
         if self.state.can_simulate:
             self._update_simulation(dt)
 
@@ -308,45 +564,75 @@ class BridgeBuilderApp:
         # Update agent mass from settings
         self.ghost_agent.mass = MaterialManager.AGENT["mass"]
         
-        # Get current displacements and exaggeration
-        displacements = solver.displacements
+        # Get the displayed result (its deformed shape) and exaggeration
+        result = self._current_result()
         exaggeration = self.graph.sim_settings["exaggeration"]
         
         # Update agent position
         load_info = self.ghost_agent.update_static(
-            dt, self.bridge.beams, displacements, exaggeration
+            dt, self.bridge.beams, result, exaggeration
         )
         
-        # Prepare loads for solver
-        solver_loads = {}
+        # Prepare loads for solver: the agent and every supported crowd
+        # load point, as (beam, t, mass) (several may share a beam)
+        solver_loads = self.crowd.update(dt, self.bridge.beams, result, exaggeration)
         if load_info and 'beam' in load_info:
-            solver_loads[load_info['beam']] = (load_info['t'], load_info['mass'])
+            solver_loads.append((load_info['beam'], load_info['t'], load_info['mass']))
         
         # Solve with thermal and point loads
         delta_T = MaterialManager.SETTINGS["sim_temp"] - MaterialManager.SETTINGS["base_temp"]
-        solver.solve(temperature=delta_T, point_load=solver_loads)
+        if self.worker is not None:
+            # Solved in the background; the newest completed solve is used
+            self.worker.post(dt, delta_T, solver_loads, self.state.nonlinear_analysis,
+                             self.state.dynamic_analysis)
+            snapshot = self.worker.latest()
+            solved = snapshot is None or snapshot.solved
+            error_msg = solver.error_msg if snapshot is None else snapshot.error_msg
+        elif self.state.dynamic_analysis:
+            with self._solver_lock():
+                solved = solver.solve_dynamic(dt, temperature=delta_T, point_load=solver_loads)
+                error_msg = solver.error_msg
+        else:
+            # Skipped or answered from the cache when the load state is unchanged
+            with self._solver_lock():
+                solved = self.scheduler.solve(temperature=delta_T, point_load=solver_loads,
+                                              nonlinear=self.state.nonlinear_analysis)
+                error_msg = solver.error_msg
+        if not solved:
+            # The whole structure lost stability (P-delta buckling, singular K)
+            self.state.freeze_simulation()
+            self.state.show_error(error_msg)
         
-        # Check for beam failures
+        # Check for beam failures (vectorized over the result arrays)
+        result = self._current_result()
         max_force = 0.0
         max_percent = 0.0
         new_break = False
         
-        for beam in self.bridge.beams:
-            # Calculate total load
-            f_axial = abs(solver.results.get(beam, 0))
-            f_bend = abs(solver.bending_results.get(beam, 0))
-            total_load = f_axial + f_bend
-            max_force = max(max_force, total_load)
-            
-            # Check stress ratio
-            ratio = solver.stress_ratios.get(beam, 0)
-            percent = ratio * 100.0
-            max_percent = max(max_percent, percent)
+        if result is not None:
+            # Total load = |axial| + |bending|, stress ratio as percent
+            max_force = result.max_total_force()
+            max_percent = result.max_ratio() * 100.0
             
             # Detect failure
-            if ratio >= 1.0 and beam not in self.state.broken_beams:
-                self.state.broken_beams.add(beam)
-                new_break = True
+            for beam in result.failed_beams():
+                if beam not in self.state.broken_beams:
+                    self.state.broken_beams.add(beam)
+                    new_break = True
+        
+        # Progressive collapse: take the failed members out and keep going;
+        # the next frame re-checks the rest, so the cascade plays out
+        # one step per frame until it stops or a mechanism forms
+        if new_break and self.state.progressive_collapse:
+            new_break = False
+            self.audio.play_sfx("wood_break")
+            with self._solver_lock():
+                stable = solver.remove_beams(self.state.broken_beams)
+                error_msg = solver.error_msg
+            if not stable:
+                self.state.freeze_simulation()
+                self.state.show_error(f"ÖSSZEOMLOTT! {error_msg}")
+                self.audio.stop_sfx("step")
         
         # Handle beam break
         if new_break:
@@ -395,17 +681,36 @@ class BridgeBuilderApp:
 
     def _draw_analysis_mode(self):
         """Draw analysis mode view."""
+        # Mode shape on display: animate it instead of the load state
+        overlay = None
+        solver = self.state.static_solver
+        modes = buckling = None
+        if self.state.mode_view is not None:
+            # The worker thread may be recomputing these: take both at once
+            with self._solver_lock():
+                modes, buckling = solver.modes, solver.buckling
+        if modes is not None:
+            phase = 2 * math.pi * pygame.time.get_ticks() / 1000.0 / self.MODE_VIEW_PERIOD
+            amplitude = solver.MODE_AMPLITUDE * math.cos(phase)
+            if self.state.mode_view < len(modes):
+                overlay = modes.result(self.state.mode_view, amplitude)
+            elif buckling is not None:
+                overlay = buckling.result(amplitude)
+        elif self.state.envelope is not None:
+            overlay = self.state.envelope.result()
+        
         # Render deformed structure
         self.analysis_renderer.draw(
             self.screen,
             self.bridge,
-            self.state.static_solver,
+            solver,
             self.state.broken_beams,
-            self.graph.sim_settings["exaggeration"]
+            self.graph.sim_settings["exaggeration"],
+            overlay if overlay is not None else self._current_result()
         )
         
         # Draw agent
-        if self.ghost_agent.active:
+        if self.ghost_agent.active and overlay is None:
             from ui.renderers import draw_ixchel
             # Use visual_y for rendering (respects exaggeration)
             sx, sy = self.grid.world_to_screen(
@@ -413,6 +718,8 @@ class BridgeBuilderApp:
                 self.ghost_agent.visual_y
             )
             draw_ixchel(self.screen, sx, sy)
+        if overlay is None:
+            draw_crowd(self.screen, self.grid, self.crowd)
         
         # Legend
         self._draw_legend()
@@ -445,8 +752,21 @@ class BridgeBuilderApp:
         """Draw legend for analysis visualization."""
         from utils.render_utils import create_semi_transparent_surface
         
-        x, y = 20, self.screen.get_height() - 480
-        w, h = 220, 100
+        # Solver status lines below the buckling factor
+        lines = []
+        if self.worker is not None:
+            # Age of the displayed result while solving in the background
+            lines.append(f"Eredmény kora: {self.worker.age() * 1000:.0f} ms")
+        recovery = self.state.static_solver.recovery
+        if recovery is not None:
+            # Condensed panels recovered in the last solve
+            lines.append(f"Panelek: {recovery[0]}/{recovery[1]}")
+        if self.state.static_solver.iterative is not None:
+            # Conjugate gradient iterations of the last solve
+            lines.append(f"CG iterációk: {self.state.static_solver.iterations}")
+        
+        w, h = 220, 125 + 25 * len(lines)
+        x, y = 20, self.screen.get_height() - 355 - h
         
         # Background
         bg = create_semi_transparent_surface(w, h, (30, 35, 30), 230)
@@ -466,6 +786,19 @@ class BridgeBuilderApp:
         pygame.draw.rect(self.screen, COLOR_TENSION, (x + 10, y + 65, 20, 20))
         lbl_t = font.render("Húzás", True, (200, 200, 200))
         self.screen.blit(lbl_t, (x + 40, y + 65))
+        
+        # Global buckling load factor of the current load state
+        result = self._current_result()
+        if result is not None and math.isfinite(result.buckling_factor):
+            factor = f"{result.buckling_factor:.1f}"
+        else:
+            factor = "-"
+        lbl_b = font.render(f"Kihajlási tényező: {factor}", True, (200, 200, 200))
+        self.screen.blit(lbl_b, (x + 10, y + 95))
+        
+        for i, line in enumerate(lines):
+            lbl = font.render(line, True, (200, 200, 200))
+            self.screen.blit(lbl, (x + 10, y + 120 + 25 * i))
 
     def _draw_messages(self):
         """Draw status/error messages."""
@@ -501,6 +834,7 @@ class BridgeBuilderApp:
 
     def quit(self):
         """Clean shutdown."""
+        self._stop_worker()
         pygame.quit()
         sys.exit()
 
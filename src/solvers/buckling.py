@@ -0,0 +1,356 @@
+"""
+Linearized (eigenvalue) buckling analysis of the whole frame.
+"""
+import copy
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse.linalg as spla
+from solvers.factorization import Factorization
+from solvers.nonlinear import geometric_stiffness
+from solvers.results import ResultSet
+
+
+def critical_load_factor(K, K_G, factorization=None, dense_limit=150, guess=None):
+    """
+    Smallest positive load factor lambda with (K + lambda·K_G)·phi = 0.
+
+    Solved as -K_G·phi = mu·K·phi with mu = 1/lambda: the largest mu is the
+    lowest buckling mode. Lanczos (ARPACK) on this form applies K^-1, i.e.
+    it is shift-invert around lambda = 0, and K^-1 comes from the given
+    factorization, so the static solver's factor is reused. Small systems
+    are solved densely.
+
+    Args:
+        K: Reduced stiffness matrix (scipy.sparse, positive definite)
+        K_G: Reduced geometric stiffness of the reference axial forces
+        factorization: Object with solve(rhs) applying K^-1 (large systems)
+        dense_limit: Systems up to this size use a dense eigensolver
+        guess: Start vector of the iteration (large systems), e.g. the mode
+               of a similar state
+
+    Returns:
+        (factor, phi): np.inf and None if the reference load cannot buckle
+        the frame (no compression)
+
+    Raises:
+        np.linalg.LinAlgError / RuntimeError: K singular or no convergence
+    """
+    n = K.shape[0]
+    if n == 0:
+        return np.inf, None
+
+    if n <= dense_limit or factorization is None:
+        mu, phi = la.eigh(-K_G.toarray(), K.toarray(), subset_by_index=[n - 1, n - 1])
+    else:
+        inverse = spla.LinearOperator((n, n), matvec=factorization.solve, dtype=float)
+        mu, phi = spla.eigsh(-K_G.tocsr(), k=1, M=K.tocsr(), Minv=inverse, which="LA",
+                             v0=guess)
+
+    if mu[0] <= 0 or not np.all(np.isfinite(phi)):
+        return np.inf, None
+    return 1.0 / mu[0], phi[:, 0]
+
+
+class Buckling:
+    """
+    Lowest global buckling mode of one design under a reference load, and
+    the buckling load factor of other load states.
+
+        factor   critical load factor of the reference load (inf: none)
+        axial    reference axial forces, shape (n_beams,)
+        shape    buckling mode, shape (n_nodes, 3), largest translation 1
+
+    Other states are rated by rate(). Rating a state exactly takes an
+    eigensolve of its own (the mode moves with the load: a load far from
+    the reference mode's region buckles the frame somewhere else), so it
+    is done once and then moved along with a bound: for any two states
+    mu(N) <= mu(N0) + mu(N - N0), with mu = 1 / load factor, and
+    mu(N - N0) <= mu_Q · max((N0 - N) / capacity), where mu_Q is that of
+    every member compressed by its capacity at once. Tension only
+    stiffens (the unit geometric stiffness of a member is positive
+    semidefinite), so both steps only overestimate mu: the rated factor
+    is never above the exact one. The state is solved again once the
+    bound has drifted more than BOUND_RTOL (or BOUND_ATOL) from it.
+    """
+
+    # Largest drift of the rated 1 / factor from the last exact solve
+    BOUND_RTOL = 0.05
+    BOUND_ATOL = 0.002
+
+    # Members that drive a mode: share of the largest destabilizing work
+    SHARE = 0.1
+
+    # Exact eigensolves per worst_position() / buckling_mass() search (the
+    # rest keeps its bound)
+    MOVING_SOLVES = 32
+
+    def __init__(self, model, factor, axial, mode_global, K, capacity,
+                 factorization=None, dense_limit=150):
+        """
+        Args:
+            model: CompiledModel
+            factor: Critical load factor from critical_load_factor()
+            axial: Reference axial forces
+            mode_global: Mode on all global DOFs, shape (n_dof,), or None
+            K: Reduced linear stiffness matrix the mode was solved with
+            capacity: Compression per beam the bound is measured against
+                      (its Euler load), 0 for beams out of the structure
+            factorization, dense_limit: As critical_load_factor(), for
+                      solving other states
+        """
+        self.model = model
+        self.factor = factor
+        self.axial = axial
+
+        self._K = K
+        self._factorization = factorization
+        self._dense_limit = dense_limit
+        self._unit = geometric_stiffness(model, np.ones(model.n_beams))
+        self._capacity = np.asarray(capacity, dtype=float)
+
+        # mu of every member compressed by its capacity
+        factor_q, _ = self._critical(-self._capacity)
+        self._mu_q = 1.0 / factor_q
+
+        if mode_global is None:
+            mode_global = np.zeros(model.n_dof)
+        self._anchor(axial, factor, mode_global[model.free_dofs])
+
+        shape = mode_global.reshape(-1, 3)
+        translation = np.hypot(shape[:, 0], shape[:, 1]).max(initial=0.0)
+        self.shape = shape / translation if translation > 0 else shape
+
+    def rate(self, axial):
+        """
+        Buckling load factor of load states and the beams that drive their
+        mode (inf and none where they cannot buckle).
+
+        Args:
+            axial: Axial forces, shape (n_beams,) or (n_beams, m)
+
+        Returns:
+            (factor, drives): float and mask (n_beams,), or arrays of
+            shape (m,) and (n_beams, m)
+        """
+        axial = np.asarray(axial, dtype=float)
+        if axial.ndim == 1:
+            return self._rate(axial)
+        factor = np.empty(axial.shape[1])
+        drives = np.zeros(axial.shape, dtype=bool)
+        for i in range(axial.shape[1]):
+            factor[i], drives[:, i] = self._rate(axial[:, i])
+        return factor, drives
+
+    def factor_for(self, axial):
+        """Buckling load factor of load states, as rate()."""
+        return self.rate(axial)[0]
+
+    def bound(self, axial):
+        """
+        Upper bound on 1 / factor of load states from their compression
+        alone, mu_Q · max(-N / capacity) (see the class notes).
+
+        Args:
+            axial: Axial forces, shape (n_beams,) or (n_beams, m)
+
+        Returns:
+            float, or array of shape (m,)
+        """
+        axial = np.asarray(axial, dtype=float)
+        capacity = self._capacity.reshape((-1,) + (1,) * (axial.ndim - 1))
+        squeeze = np.maximum(-axial, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(squeeze > 0, squeeze / capacity, 0.0)
+        worst = share.max(axis=0, initial=0.0)
+        bound = np.where(np.isinf(worst), np.inf, self._mu_q * worst)
+        return bound if bound.ndim else float(bound)
+
+    def detached(self):
+        """
+        A copy with a factorization of its own, to rate states beside the
+        solver: the solver's factorization is downdated in place by collapse
+        steps (StaticSolver.remove_beams), and states rated on the copy do
+        not move this one's anchor.
+        """
+        twin = copy.copy(self)
+        if self._factorization is not None and self._K.shape[0] > self._dense_limit:
+            twin._factorization = Factorization(self._K, self._dense_limit)
+        return twin
+
+    def load_bounds(self, unit, weights, columns):
+        """
+        Upper bounds on 1 / factor per kg of a load at each of its positions,
+        when the load at position p is a combination of unit load cases,
+        live(p) = sum_k weights[p, k]·unit[:, columns[p, k]] (the nodal loads
+        of a point load on its beam).
+
+        mu is sublinear (mu(a + b) <= mu(a) + mu(b), mu(c·a) = c·mu(a) for
+        c >= 0), so mu(live(p)) <= sum_k |weights[p, k]|·mu(±unit case):
+        one eigensolve per unit case and sign used, instead of one per
+        position (each started from the mode of the one before: neighboring
+        unit cases buckle the frame alike). Unlike bound(), the unit cases keep their tension, which
+        is what holds a frame up under a point load. A unit case whose
+        eigensolve fails is bounded with bound().
+
+        Args:
+            unit: Axial forces of the unit load cases, shape (n_beams, n_cases)
+            weights: Weight of each case, shape (n_positions, k)
+            columns: Case of each weight, shape (n_positions, k)
+
+        Returns:
+            Array of shape (n_positions,)
+        """
+        weights = np.asarray(weights, dtype=float)
+        pairs = 2 * np.asarray(columns) + (weights > 0)  # Unit case and sign
+        mu = np.zeros(2 * unit.shape[1])
+        guess = None
+        for pair in np.unique(pairs[weights != 0]):
+            axial = unit[:, pair // 2] * (1.0 if pair % 2 else -1.0)
+            if np.all(axial >= 0):
+                continue  # Tension only
+            try:
+                factor, phi = self._critical(axial, guess)
+                mu[pair] = 1.0 / factor
+                guess = phi if phi is not None else guess
+            except (np.linalg.LinAlgError, RuntimeError):
+                mu[pair] = self.bound(axial)
+        return (np.abs(weights) * mu[pairs]).sum(axis=1)
+
+    def worst_position(self, base, live, bounds, mass):
+        """
+        Worst position of one load moving over positions: the largest
+        1 / factor of the states base + mass·live(p).
+
+        Every position has the upper bound mu(base) + mass·bounds[p]
+        (mu is subadditive); positions are solved exactly in the order of
+        their bounds until no bound left is above the worst one found by
+        more than BOUND_RTOL (or BOUND_ATOL), at most MOVING_SOLVES of them.
+        The largest bound left then stands in (as it does where an
+        eigensolve fails), so the ratio is never below the exact one.
+
+        Args:
+            base: Axial forces without the load, shape (n_beams,)
+            live: Function p -> axial forces per kg of the load at position p
+            bounds: load_bounds() of the positions, shape (n_positions,)
+            mass: Load mass (kg)
+
+        Returns:
+            (ratio, drives, worst): 1 / factor, the beams driving the mode
+            (n_beams,) and the position (-1: none can buckle the frame)
+        """
+        base = np.asarray(base, dtype=float)
+        factor, _ = self.rate(base)
+        upper = 1.0 / factor + mass * np.asarray(bounds)
+
+        ratio, drives, worst = 0.0, np.zeros(len(base), dtype=bool), -1
+        for i, p in enumerate(np.argsort(-upper, kind="stable")):
+            if i == self.MOVING_SOLVES or (
+                    worst >= 0 and upper[p] <= ratio + max(self.BOUND_RTOL * ratio, self.BOUND_ATOL)):
+                ratio = max(ratio, upper[p])  # The rest keeps its bound
+                break
+            axial = base + mass * live(p)
+            try:
+                factor, phi = self._critical(axial)
+                mu, geometric = 1.0 / factor, self._geometric_of(phi)
+            except (np.linalg.LinAlgError, RuntimeError):
+                mu, geometric = upper[p], self._geometric  # Keep the bound
+            if worst < 0 or mu > ratio:
+                ratio, worst = mu, p
+                drives = self._drivers(axial, geometric, ratio)
+        return ratio, drives, worst
+
+    def buckling_mass(self, base, live, bounds, limit=np.inf):
+        """
+        Smallest load mass that buckles the frame at one of the positions
+        of a moving load: per position, the critical factor of the live load
+        case on the frame prestressed by the base state,
+        (K + K_G(base) + m·K_G(live(p)))·phi = 0.
+
+        mu(base) + m·bounds[p] <= 1 below it (see worst_position), which
+        bounds every position from below; positions are solved in the order
+        of those bounds until the next one cannot be below the smallest mass
+        found, at most MOVING_SOLVES of them. Past that, and where an
+        eigensolve fails, the bound stands in, so the mass is never above
+        the exact one.
+
+        Args:
+            base: Axial forces without the load, shape (n_beams,); the frame
+                  must not buckle under them
+            live, bounds: As worst_position()
+            limit: Masses from this one on no longer matter (kg)
+
+        Returns:
+            (mass, position): inf and -1 if no position buckles the frame
+            below limit
+        """
+        base = np.asarray(base, dtype=float)
+        factor, _ = self.rate(base)
+        bounds = np.asarray(bounds)
+        with np.errstate(divide="ignore"):
+            lower = np.where(bounds > 0, max(1.0 - 1.0 / factor, 0.0) / bounds, np.inf)
+
+        mass, position = limit, -1
+        prestressed = None
+        for i, p in enumerate(np.argsort(lower, kind="stable")):
+            if lower[p] >= mass:
+                break
+            if i == self.MOVING_SOLVES:
+                mass, position = lower[p], p  # The rest keeps its bound
+                break
+            try:
+                if prestressed is None:
+                    # Positive definite, as the base state does not buckle the frame
+                    K_base = self._K + self.model.assemble_stiffness(
+                        geometric_stiffness(self.model, base))
+                    prestressed = (K_base, Factorization(K_base, self._dense_limit))
+                K_G = self.model.assemble_stiffness(geometric_stiffness(self.model, live(p)))
+                factor, _ = critical_load_factor(prestressed[0], K_G, prestressed[1],
+                                                 self._dense_limit)
+            except (np.linalg.LinAlgError, RuntimeError):
+                factor = lower[p]  # Keep the bound
+            if factor < mass:
+                mass, position = factor, p
+        return (mass, position) if position >= 0 else (np.inf, -1)
+
+    def _rate(self, axial):
+        drift = self.bound(axial - self._axial_at)
+        if drift > max(self.BOUND_RTOL * self._mu_at, self.BOUND_ATOL):
+            try:
+                factor, phi = self._critical(axial)
+            except (np.linalg.LinAlgError, RuntimeError):
+                pass  # Keep the bound
+            else:
+                self._anchor(axial, factor, phi)
+                drift = 0.0
+        mu = self._mu_at + drift
+        return (1.0 / mu if mu > 0 else np.inf), self._drivers(axial, self._geometric, mu)
+
+    def _drivers(self, axial, geometric, mu):
+        """Compressed beams doing at least SHARE of the largest destabilizing work in a mode."""
+        work = -axial * geometric
+        peak = work.max(initial=0.0)
+        return (work >= self.SHARE * peak) & (peak > 0) & (axial < 0) & (mu > 0)
+
+    def _geometric_of(self, phi):
+        """phi^T K_G phi per beam of a unit axial force, for a mode on the free DOFs (or None)."""
+        mode = np.zeros(self.model.n_dof)
+        if phi is not None:
+            mode[self.model.free_dofs] = phi
+        phi = mode[self.model.element_dofs]
+        return np.einsum("ni,nij,nj->n", phi, self._unit, phi)
+
+    def _anchor(self, axial, factor, phi):
+        """Makes an exactly solved state (mode phi on the free DOFs) the one later states are bounded from."""
+        self._axial_at = np.array(axial, dtype=float)
+        self._mu_at = 1.0 / factor
+        self._geometric = self._geometric_of(phi)
+
+    def _critical(self, axial, guess=None):
+        """critical_load_factor() of a state."""
+        K_G = self.model.assemble_stiffness(geometric_stiffness(self.model, axial))
+        return critical_load_factor(self._K, K_G, self._factorization, self._dense_limit, guess)
+
+    def result(self, amplitude=1.0):
+        """The mode as an unloaded ResultSet for drawing, scaled by amplitude."""
+        zeros = np.zeros(self.model.n_beams)
+        return ResultSet(self.model, self.shape * amplitude, zeros, zeros, zeros)
@@ -0,0 +1,235 @@
+"""
+Flat array representation of a bridge for vectorized stiffness assembly.
+"""
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from core.material_manager import MaterialManager
+from solvers.ordering import rcm_node_order
+
+
+class CompiledModel:
+    """
+    Array view of a Bridge's nodes and beams, built once per topology.
+
+    Node i owns the global DOFs 3i, 3i+1, 3i+2 (u_x, u_y, theta). Beams keep
+    their position in bridge.beams, so beam k of the model is bridge.beams[k];
+    degenerate (zero-length) beams stay in the arrays but are flagged inactive
+    and contribute no stiffness.
+
+    The beams split the nodes into connected components. A component without
+    a fixed node is a free rigid body: its nodes are flagged floating and
+    eliminated like fixed ones, and its beams are flagged inactive, so it is
+    skipped instead of making the whole system singular. Every supported
+    component is an independent diagonal block of the reduced system.
+
+    The reduced (free-DOF) system is numbered in reverse Cuthill-McKee node
+    order rather than insertion order, which keeps the stiffness matrix
+    banded however long the bridge was edited. Global DOF numbers, and so all
+    results, still follow bridge.nodes.
+    """
+
+    # Beams shorter than this are skipped in the stiffness matrix (meters)
+    MIN_LENGTH = 1e-6
+
+    # Keys of the per-beam section/material arrays
+    PROPERTY_KEYS = ("E", "density", "strength", "alpha", "thickness", "hollow_ratio",
+                     "area", "inertia")
+
+    def __init__(self, bridge):
+        # Bridge revision this model was compiled from
+        self.revision = bridge.revision
+
+        self.nodes = list(bridge.nodes)
+        self.beams = list(bridge.beams)
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.beam_index = {beam: k for k, beam in enumerate(self.beams)}
+
+        self.n_nodes = len(self.nodes)
+        self.n_beams = len(self.beams)
+        self.n_dof = 3 * self.n_nodes
+
+        # --- Nodes ---
+        self.xy = np.array([(n.x, n.y) for n in self.nodes], dtype=float).reshape(-1, 2)
+        self.fixed = np.array([n.fixed for n in self.nodes], dtype=bool)
+
+        # --- Beams: connectivity and geometry ---
+        self.conn = np.array(
+            [(self.node_index[b.node_a], self.node_index[b.node_b]) for b in self.beams],
+            dtype=int
+        ).reshape(-1, 2)
+
+        delta = self.xy[self.conn[:, 1]] - self.xy[self.conn[:, 0]]
+        self.length = np.hypot(delta[:, 0], delta[:, 1])
+        self.active = self.length >= self.MIN_LENGTH
+        for k in np.flatnonzero(~self.active):
+            a = self.beams[k].node_a
+            print(f"Warning: Skipping zero-length beam at ({a.x}, {a.y})")
+
+        # --- Connected components ---
+        conn_active = self.conn[self.active]
+        adjacency = sp.coo_matrix(
+            (np.ones(len(conn_active)), (conn_active[:, 0], conn_active[:, 1])),
+            shape=(self.n_nodes, self.n_nodes)
+        )
+        self.n_components, self.component = connected_components(adjacency, directed=False)
+        grounded = np.zeros(self.n_components, dtype=bool)
+        grounded[self.component[self.fixed]] = True
+        self.floating = ~grounded[self.component]
+        self.active &= ~self.floating[self.conn[:, 0]]
+
+        # Direction cosines (degenerate beams get a harmless unit length)
+        safe_length = np.where(self.length >= self.MIN_LENGTH, self.length, 1.0)
+        self.cos = delta[:, 0] / safe_length
+        self.sin = delta[:, 1] / safe_length
+
+        # --- Materials: one row per distinct beam type ---
+        self.material_types = list(dict.fromkeys(b.type for b in self.beams))
+        type_to_row = {t: i for i, t in enumerate(self.material_types)}
+        self.material_index = np.array([type_to_row[b.type] for b in self.beams], dtype=int)
+
+        # Property arrays, rebuilt when MaterialManager.revision moves on
+        self._table = None
+        self._props = None
+        self._material_revision = None
+
+        # --- DOF numbering ---
+        a, b = self.conn[:, 0], self.conn[:, 1]
+        self.element_dofs = np.stack([3*a, 3*a + 1, 3*a + 2, 3*b, 3*b + 1, 3*b + 2], axis=1)
+
+        # Bandwidth-reducing elimination order of the nodes
+        self.node_order = rcm_node_order(self.n_nodes, self.conn)
+        node_rank = np.empty(self.n_nodes, dtype=int)
+        node_rank[self.node_order] = np.arange(self.n_nodes)
+        dof_rank = 3 * np.repeat(node_rank, 3) + np.tile([0, 1, 2], self.n_nodes)
+
+        # Fixed and floating DOFs are eliminated: each global DOF maps to its
+        # row in the reduced system, or to -1 if it is constrained/skipped.
+        # Rows are grouped by component, so each component is one block.
+        eliminated = np.repeat(self.fixed | self.floating, 3)
+        free_dofs = np.flatnonzero(~eliminated)
+        dof_component = self.component[free_dofs // 3]
+        self.free_dofs = free_dofs[np.lexsort((dof_rank[free_dofs], dof_component))]
+        self.n_free = len(self.free_dofs)
+        self.dof_map = np.full(self.n_dof, -1, dtype=int)
+        self.dof_map[self.free_dofs] = np.arange(self.n_free)
+
+        # (start, stop) rows of each component's block in the reduced system
+        self.blocks = []
+        if self.n_free:
+            block_component = self.component[self.free_dofs // 3]
+            starts = np.flatnonzero(np.diff(block_component)) + 1
+            edges = np.concatenate([[0], starts, [self.n_free]])
+            self.blocks = [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+        # --- Rotation matrices, shape (n_beams, 6, 6) ---
+        c, s = self.cos, self.sin
+        T = np.zeros((self.n_beams, 6, 6))
+        T[:, 0, 0] = c;  T[:, 0, 1] = s
+        T[:, 1, 0] = -s; T[:, 1, 1] = c
+        T[:, 2, 2] = 1
+        T[:, 3, 3] = c;  T[:, 3, 4] = s
+        T[:, 4, 3] = -s; T[:, 4, 4] = c
+        T[:, 5, 5] = 1
+        self.T = T
+
+        # --- Scatter pattern of the reduced stiffness matrix ---
+        # Entry (r, c) of an element matrix lands at flat position 6*r + c
+        reduced = self.dof_map[self.element_dofs]
+        rows = np.repeat(reduced, 6, axis=1)
+        cols = np.tile(reduced, (1, 6))
+        self._scatter_mask = (rows >= 0) & (cols >= 0) & self.active[:, None]
+        self._scatter_rows = rows[self._scatter_mask]
+        self._scatter_cols = cols[self._scatter_mask]
+
+    def is_current(self, bridge):
+        """True if the bridge has not been edited since this model was compiled."""
+        return self.revision == bridge.revision
+
+    def material_table(self):
+        """
+        Current properties of each material used by the model.
+
+        Cached until the materials change (MaterialManager.mark_dirty); the
+        arrays are shared and must not be modified.
+
+        Returns:
+            Dict of PROPERTY_KEYS -> array of shape (n_materials,)
+        """
+        self._refresh_properties()
+        return self._table
+
+    def section_properties(self, table=None):
+        """
+        Per-beam material and section properties.
+
+        Args:
+            table: Result of material_table(); the cached current table if
+                   not given
+
+        Returns:
+            Dict of PROPERTY_KEYS -> array of shape (n_beams,)
+        """
+        self._refresh_properties()
+        if table is None or table is self._table:
+            return self._props
+        return {key: values[self.material_index] for key, values in table.items()}
+
+    def _refresh_properties(self):
+        if self._material_revision == MaterialManager.revision:
+            return
+        rows = [MaterialManager.get_properties(t) for t in self.material_types]
+        self._table = {
+            key: np.array([row[key] for row in rows], dtype=float)
+            for key in self.PROPERTY_KEYS
+        }
+        self._props = {key: values[self.material_index] for key, values in self._table.items()}
+        self._material_revision = MaterialManager.revision
+
+    def element_stiffness(self, E, A, I):
+        """
+        Global-frame stiffness matrices of all beams (T^T @ k_local @ T).
+
+        Returns:
+            Array of shape (n_beams, 6, 6)
+        """
+        L = np.where(self.active, self.length, 1.0)
+        EA = A * E / L
+        k1 = 12 * E * I / L**3
+        k2 = 6 * E * I / L**2
+        k3 = 4 * E * I / L
+        k4 = 2 * E * I / L
+
+        # Local Stiffness (Frame element)
+        k = np.zeros((self.n_beams, 6, 6))
+        k[:, 0, 0] = EA;  k[:, 0, 3] = -EA
+        k[:, 3, 0] = -EA; k[:, 3, 3] = EA
+        k[:, 1, 1] = k1;  k[:, 1, 2] = k2;  k[:, 1, 4] = -k1; k[:, 1, 5] = k2
+        k[:, 2, 1] = k2;  k[:, 2, 2] = k3;  k[:, 2, 4] = -k2; k[:, 2, 5] = k4
+        k[:, 4, 1] = -k1; k[:, 4, 2] = -k2; k[:, 4, 4] = k1;  k[:, 4, 5] = -k2
+        k[:, 5, 1] = k2;  k[:, 5, 2] = k4;  k[:, 5, 4] = -k2; k[:, 5, 5] = k3
+
+        return np.einsum("nji,njk,nkl->nil", self.T, k, self.T, optimize=True)
+
+    def assemble_stiffness(self, k_elem):
+        """
+        Scatters element matrices into the reduced stiffness matrix.
+
+        Args:
+            k_elem: Element matrices from element_stiffness(), (n_beams, 6, 6)
+
+        Returns:
+            scipy.sparse COO matrix of shape (n_free, n_free); duplicate
+            entries are summed on conversion to CSC/CSR.
+        """
+        vals = k_elem.reshape(self.n_beams, 36)[self._scatter_mask]
+        return sp.coo_matrix(
+            (vals, (self._scatter_rows, self._scatter_cols)),
+            shape=(self.n_free, self.n_free)
+        )
+
+    def scatter_loads(self, f_elem):
+        """Sums element load vectors (n_beams, 6) into a global load vector."""
+        return np.bincount(
+            self.element_dofs.ravel(), weights=f_elem.ravel(), minlength=self.n_dof
+        )
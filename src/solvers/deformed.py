@@ -0,0 +1,88 @@
+"""
+Deformed beam geometry of a result, shared by the renderer and the agent.
+"""
+from collections import OrderedDict
+import numpy as np
+from utils.math_utils import hermite_spline_points
+
+
+class DeformedGeometry:
+    """
+    Deformed shape of every beam of one ResultSet at one exaggeration.
+
+        scale       exaggeration of the displacements
+        p1, p2      (n_beams, 2)     deformed end points (m)
+        length      (n_beams,)       deformed chord length
+        psi         (n_beams,)       chord angle
+        rot1, rot2  (n_beams,)       end rotations relative to the chord,
+                                     in [-pi, pi]
+        points      (n_beams, SEGMENTS + 1, 2)  samples along the Hermite
+                                     curves, evenly spaced in t
+    """
+
+    # Curve segments per beam (the renderer draws these)
+    SEGMENTS = 12
+
+    def __init__(self, result, exaggeration):
+        model = result.model
+        self.scale = float(exaggeration)
+        d = result.displacements * exaggeration
+        a, b = model.conn[:, 0], model.conn[:, 1]
+
+        self.p1 = model.xy[a] + d[a, :2]
+        self.p2 = model.xy[b] + d[b, :2]
+        chord = self.p2 - self.p1
+        self.length = np.hypot(chord[:, 0], chord[:, 1])
+        self.psi = np.arctan2(chord[:, 1], chord[:, 0])
+
+        # Rotations relative to the deformed chord
+        original = model.xy[b] - model.xy[a]
+        alpha = np.arctan2(original[:, 1], original[:, 0])
+        self.rot1 = _wrap(alpha + d[a, 2] - self.psi)
+        self.rot2 = _wrap(alpha + d[b, 2] - self.psi)
+
+        t = np.linspace(0.0, 1.0, self.SEGMENTS + 1)
+        self.points = hermite_spline_points(t, self.p1, self.p2, self.rot1, self.rot2,
+                                            self.length)
+
+    def point(self, k, t):
+        """
+        (x, y) on the curve of beam k at parameter t (0 to 1). k and t may
+        also be arrays of the same shape, for many points at once.
+        """
+        h1 = t**3 - 2*t**2 + t
+        h2 = t**3 - t**2
+        length = self.length[k]
+        v = length * (h1 * self.rot1[k] + h2 * self.rot2[k])
+        u = t * length
+        cp, sp = np.cos(self.psi[k]), np.sin(self.psi[k])
+        x1, y1 = self.p1[k, 0], self.p1[k, 1]
+        return x1 + u * cp - v * sp, y1 + u * sp + v * cp
+
+
+def _wrap(angle):
+    """Angles normalized to [-pi, pi] (as math_utils.normalize_angle)."""
+    wrapped = (angle + np.pi) % (2 * np.pi) - np.pi
+    return np.where((wrapped == -np.pi) & (angle > 0), np.pi, wrapped)
+
+
+# Recently used geometries by (result version, exaggeration)
+_cache = OrderedDict()
+CACHE_SIZE = 8
+
+
+def deformed_geometry(result, exaggeration):
+    """
+    DeformedGeometry of a result, built once per (result.version, exaggeration)
+    and shared by everyone who asks for it in the meantime.
+    """
+    key = (result.version, float(exaggeration))
+    geometry = _cache.get(key)
+    if geometry is None:
+        geometry = DeformedGeometry(result, exaggeration)
+        _cache[key] = geometry
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return geometry
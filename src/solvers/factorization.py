@@ -0,0 +1,181 @@
+"""
+Reusable factorizations of the reduced stiffness matrix.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse.linalg as spla
+
+
+class Factorization:
+    """
+    A factorized reduced stiffness matrix.
+
+    Factorizing is the expensive step; solve() afterwards is only a forward
+    and back substitution, so one instance can serve many frames and many
+    right-hand sides.
+
+    Small systems use a dense Cholesky factorization (LAPACK). Larger ones
+    use a banded Cholesky when the matrix is narrow-banded, which is the
+    normal case for a bridge numbered in RCM order, and a sparse LU
+    (SuperLU) otherwise.
+    """
+
+    # Banded storage is used while bandwidth <= BANDED_MAX_RATIO * size
+    BANDED_MAX_RATIO = 0.1
+
+    def __init__(self, K, dense_limit):
+        """
+        Args:
+            K: Reduced stiffness matrix (scipy.sparse, square)
+            dense_limit: Largest size that is factorized densely
+
+        Raises:
+            np.linalg.LinAlgError: K is not positive definite (Cholesky paths)
+            RuntimeError: K is exactly singular (sparse LU path)
+        """
+        self.n = K.shape[0]
+        self.method = "sparse"
+        self._factor = None
+        self._diagonal = K.diagonal()
+
+        if self.n == 0:
+            return
+
+        if self.n <= dense_limit:
+            self.method = "dense"
+            self._factor = la.cho_factor(K.toarray())
+            return
+
+        K = K.tocoo()
+        K.sum_duplicates()
+        bandwidth = int(np.max(np.abs(K.row - K.col))) if K.nnz else 0
+
+        if bandwidth <= self.BANDED_MAX_RATIO * self.n:
+            # Upper banded storage: ab[u + i - j, j] = K[i, j] for j >= i
+            self.method = "banded"
+            upper = K.col >= K.row
+            ab = np.zeros((bandwidth + 1, self.n))
+            ab[bandwidth + K.row[upper] - K.col[upper], K.col[upper]] = K.data[upper]
+            self._factor = la.cholesky_banded(ab)
+        else:
+            self._factor = spla.splu(K.tocsc())
+
+    def pivots(self):
+        """
+        Pivots of the factorization, in the row order of K.
+
+        For the Cholesky paths these are the squared diagonal entries of the
+        factor; for the sparse LU path the diagonal of U, mapped back through
+        the column permutation.
+        """
+        if self.n == 0:
+            return np.zeros(0)
+        if self.method == "dense":
+            return np.diag(self._factor[0]) ** 2
+        if self.method == "banded":
+            return self._factor[-1] ** 2
+        return np.abs(self._factor.U.diagonal()[self._factor.perm_c])
+
+    def weak_pivots(self, tol):
+        """
+        Rows whose pivot is below tol times their diagonal entry in K.
+
+        A pivot that small means the row's DOF is (nearly) unrestrained once
+        the earlier rows are eliminated: a mechanism or near-mechanism.
+        """
+        scale = np.where(self._diagonal > 0, self._diagonal, 1.0)
+        return np.flatnonzero(self.pivots() < tol * scale)
+
+    def solve(self, rhs):
+        """
+        Solves K·U = rhs.
+
+        Args:
+            rhs: Vector (n,) or matrix (n, m) of right-hand sides
+
+        Returns:
+            Displacements with the same shape as rhs
+
+        Raises:
+            np.linalg.LinAlgError: The result is not finite (near-singular K)
+        """
+        if self.n == 0:
+            return np.zeros_like(rhs, dtype=float)
+
+        if self.method == "dense":
+            U = la.cho_solve(self._factor, rhs)
+        elif self.method == "banded":
+            U = la.cho_solve_banded((self._factor, False), rhs)
+        else:
+            U = self._factor.solve(np.asarray(rhs, dtype=float))
+
+        # Near-singular systems may "solve" into inf/nan instead of raising
+        if not np.all(np.isfinite(U)):
+            raise np.linalg.LinAlgError("Non-finite displacements")
+        return U
+
+
+class BlockFactorization:
+    """
+    Factorization of a block-diagonal matrix, one Factorization per block.
+
+    The reduced stiffness matrix of a bridge made of several independent
+    (connected) parts is block diagonal. Each block is factorized and solved
+    on its own, which keeps every factor small and lets large blocks run in
+    parallel: LAPACK and SuperLU release the GIL, so threads are enough.
+    """
+
+    # Blocks are processed in parallel while at least two have this many rows
+    PARALLEL_MIN_SIZE = 2000
+
+    def __init__(self, K, blocks, dense_limit):
+        """
+        Args:
+            K: Reduced stiffness matrix (scipy.sparse, square)
+            blocks: (start, stop) row ranges covering K's diagonal blocks
+            dense_limit: Largest block size that is factorized densely
+
+        Raises:
+            As Factorization, for the first block that fails
+        """
+        self.n = K.shape[0]
+        self.method = "blocks"
+        self.blocks = blocks
+
+        K = K.tocsr()
+        sub = [K[a:b, a:b] for a, b in blocks]
+        self.parts = self._map(lambda K_block: Factorization(K_block, dense_limit), sub)
+
+    def _map(self, func, items):
+        large = sum(1 for a, b in self.blocks if b - a >= self.PARALLEL_MIN_SIZE)
+        if large < 2:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=large) as pool:
+            return list(pool.map(func, items))
+
+    def pivots(self):
+        """Pivots of all blocks, in the row order of K."""
+        if not self.parts:
+            return np.zeros(0)
+        return np.concatenate([part.pivots() for part in self.parts])
+
+    def weak_pivots(self, tol):
+        """Rows whose pivot is below tol times their diagonal entry in K."""
+        if not self.parts:
+            return np.zeros(0, dtype=int)
+        return np.concatenate([
+            part.weak_pivots(tol) + a for part, (a, _) in zip(self.parts, self.blocks)
+        ])
+
+    def solve(self, rhs):
+        """Solves K·U = rhs block by block; same shapes as Factorization.solve."""
+        rhs = np.asarray(rhs, dtype=float)
+        pieces = self._map(
+            lambda k: self.parts[k].solve(rhs[slice(*self.blocks[k])]),
+            range(len(self.parts))
+        )
+        U = np.zeros_like(rhs)
+        for (a, b), piece in zip(self.blocks, pieces):
+            U[a:b] = piece
+        return U
@@ -0,0 +1,79 @@
+"""
+Precomputed influence responses for the moving agent load.
+"""
+import numpy as np
+
+
+class InfluenceTable:
+    """
+    Linear responses to every load that changes during analysis mode.
+
+    The structure is linear, so any load state the agent can produce is the
+    superposition of:
+      - the dead-load (self-weight) response,
+      - the response to a unit temperature change, scaled by ΔT,
+      - unit vertical-force and unit-moment responses at each deck node,
+        scaled by the point load's equivalent nodal loads.
+
+    The last part is exact for every position t on a deck beam, because a
+    point load enters the system only as four equivalent nodal loads on the
+    beam's end nodes. No sampling or interpolation along the beam is needed.
+
+    Every response holds the global displacements and the member end forces
+    (axial force, moment at A, moment at B), so combine() needs no linear solve.
+    """
+
+    def __init__(self, key, columns, U_dead, U_therm, U_unit, F_dead, F_therm, F_unit):
+        """
+        Args:
+            key: Cache key (model and material values the table was built for)
+            columns: Dict of global DOF -> column in U_unit/F_unit
+                     (-1 for constrained DOFs, which have no response)
+            U_dead, U_therm: Global displacements, shape (n_dof,)
+            U_unit: Unit-load displacements, shape (n_dof, n_columns)
+            F_dead, F_therm: End forces, shape (3, n_beams)
+            F_unit: Unit-load end forces, shape (3, n_beams, n_columns)
+        """
+        self.key = key
+        self.columns = columns
+        
+        # The same as an array over all DOFs (-2: no response stored)
+        self._column_of = np.full(len(U_dead), -2, dtype=int)
+        for dof, col in columns.items():
+            self._column_of[dof] = col
+        self.U_dead = U_dead
+        self.U_therm = U_therm
+        self.U_unit = U_unit
+        self.F_dead = F_dead
+        self.F_therm = F_therm
+        self.F_unit = F_unit
+
+    def covers(self, dofs):
+        """True if every DOF in dofs has a precomputed unit response."""
+        return bool(np.all(self._column_of[np.asarray(dofs, dtype=int)] != -2))
+
+    def combine(self, temperature, dofs, values):
+        """
+        Superposes the stored responses for one load state.
+
+        Args:
+            temperature: Temperature change ΔT (°C)
+            dofs, values: Equivalent nodal loads (global DOFs may repeat)
+
+        Returns:
+            (U_global, axial, moment_a, moment_b)
+        """
+        U = self.U_dead + temperature * self.U_therm
+        F = self.F_dead + temperature * self.F_therm
+
+        # Loads on constrained DOFs (column -1) have no response
+        cols = self._column_of[np.asarray(dofs, dtype=int)]
+        free = cols >= 0
+        if free.any():
+            weights = np.zeros(self.U_unit.shape[1])
+            np.add.at(weights, cols[free], np.asarray(values, dtype=float)[free])
+            used = np.flatnonzero(weights)
+            U = U + self.U_unit[:, used] @ weights[used]
+            F = F + self.F_unit[:, :, used] @ weights[used]
+
+        return U, F[0], F[1], F[2]
@@ -0,0 +1,168 @@
+"""
+Preconditioned conjugate gradient backend for very large models.
+"""
+from collections import deque
+import inspect
+import numpy as np
+import scipy.sparse.linalg as spla
+
+# SciPy 1.12 renamed cg's relative tolerance from `tol` to `rtol` (the old
+# name is gone in 1.14); older SciPy is still needed for Python 3.8
+_CG_RTOL = "rtol" if "rtol" in inspect.signature(spla.cg).parameters else "tol"
+
+
+class IterativeSolver:
+    """
+    Solves K·U = rhs with preconditioned conjugate gradients instead of a
+    factorization. Same solve() interface as Factorization.
+
+    Memory stays at the size of K itself, which matters once a direct
+    factor no longer fits. Load-state solves (recycle=True) are
+    warm-started from the recent ones: the start vector is their best combination for the new
+    right-hand side (Galerkin projection onto their span). Between frames
+    the load state moves only a little and stays close to that span, so
+    CG converges in a few iterations. Restarting from the previous
+    solution alone barely helps, as the residual is measured against the
+    whole load, which the dead load dominates.
+
+    Preconditioners:
+        "jacobi"  inverse of the diagonal
+        "block"   inverse of each node's 3x3 diagonal block (u_x, u_y, theta)
+        "ilu"     incomplete LU (SuperLU spilu); for a symmetric positive
+                  definite K it plays the role of an incomplete Cholesky
+    """
+
+    PRECONDITIONERS = ("jacobi", "block", "ilu")
+
+    # Recent solutions used for the warm start
+    RECYCLE = 8
+
+    # Recent solutions that are this close (relative) to a combination of
+    # the others add no direction and are left out
+    RECYCLE_TOL = 1e-10
+
+    def __init__(self, K, preconditioner="ilu", rtol=1e-10, maxiter=None):
+        """
+        Args:
+            K: Reduced stiffness matrix (scipy.sparse, square). For "block"
+               every node's three DOFs must be consecutive rows, as in the
+               solver numbering.
+            preconditioner: One of PRECONDITIONERS
+            rtol: Relative residual tolerance ||K·U - rhs|| <= rtol·||rhs||
+            maxiter: Iteration limit per right-hand side (default: 10·n)
+        """
+        if preconditioner not in self.PRECONDITIONERS:
+            raise ValueError(f"Unknown preconditioner: {preconditioner}")
+
+        self.n = K.shape[0]
+        self.method = f"pcg-{preconditioner}"
+        self.K = K.tocsr()
+        self.rtol = rtol
+        self.maxiter = maxiter if maxiter is not None else max(10 * self.n, 100)
+
+        # Iterations used by the last solve() (summed over columns)
+        self.iterations = 0
+
+        # Recent solutions x with K·x (see _initial_guess)
+        self._recent = deque(maxlen=self.RECYCLE)
+
+        self.M = self._preconditioner(preconditioner) if self.n else None
+
+    def _preconditioner(self, kind):
+        """Builds the preconditioner as a LinearOperator approximating K^-1."""
+        n = self.n
+        if kind == "jacobi":
+            diagonal = self.K.diagonal()
+            inverse = 1.0 / np.where(diagonal != 0, diagonal, 1.0)
+            return spla.LinearOperator((n, n), matvec=lambda r: inverse * r)
+
+        if kind == "block":
+            if n % 3:
+                raise ValueError("Block preconditioner needs whole 3-DOF nodes")
+            base = 3 * np.arange(n // 3)
+            rows = base[:, None, None] + np.arange(3)[None, :, None]
+            cols = base[:, None, None] + np.arange(3)[None, None, :]
+            rows, cols = np.broadcast_arrays(rows, cols)
+            blocks = np.asarray(self.K[rows.ravel(), cols.ravel()]).reshape(-1, 3, 3)
+            inverse = np.linalg.inv(blocks)
+            return spla.LinearOperator(
+                (n, n), matvec=lambda r: np.einsum("bij,bj->bi", inverse, r.reshape(-1, 3)).ravel()
+            )
+
+        ilu = spla.spilu(self.K.tocsc(), drop_tol=1e-5, fill_factor=10)
+        return spla.LinearOperator((n, n), matvec=ilu.solve)
+
+    def pivots(self):
+        """Not available without a factorization (empty)."""
+        return np.zeros(0)
+
+    def weak_pivots(self, tol):
+        """Not available without a factorization; never reports any rows."""
+        return np.zeros(0, dtype=int)
+
+    def solve(self, rhs, recycle=False):
+        """
+        Solves K·U = rhs.
+
+        Args:
+            rhs: Vector (n,) or matrix (n, m) of right-hand sides
+            recycle: Warm-start every column from the recent recycled
+                     solutions and add it to them. Meant for load states;
+                     unrelated solves (eigen-analyses) would only crowd
+                     them out.
+
+        Returns:
+            Displacements with the same shape as rhs
+
+        Raises:
+            np.linalg.LinAlgError: CG did not converge (K singular or
+                                   indefinite, or maxiter too small)
+        """
+        rhs = np.asarray(rhs, dtype=float)
+        self.iterations = 0
+        if self.n == 0:
+            return np.zeros_like(rhs)
+
+        if rhs.ndim == 1:
+            return self._solve_column(rhs, recycle)
+
+        U = np.zeros_like(rhs)
+        for j in range(rhs.shape[1]):
+            U[:, j] = self._solve_column(rhs[:, j], recycle)
+        return U
+
+    def _initial_guess(self, b):
+        """
+        Start vector for K·x = b from the recent solutions: with Q an
+        orthonormal basis of their span, x0 = Q·c with (Q^T K Q)·c = Q^T b,
+        the error-minimizing combination in the K-norm, so it is never
+        worse than starting from zero. K·x is stored with each solution,
+        so no product with K is needed here.
+        """
+        if not self._recent:
+            return None
+        X = np.array([x for x, _ in self._recent]).T
+        KX = np.array([kx for _, kx in self._recent]).T
+        Q, R = np.linalg.qr(X)
+        keep = np.abs(np.diag(R)) > self.RECYCLE_TOL * np.abs(np.diag(R)).max()
+        Q, R = Q[:, keep], R[np.ix_(keep, keep)]
+        KQ = np.linalg.solve(R.T, KX[:, keep].T).T
+        G = Q.T @ KQ
+        c = np.linalg.solve(0.5 * (G + G.T), Q.T @ b)
+        return Q @ c
+
+    def _solve_column(self, b, recycle):
+        x0 = self._initial_guess(b) if recycle else None
+        count = [0]
+
+        def step(_):
+            count[0] += 1
+
+        x, info = spla.cg(self.K, b, x0=x0, atol=0.0, maxiter=self.maxiter,
+                          M=self.M, callback=step, **{_CG_RTOL: self.rtol})
+        self.iterations += count[0]
+        if info != 0 or not np.all(np.isfinite(x)):
+            raise np.linalg.LinAlgError("Conjugate gradients did not converge")
+        if recycle and np.any(x):
+            self._recent.append((x, self.K @ x))
+        return x
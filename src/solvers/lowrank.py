@@ -0,0 +1,109 @@
+"""
+Low-rank downdates of a factorized stiffness matrix (member removal).
+"""
+import numpy as np
+import scipy.linalg as la
+
+
+class DowndatedFactorization:
+    """
+    Solves with K - sum(k_e) over removed beams, reusing a factorization of
+    K through the Woodbury identity. Same interface as Factorization.
+
+    Every element matrix is positive semidefinite of rank 3 (axial and two
+    bending deformations), k_e = W_e W_e^T. With W the columns of all
+    removed beams, Z = K^-1 W and the capacitance C = I - W^T Z:
+
+        (K - W W^T)^-1 = K^-1 + Z C^-1 Z^T
+
+    Removing a beam costs three substitutions with the cached factor and a
+    refactorization of the small matrix C, never of K. The remaining system
+    is singular (a mechanism) exactly when C is.
+    """
+
+    # C is taken as singular when its smallest eigenvalue is below this
+    # (it lies in (0, 1] while the structure is stable)
+    SINGULAR_TOL = 1e-9
+
+    def __init__(self, base):
+        """
+        Args:
+            base: Factorization of the full K (any backend with solve())
+        """
+        self.base = base
+        self.n = base.n
+        self.method = f"{base.method}+woodbury"
+        self.removed = []
+        self.W = np.zeros((self.n, 0))
+        self.Z = np.zeros((self.n, 0))
+        self._cho = None
+
+        # Reduced-space motion of the mechanism, if the last removal made one
+        self.mechanism = None
+
+    def remove(self, k_elem, rows):
+        """
+        Removes element matrices from the system.
+
+        Args:
+            k_elem: Element stiffness matrices, shape (r, 6, 6)
+            rows: Reduced row of each element DOF (-1: constrained), (r, 6)
+
+        Returns:
+            True if the remaining system is still nonsingular
+        """
+        columns = []
+        for k, dofs in zip(k_elem, rows):
+            values, vectors = np.linalg.eigh(k)
+            keep = values > 1e-12 * max(values.max(), 0.0)
+            factor = vectors[:, keep] * np.sqrt(values[keep])
+            W_e = np.zeros((self.n, factor.shape[1]))
+            free = dofs >= 0
+            W_e[dofs[free]] = factor[free]
+            columns.append(W_e)
+
+        if columns:
+            W_new = np.hstack(columns)
+            self.W = np.hstack([self.W, W_new])
+            self.Z = np.hstack([self.Z, self.base.solve(W_new).reshape(self.n, -1)])
+
+        C = np.eye(self.W.shape[1]) - self.W.T @ self.Z
+        C = (C + C.T) / 2
+        self.mechanism = None
+        self._cho = None
+        if C.size == 0:
+            return True
+
+        values, vectors = np.linalg.eigh(C)
+        if values[0] < self.SINGULAR_TOL:
+            self.mechanism = self.Z @ vectors[:, 0]
+            return False
+        self._cho = la.cho_factor(C)
+        return True
+
+    def pivots(self):
+        """Not available for the downdated system (empty)."""
+        return np.zeros(0)
+
+    def weak_pivots(self, tol):
+        """Rows that move in the mechanism, if the last removal formed one."""
+        if self.mechanism is None:
+            return np.zeros(0, dtype=int)
+        motion = np.abs(self.mechanism)
+        return np.flatnonzero(motion > 1e-3 * motion.max())
+
+    def solve(self, rhs):
+        """
+        Solves (K - W W^T)·U = rhs.
+
+        Raises:
+            np.linalg.LinAlgError: The downdated system is singular
+        """
+        if self.mechanism is not None:
+            raise np.linalg.LinAlgError("Member removal formed a mechanism")
+        U = self.base.solve(rhs)
+        if self._cho is None:
+            return U
+        rhs = np.asarray(rhs, dtype=float)
+        correction = self.Z @ la.cho_solve(self._cho, self.Z.T @ rhs)
+        return U + correction.reshape(U.shape)
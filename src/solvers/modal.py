@@ -0,0 +1,99 @@
+"""
+Natural frequencies and mode shapes (free, undamped vibration).
+"""
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from solvers.results import ResultSet
+
+
+# Modes computed per mode wanted by the Lanczos solve (see natural_modes)
+MARGIN = 2
+
+
+def natural_modes(K, mass, n_modes, factorization=None, dense_limit=150):
+    """
+    Lowest eigenpairs of K·phi = omega²·M·phi with a lumped (diagonal) M.
+
+    Large systems use Lanczos (ARPACK) in shift-invert mode around zero,
+    which converges to the lowest modes first. The inverse of K is applied
+    through the given factorization, so the static solver's factor is
+    reused instead of building another one. Small systems are solved
+    densely.
+
+    Repeated spans give clusters of (nearly) repeated frequencies, and a
+    single Lanczos run easily misses members of a cluster, returning
+    higher modes in their place. Twice the wanted number of modes
+    (MARGIN) is therefore computed, with a correspondingly larger Krylov
+    space, and the lowest ones kept.
+
+    Args:
+        K: Reduced stiffness matrix (scipy.sparse)
+        mass: Reduced lumped mass, shape (n,)
+        n_modes: Number of modes wanted (fewer if the system is smaller)
+        factorization: Object with solve(rhs) applying K^-1; factorized
+                       here if None
+        dense_limit: Systems up to this size use a dense eigensolver
+
+    Returns:
+        (omega, shapes): circular frequencies (rad/s), shape (k,), and
+        mass-normalized mode shapes, shape (n, k), lowest first
+
+    Raises:
+        np.linalg.LinAlgError / RuntimeError: K singular or no convergence
+    """
+    n = K.shape[0]
+    k = min(n_modes, n)
+    if k == 0:
+        return np.zeros(0), np.zeros((n, 0))
+
+    computed = MARGIN * k
+    if n <= dense_limit or computed >= n - 1:
+        eigenvalues, shapes = la.eigh(K.toarray(), np.diag(mass), subset_by_index=[0, k - 1])
+    else:
+        if factorization is None:
+            factorization = spla.splu(sp.csc_matrix(K))
+        inverse = spla.LinearOperator((n, n), matvec=factorization.solve, dtype=float)
+        eigenvalues, shapes = spla.eigsh(K, k=computed, M=sp.diags(mass), sigma=0.0,
+                                         which="LM", OPinv=inverse)
+        order = np.argsort(eigenvalues)[:k]
+        eigenvalues, shapes = eigenvalues[order], shapes[:, order]
+
+    if np.any(eigenvalues <= 0) or not np.all(np.isfinite(shapes)):
+        raise np.linalg.LinAlgError("Stiffness matrix is not positive definite")
+    return np.sqrt(eigenvalues), shapes
+
+
+class Modes:
+    """
+    Natural modes of one compiled model.
+
+        omega        (k,)              circular frequencies (rad/s)
+        frequencies  (k,)              frequencies (Hz)
+        shapes       (k, n_nodes, 3)   mode shapes scaled to a largest
+                                       nodal translation of 1
+    """
+
+    def __init__(self, model, omega, shapes_global):
+        """
+        Args:
+            model: CompiledModel
+            omega: Circular frequencies, shape (k,)
+            shapes_global: Mode shapes on all global DOFs, shape (n_dof, k)
+        """
+        self.model = model
+        self.omega = np.asarray(omega, dtype=float)
+        self.frequencies = self.omega / (2 * np.pi)
+
+        shapes = shapes_global.T.reshape(len(self.omega), -1, 3)
+        translation = np.hypot(shapes[:, :, 0], shapes[:, :, 1]).max(axis=1, initial=0.0)
+        self.shapes = shapes / np.where(translation > 0, translation, 1.0)[:, None, None]
+
+    def __len__(self):
+        return len(self.omega)
+
+    def result(self, i, amplitude=1.0):
+        """Mode i as an unloaded ResultSet for drawing, scaled by amplitude."""
+        zeros = np.zeros(self.model.n_beams)
+        return ResultSet(self.model, self.shapes[i] * amplitude, zeros, zeros, zeros)
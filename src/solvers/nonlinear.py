@@ -0,0 +1,141 @@
+"""
+Geometrically nonlinear (P-delta) analysis with modified Newton iterations.
+"""
+import numpy as np
+from solvers.factorization import Factorization
+
+
+def geometric_stiffness(model, axial):
+    """
+    Global-frame geometric stiffness matrices of all beams.
+
+    Consistent beam-column geometric stiffness for the transverse and
+    rotational DOFs; tension (axial > 0) stiffens, compression softens.
+
+    Args:
+        axial: Axial force per beam (N), shape (n_beams,)
+
+    Returns:
+        Array of shape (n_beams, 6, 6)
+    """
+    L = np.where(model.active, model.length, 1.0)
+    c = np.where(model.active, axial / (30.0 * L), 0.0)
+
+    # Local DOFs v_a, theta_a, v_b, theta_b
+    one = np.ones_like(L)
+    pattern = np.array([
+        [36 * one, 3 * L, -36 * one, 3 * L],
+        [3 * L, 4 * L**2, -3 * L, -L**2],
+        [-36 * one, -3 * L, 36 * one, -3 * L],
+        [3 * L, -L**2, -3 * L, 4 * L**2],
+    ]).transpose(2, 0, 1) * c[:, None, None]
+
+    k = np.zeros((model.n_beams, 6, 6))
+    k[np.ix_(np.arange(model.n_beams), [1, 2, 4, 5], [1, 2, 4, 5])] = pattern
+    return np.einsum("nji,njk,nkl->nil", model.T, k, model.T, optimize=True)
+
+
+def geometric_end_moments(model, axial, U):
+    """
+    End-moment contribution of the geometric stiffness (the P-delta moments).
+
+    Returns:
+        (moment_a, moment_b), each of shape (n_beams,)
+    """
+    L = np.where(model.active, model.length, 1.0)
+    c = np.where(model.active, axial / (30.0 * L), 0.0)
+    u_local = np.einsum("nij,nj->ni", model.T, U[model.element_dofs])
+    v_a, theta_a, v_b, theta_b = u_local[:, 1], u_local[:, 2], u_local[:, 4], u_local[:, 5]
+
+    moment_a = c * (3 * L * v_a + 4 * L**2 * theta_a - 3 * L * v_b - L**2 * theta_b)
+    moment_b = c * (3 * L * v_a - L**2 * theta_a - 3 * L * v_b + 4 * L**2 * theta_b)
+    return moment_a, moment_b
+
+
+class PDeltaAnalysis:
+    """
+    Solves (K + K_G(N(U)))·U = F, where the geometric stiffness K_G depends
+    on the axial forces N of the solution itself.
+
+    Modified Newton: the tangent K + K_G is factorized once and reused for
+    every iteration and, as long as it keeps converging, for later frames
+    too. Each frame also starts from the previous frame's displacements. It
+    is refactorized only when the residual stops shrinking fast enough.
+    """
+
+    # Converged when ||residual|| <= TOL * ||F|| (free DOFs)
+    TOL = 1e-6
+
+    MAX_ITER = 50
+
+    # Refactorize when an iteration shrinks the residual by less than this
+    DEGRADE_RATIO = 0.5
+
+    def __init__(self, model, k_elem, dense_limit):
+        """
+        Args:
+            model: CompiledModel
+            k_elem: Linear element stiffness matrices, (n_beams, 6, 6)
+            dense_limit: As Factorization
+        """
+        self.model = model
+        self.k_elem = k_elem
+        self.dense_limit = dense_limit
+        self.tangent = None
+        self.previous = None
+
+        # Report of the last solve
+        self.iterations = 0
+        self.residual = 0.0
+        self.refactorizations = 0
+
+    def _factorize(self, axial):
+        k_tangent = self.k_elem + geometric_stiffness(self.model, axial)
+        self.tangent = Factorization(self.model.assemble_stiffness(k_tangent), self.dense_limit)
+        self.refactorizations += 1
+
+    def solve(self, F_global, end_forces):
+        """
+        Args:
+            F_global: Global load vector, shape (n_dof,)
+            end_forces: Function U -> (axial, moment_a, moment_b) giving the
+                        linear member end forces (thermal strain included)
+
+        Returns:
+            (U_global, axial, moment_a, moment_b) with P-delta moments added
+
+        Raises:
+            np.linalg.LinAlgError: No convergence, or a tangent that is not
+                                   positive definite (buckling)
+        """
+        model = self.model
+        free = model.free_dofs
+        scale = max(np.linalg.norm(F_global[free]), 1e-12)
+        U = self.previous.copy() if self.previous is not None else np.zeros(model.n_dof)
+
+        self.iterations = 0
+        self.refactorizations = 0
+        last = None
+        while True:
+            axial, moment_a, moment_b = end_forces(U)
+            k_total = self.k_elem + geometric_stiffness(model, axial)
+            f_int = model.scatter_loads(np.einsum("nij,nj->ni", k_total, U[model.element_dofs]))
+            R = F_global[free] - f_int[free]
+            self.residual = np.linalg.norm(R) / scale
+
+            if self.residual <= self.TOL:
+                break
+            if self.iterations >= self.MAX_ITER or not np.isfinite(self.residual):
+                self.previous = None
+                raise np.linalg.LinAlgError("P-delta iterations did not converge")
+
+            if self.tangent is None or (last is not None and self.residual > self.DEGRADE_RATIO * last):
+                self._factorize(axial)
+            last = self.residual
+
+            U[free] += self.tangent.solve(R)
+            self.iterations += 1
+
+        self.previous = U
+        dM_a, dM_b = geometric_end_moments(model, axial, U)
+        return U, axial, moment_a + dM_a, moment_b + dM_b
@@ -0,0 +1,115 @@
+"""
+Bandwidth-reducing node ordering and ordering diagnostics.
+
+Run from the src directory to compare orderings on a saved design, tiled
+horizontally to make it larger:
+
+    python -m solvers.ordering ../saves/howe_truss.json 20
+"""
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+
+def rcm_node_order(n_nodes, conn):
+    """
+    Reverse Cuthill-McKee ordering of the node connectivity graph.
+
+    Args:
+        n_nodes: Number of nodes
+        conn: Beam connectivity, shape (n_beams, 2)
+
+    Returns:
+        Array of node indices in elimination order
+    """
+    if n_nodes == 0:
+        return np.zeros(0, dtype=int)
+
+    ones = np.ones(len(conn))
+    adjacency = sp.coo_matrix((ones, (conn[:, 0], conn[:, 1])), shape=(n_nodes, n_nodes))
+    adjacency = (adjacency + adjacency.T).tocsr()
+    return np.asarray(reverse_cuthill_mckee(adjacency, symmetric_mode=True), dtype=int)
+
+
+def bandwidth(K):
+    """Largest |i - j| over the nonzeros of a sparse matrix."""
+    K = K.tocoo(copy=True)
+    K.eliminate_zeros()
+    if K.nnz == 0:
+        return 0
+    return int(np.max(np.abs(K.row - K.col)))
+
+
+def fill_in(K):
+    """Entries created by LU factorization in the given order (no pivoting reorder)."""
+    K = K.tocsc()
+    K.eliminate_zeros()
+    if K.shape[0] == 0:
+        return 0
+    lu = spla.splu(K, permc_spec="NATURAL")
+    return int(lu.L.nnz + lu.U.nnz - lu.L.shape[0] - K.nnz)
+
+
+def ordering_report(K_reordered, natural_order):
+    """
+    Compares a reordered stiffness matrix with the insertion-order one.
+
+    Args:
+        K_reordered: Reduced stiffness matrix in solver numbering
+        natural_order: Solver rows listed in insertion (Bridge.nodes) order
+
+    Returns:
+        Dict with "n_dof", "bandwidth" and "fill_in"; the last two are
+        (before, after) tuples.
+    """
+    K_reordered = K_reordered.tocsr()
+    K_natural = K_reordered[natural_order][:, natural_order]
+    return {
+        "n_dof": K_reordered.shape[0],
+        "bandwidth": (bandwidth(K_natural), bandwidth(K_reordered)),
+        "fill_in": (fill_in(K_natural), fill_in(K_reordered)),
+    }
+
+
+def format_ordering_report(report):
+    """One-line human-readable summary of ordering_report()."""
+    bw_before, bw_after = report["bandwidth"]
+    fill_before, fill_after = report["fill_in"]
+    return (f"DOF: {report['n_dof']} | "
+            f"Bandwidth: {bw_before} -> {bw_after} | "
+            f"Fill-in: {fill_before} -> {fill_after}")
+
+
+if __name__ == "__main__":
+    import sys
+    import random
+    from core.serializer import Serializer
+    from entities.bridge import Bridge
+    from solvers.static_solver import StaticSolver
+
+    path = sys.argv[1]
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    bridge = Bridge()
+    ok, msg = Serializer._read_from_file(bridge, path)
+    if not ok:
+        sys.exit(msg)
+
+    # Tile the design to the right; coincident nodes are merged by add_node
+    xs = [n.x for n in bridge.nodes]
+    width = max(xs) - min(xs)
+    base_beams = list(bridge.beams)
+    for k in range(1, copies):
+        copy_of = {}
+        for beam in base_beams:
+            for node in (beam.node_a, beam.node_b):
+                if node not in copy_of:
+                    copy_of[node] = bridge.add_node(node.x + k * width, node.y, node.fixed)
+            bridge.add_beam_direct(copy_of[beam.node_a], copy_of[beam.node_b], beam.type)
+
+    # Long editing sessions leave nodes in arbitrary order
+    random.shuffle(bridge.nodes)
+    bridge.touch()
+
+    print(format_ordering_report(StaticSolver(bridge).ordering_report()))
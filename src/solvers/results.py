@@ -0,0 +1,187 @@
+"""
+Array-backed solver results.
+"""
+import itertools
+from collections.abc import Mapping
+import numpy as np
+
+
+# Every ResultSet gets a new version number, so caches built from one
+# result (deformed geometry, spatial indices...) can tell it apart.
+_versions = itertools.count(1)
+
+
+class ResultSet:
+    """
+    Structure-of-arrays results of one solve.
+
+    Nodes and beams are addressed by their index in the compiled model
+    (model.nodes / model.beams), which stays stable for the model's lifetime:
+        displacements  (n_nodes, 3)  u_x, u_y, theta
+        axial          (n_beams,)    axial force (N), negative in compression
+        moment         (n_beams,)    governing bending moment (N·m)
+        stress_ratio   (n_beams,)    utilization, >= 1.0 means failure
+
+    buckling_factor is the factor on these loads at which the whole frame
+    buckles (inf if it cannot, or if no buckling analysis was available).
+    """
+
+    def __init__(self, model, displacements, axial, moment, stress_ratio, buckling_factor=np.inf):
+        self.model = model
+        self.displacements = np.asarray(displacements, dtype=float).reshape(-1, 3)
+        self.axial = np.asarray(axial, dtype=float)
+        self.moment = np.asarray(moment, dtype=float)
+        self.stress_ratio = np.asarray(stress_ratio, dtype=float)
+        self.buckling_factor = float(buckling_factor)
+        self.version = next(_versions)
+
+    @classmethod
+    def zeros(cls, model):
+        """An all-zero result (undeformed, unloaded) for the given model."""
+        return cls(model, np.zeros((model.n_nodes, 3)), np.zeros(model.n_beams),
+                   np.zeros(model.n_beams), np.zeros(model.n_beams))
+
+    # --- Vectorized queries ---
+
+    def max_ratio(self):
+        """Highest stress ratio over all beams (0.0 if there are none)."""
+        return float(self.stress_ratio.max()) if len(self.stress_ratio) else 0.0
+
+    def max_total_force(self):
+        """Highest |axial| + |moment| over all beams (0.0 if there are none)."""
+        if not len(self.axial):
+            return 0.0
+        return float(np.max(np.abs(self.axial) + np.abs(self.moment)))
+
+    def failed_indices(self, threshold=1.0):
+        """Indices of beams whose stress ratio reached the threshold."""
+        return np.flatnonzero(self.stress_ratio >= threshold)
+
+    def failed_beams(self, threshold=1.0):
+        """Beam objects whose stress ratio reached the threshold."""
+        return [self.model.beams[k] for k in self.failed_indices(threshold)]
+
+    # --- Dict compatibility ---
+
+    def views(self):
+        """
+        Dict-like views keyed by Beam/Node objects.
+
+        Returns:
+            (results, bending_results, stress_ratios, displacements)
+        """
+        model = self.model
+        return (
+            ResultView(model.beam_index, self.axial),
+            ResultView(model.beam_index, self.moment),
+            ResultView(model.beam_index, self.stress_ratio),
+            ResultView(model.node_index, self.displacements, rows=True),
+        )
+
+
+class ResultView(Mapping):
+    """
+    Read-only mapping from Beam/Node objects to one result array.
+
+    Kept for callers written against the old per-object result dicts; new
+    code should index the ResultSet arrays directly.
+    """
+
+    def __init__(self, index=None, values=None, rows=False):
+        self._index = index if index is not None else {}
+        self._values = values
+        self._rows = rows
+
+    def __getitem__(self, key):
+        value = self._values[self._index[key]]
+        return tuple(value.tolist()) if self._rows else float(value)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+class ResultBatch:
+    """
+    Stacked results of several load cases on the same model (solve_many).
+
+    Same arrays as ResultSet with a leading load-case axis:
+        displacements  (n_cases, n_nodes, 3)
+        axial, moment, stress_ratio  (n_cases, n_beams)
+    """
+
+    def __init__(self, model, displacements, axial, moment, stress_ratio):
+        self.model = model
+        n_cases = len(axial)
+        self.displacements = np.asarray(displacements, dtype=float).reshape(n_cases, -1, 3)
+        self.axial = np.asarray(axial, dtype=float)
+        self.moment = np.asarray(moment, dtype=float)
+        self.stress_ratio = np.asarray(stress_ratio, dtype=float)
+
+    def __len__(self):
+        return len(self.axial)
+
+    def case(self, i):
+        """Results of load case i as a ResultSet."""
+        return ResultSet(self.model, self.displacements[i], self.axial[i],
+                         self.moment[i], self.stress_ratio[i])
+
+    def max_ratio(self):
+        """Highest stress ratio of each load case, shape (n_cases,)."""
+        if self.stress_ratio.shape[1] == 0:
+            return np.zeros(len(self))
+        return self.stress_ratio.max(axis=1)
+
+    def failed_cases(self, threshold=1.0):
+        """Indices of load cases in which at least one beam fails."""
+        return np.flatnonzero(self.max_ratio() >= threshold)
+
+
+class Envelope:
+    """
+    Extremes of one moving point load over sampled positions on the walkable
+    beams (StaticSolver.moving_load_envelope).
+
+        positions     list of (Beam, t) load positions
+        mass          load mass of the envelope (kg)
+        axial_max, axial_min, moment_max, stress_ratio  (n_beams,)
+        governing     (n_beams,) index into positions of each beam's
+                      highest stress ratio
+        safe_mass     largest mass that crosses with every stress ratio
+                      below 1.0 (kg; inf if no mass up to the search
+                      limit fails, 0.0 if the bridge fails unloaded)
+        critical      index into positions that limits safe_mass (-1: none)
+    """
+
+    def __init__(self, model, positions, mass, axial_max, axial_min, moment_max,
+                 stress_ratio, governing, safe_mass, critical):
+        self.model = model
+        self.positions = positions
+        self.mass = mass
+        self.axial_max = axial_max
+        self.axial_min = axial_min
+        self.moment_max = moment_max
+        self.stress_ratio = stress_ratio
+        self.governing = governing
+        self.safe_mass = safe_mass
+        self.critical = critical
+
+    def max_ratio(self):
+        """Highest stress ratio over all beams and positions."""
+        return float(self.stress_ratio.max()) if len(self.stress_ratio) else 0.0
+
+    def governing_position(self, beam):
+        """(Beam, t) of the load position that governs the given beam."""
+        return self.positions[self.governing[self.model.beam_index[beam]]]
+
+    def result(self):
+        """
+        The envelope as an undeformed ResultSet for drawing: the axial force
+        of larger magnitude, the largest moment and the largest stress ratio.
+        """
+        axial = np.where(np.abs(self.axial_max) >= np.abs(self.axial_min),
+                         self.axial_max, self.axial_min)
+        return ResultSet(self.model, np.zeros((self.model.n_nodes, 3)), axial,
+                         self.moment_max, self.stress_ratio)
@@ -0,0 +1,119 @@
+"""
+Solve-on-change scheduling with a cache of recent load states.
+"""
+from collections import OrderedDict
+import numpy as np
+from core.material_manager import MaterialManager
+from solvers.static_solver import point_load_items
+
+
+class SolveScheduler:
+    """
+    Sits in front of StaticSolver.solve() and only solves when the inputs
+    changed: the point loads (beam, position, mass), the temperature, the
+    P-delta flag, the bridge and material revisions and the members removed
+    by progressive collapse.
+
+    Positions, masses and temperatures are snapped to a grid (the quanta
+    below) and solved at the snapped values, so every cached result is exact
+    for its key. A state equal to the last one is skipped outright; other
+    recent states are looked up in a bounded LRU cache, so walking back and
+    forth over the same span costs no solves.
+
+        hits, misses, skips   counters since the last reset_stats()
+    """
+
+    # Load positions are snapped to this spacing along the beam (m)
+    POSITION_QUANTUM = 0.01
+
+    # Masses (kg) and temperature changes (°C) are snapped to these steps
+    MASS_QUANTUM = 0.1
+    TEMPERATURE_QUANTUM = 0.1
+
+    # Load states kept in the cache
+    CAPACITY = 256
+
+    def __init__(self, solver, capacity=None):
+        """
+        Args:
+            solver: StaticSolver
+            capacity: Cached load states (default CAPACITY)
+        """
+        self.solver = solver
+        self.capacity = self.CAPACITY if capacity is None else capacity
+        self._cache = OrderedDict()
+        self._last = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zeroes the hit/miss/skip counters."""
+        self.hits = 0
+        self.misses = 0
+        self.skips = 0
+
+    def clear(self):
+        """Forgets all cached results."""
+        self._cache.clear()
+        self._last = None
+
+    def hit_rate(self):
+        """Share of the requests answered without a solve (0.0 if none yet)."""
+        total = self.hits + self.misses + self.skips
+        return (self.hits + self.skips) / total if total else 0.0
+
+    def solve(self, temperature=0.0, point_load=None, nonlinear=False):
+        """
+        As StaticSolver.solve(), for the snapped load state.
+
+        Returns:
+            True on success, False with error_msg set otherwise
+        """
+        solver = self.solver
+        temperature, point_load = self.quantize(temperature, point_load)
+        key = self._key(temperature, point_load, nonlinear)
+
+        if self._last is not None and self._last[0] == key and solver.current is self._last[1]:
+            self.skips += 1
+            return True
+
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            solver.current = result
+            solver.error_msg = "OK"
+            self._last = (key, result)
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        self._last = None
+        if not solver.solve(temperature, point_load, nonlinear):
+            return False
+
+        self._cache[key] = solver.current
+        if len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+        self._last = (key, solver.current)
+        return True
+
+    def quantize(self, temperature, point_load):
+        """
+        Snaps a load state to the cache grid.
+
+        Returns:
+            (temperature, point_load) with point_load as [(beam, t, mass)]
+        """
+        temperature = round(temperature / self.TEMPERATURE_QUANTUM) * self.TEMPERATURE_QUANTUM
+        snapped = []
+        for beam, t, mass in point_load_items(point_load):
+            steps = max(1, round(beam.length / self.POSITION_QUANTUM))
+            snapped.append((beam, round(t * steps) / steps,
+                            round(mass / self.MASS_QUANTUM) * self.MASS_QUANTUM))
+        return temperature, snapped
+
+    def _key(self, temperature, point_load, nonlinear):
+        solver = self.solver
+        removed = 0 if solver.removed is None else int(np.count_nonzero(solver.removed))
+        loads = tuple(sorted((id(beam), t, mass) for beam, t, mass in point_load))
+        return (solver.bridge.revision, MaterialManager.revision, removed,
+                bool(nonlinear), temperature, loads)
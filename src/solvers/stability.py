@@ -0,0 +1,114 @@
+"""
+Kinematic stability checks that run before the first solve.
+"""
+import numpy as np
+
+
+def truss_flexible_nodes(model):
+    """
+    Nodes that would be free to move if every joint were a pin.
+
+    Runs the (2,3) pebble game (Jacobs & Hendrickson) on the beam graph. The
+    supports are represented by one virtual ground body (a triangle of three
+    virtual vertices) to which each fixed node is pinned with two bars. A
+    node is truss-rigid when it lies in the ground's rigid component.
+
+    Such nodes are held only by the bending stiffness of rigid joints, for
+    example an unbraced rectangular panel. The check is generic: it does
+    not catch flexibility that comes only from special geometry (collinear
+    bars), which the numeric pivot check covers.
+
+    Floating components (see CompiledModel) are skipped by the solver and
+    not reported here.
+
+    Returns:
+        Array of node indices not rigidly connected to the ground
+    """
+    game = _PebbleGame(model.n_nodes + 3)
+    g0, g1, g2 = model.n_nodes, model.n_nodes + 1, model.n_nodes + 2
+
+    for u, v in ((g0, g1), (g1, g2), (g0, g2)):
+        game.add_edge(u, v)
+    for i in np.flatnonzero(model.fixed):
+        game.add_edge(int(i), g0)
+        game.add_edge(int(i), g1)
+    for a, b in model.conn[model.active]:
+        game.add_edge(int(a), int(b))
+
+    # A failed 4-pebble search from (v, ground) spans a rigid component that
+    # contains both, so every vertex it reached is rigid with the ground.
+    rigid = np.zeros(model.n_nodes + 3, dtype=bool)
+    rigid[[g0, g1, g2]] = True
+    for v in range(model.n_nodes):
+        if rigid[v]:
+            continue
+        independent, reached = game.gather(v, g0, 4)
+        if not independent:
+            rigid[list(reached)] = True
+
+    return np.flatnonzero(~rigid[:model.n_nodes] & ~model.floating)
+
+
+class _PebbleGame:
+    """
+    (2,3) pebble game on a directed multigraph.
+
+    Every vertex starts with two pebbles. An edge is independent if four
+    pebbles can be gathered on its endpoints; it is then covered by one
+    pebble of its tail and oriented away from it.
+    """
+
+    def __init__(self, n_vertices):
+        self.pebbles = [2] * n_vertices
+        self.out = [[] for _ in range(n_vertices)]
+
+    def add_edge(self, u, v):
+        """Inserts the edge if it is independent. Returns True if inserted."""
+        if u == v:
+            return False
+        independent, _ = self.gather(u, v, 4)
+        if independent:
+            self.pebbles[u] -= 1
+            self.out[u].append(v)
+        return independent
+
+    def gather(self, u, v, count):
+        """
+        Moves free pebbles onto u and v until they hold count together.
+
+        Returns:
+            (success, reached): reached is the vertex set of the last failed
+            search (empty on success)
+        """
+        while self.pebbles[u] + self.pebbles[v] < count:
+            reached = {u, v}
+            if not (self._find_pebble(u, reached) or self._find_pebble(v, reached)):
+                return False, reached
+        return True, set()
+
+    def _find_pebble(self, root, visited):
+        """
+        Depth-first search for a free pebble reachable from root along
+        out-edges; if found, reverses the path so the pebble moves to root.
+        """
+        parent = {}
+        stack = [root]
+        while stack:
+            x = stack.pop()
+            for y in self.out[x]:
+                if y in visited:
+                    continue
+                visited.add(y)
+                parent[y] = x
+                if self.pebbles[y] > 0:
+                    # Reverse the path root -> ... -> y
+                    self.pebbles[y] -= 1
+                    self.pebbles[root] += 1
+                    while y != root:
+                        x = parent[y]
+                        self.out[x].remove(y)
+                        self.out[y].append(x)
+                        y = x
+                    return True
+                stack.append(y)
+        return False
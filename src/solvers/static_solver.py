@@ -1,311 +1,1381 @@
+import contextlib
 import numpy as np
 import math
-from core.material_manager import MaterialManager
+from collections.abc import Mapping
+from solvers.buckling import Buckling, critical_load_factor
+from solvers.compiled_model import CompiledModel
+from solvers.dynamic import NewmarkIntegrator, lumped_mass
+from solvers.factorization import BlockFactorization, Factorization
+from solvers.influence import InfluenceTable
+from solvers.iterative import IterativeSolver
+from solvers.lowrank import DowndatedFactorization
+from solvers.modal import Modes, natural_modes
+from solvers.nonlinear import PDeltaAnalysis, geometric_stiffness
+from solvers.ordering import ordering_report
+from solvers.results import Envelope, ResultBatch, ResultSet, ResultView
+from solvers.stability import truss_flexible_nodes
+from solvers.substructure import CondensedFactorization, detect_panels
 from core.constants import *
 
+
+def point_load_items(point_load):
+    """
+    Point loads as a list of (beam, t, mass).
+    
+    Accepts the {beam: (t, mass)} dict (one load per beam) or any iterable
+    of (beam, t, mass), which may put several loads on one beam; None or
+    empty means no loads.
+    """
+    if not point_load:
+        return []
+    if isinstance(point_load, Mapping):
+        return [(beam, t, mass) for beam, (t, mass) in point_load.items()]
+    return list(point_load)
+
+
 class StaticSolver:
+    # Reduced systems up to this many DOFs are solved densely; below this size
+    # LAPACK is faster than the sparse bookkeeping.
+    DENSE_DOF_LIMIT = 150
+    
+    # Upper bound on stored influence displacements (n_dof x n_columns floats);
+    # larger decks fall back to a substitution per frame.
+    INFLUENCE_MAX_ENTRIES = 10_000_000
+    
+    GRAVITY = 9.81
+    
+    # Pivots below this fraction of their diagonal entry mark a mechanism
+    PIVOT_TOL = 1e-10
+    
+    # Time step of the dynamic analysis (s); frames are advanced in whole steps
+    DYNAMIC_DT = 1.0 / 240.0
+    
+    # Rayleigh damping C = a_M·M + a_K·K: 2% of critical at 2 Hz and 20 Hz
+    RAYLEIGH_DAMPING = (0.46, 2.9e-4)
+    
+    # Natural modes computed by modal_analysis() by default
+    MODAL_MODES = 6
+    
+    # Largest translation (m) of a displayed mode shape, before exaggeration
+    MODE_AMPLITUDE = 1e-3
+    
+    # Load positions sampled along each beam by moving_load_envelope()
+    ENVELOPE_SAMPLES = 21
+    
+    # Values per array when the envelope evaluates positions in chunks, and
+    # the most chunks (larger ones beyond that, however many beams there are)
+    ENVELOPE_CHUNK_ENTRIES = 1_000_000
+    ENVELOPE_MAX_CHUNKS = 32
+    
+    # Largest safe mass reported (kg), inf beyond it
+    SAFE_MASS_LIMIT = 1e7
+
     def __init__(self, bridge):
         self.bridge = bridge
-        self.results = {} 
-        self.bending_results = {}
-        self.stress_ratios = {} 
-        self.displacements = {}
+        self.current = None  # ResultSet of the last successful solve
         self.error_msg = "OK"
+        
+        # Stability diagnostics (see is_stable)
+        self.unstable_nodes = []
+        self.floating_nodes = []
+        self.flexible_nodes = []
+        
+        # Cached between frames (see _get_factorization)
+        self.model = None
+        self.factorization = None
+        self._stiffness_key = None
+        
+        # Static condensation of panels (see use_substructures) and the part
+        # whose panel interiors are recovered (see set_recovery_window)
+        self.panels = None
+        self.recovery_window = None
+        self.recovery = None
+        self._window_beams = None
+        
+        # Conjugate gradient backend options (see use_iterative)
+        self.iterative = None
+        
+        # Geometric nonlinear mode (see solve(nonlinear=True))
+        self.pdelta = None
+        self._pdelta_key = None
+        self.nonlinear_info = {"iterations": 0, "residual": 0.0, "refactorizations": 0}
+        
+        # Transient mode (see solve_dynamic)
+        self.dynamic = None
+        self._dynamic_key = None
+        
+        # Natural modes (see modal_analysis)
+        self.modes = None
+        self._modes_key = None
+        
+        # Global buckling mode of the design (see buckling_analysis)
+        self.buckling = None
+        self._buckling_key = None
+        
+        # Influence mode (see build_influence)
+        self.influence_beams = None
+        self.influence = None
+        
+        # Members taken out by progressive collapse (see remove_beams)
+        self.removed = None
+        self.downdate = None
 
-    def is_stable(self):
-        return True 
+    # --- Per-object views of the current result (compatibility) ---
+
+    def _views(self):
+        if self.current is None:
+            return (ResultView(),) * 4
+        return self.current.views()
+
+    @property
+    def results(self):
+        """Axial force per Beam."""
+        return self._views()[0]
+
+    @property
+    def bending_results(self):
+        """Governing bending moment per Beam."""
+        return self._views()[1]
 
-    def solve(self, temperature=0.0, point_load=None):
-        self.results.clear()
-        self.stress_ratios.clear()
-        self.displacements.clear()
+    @property
+    def stress_ratios(self):
+        """Stress ratio per Beam."""
+        return self._views()[2]
+
+    @property
+    def displacements(self):
+        """(u_x, u_y, theta) per Node."""
+        return self._views()[3]
+
+    def is_stable(self):
+        """
+        Checks the structure for mechanisms without solving for any load.
+        
+        1. Parts (connected groups of beams) that reach no support are free
+           rigid bodies. The solver skips them; they are listed in
+           floating_nodes, and only a bridge with no supported part fails.
+        2. K is factorized (the factorization is kept for the solves that
+           follow) and no pivot may vanish.
+        
+        On failure error_msg contains "Mechanism" and unstable_nodes lists
+        the nodes that can move. On success flexible_nodes lists the nodes
+        that are held only by joint bending stiffness (pebble game), which
+        is worth showing but not an error.
+        
+        Returns:
+            True if the structure is kinematically stable
+        """
+        self.unstable_nodes = []
+        self.flexible_nodes = []
+        model = self._get_model()
+        
+        # 1. Combinatorial: unsupported sub-assemblies
+        self.floating_nodes = [model.nodes[i] for i in np.flatnonzero(model.floating)]
+        if model.n_nodes and model.floating.all():
+            return self._mechanism(model, range(model.n_nodes))
+        
+        # 2. Numeric: rank check on the factorized reduced system
+        flexible = truss_flexible_nodes(model)
+        try:
+            factorization = self._get_factorization(model, model.material_table())
+        except (np.linalg.LinAlgError, RuntimeError):
+            # Cannot be localized through the pivots; the pin-jointed
+            # mechanism is the best hint
+            return self._mechanism(model, flexible)
         
-        # 1. Degrees of Freedom
-        nodes = self.bridge.nodes
-        beams = self.bridge.beams
-        n_nodes = len(nodes)
+        weak = factorization.weak_pivots(self.PIVOT_TOL)
+        if len(weak):
+            return self._mechanism(model, np.unique(model.free_dofs[weak] // 3))
         
-        node_map = {node: i for i, node in enumerate(nodes)}
-        dof = 3 * n_nodes
+        self.flexible_nodes = [model.nodes[i] for i in flexible]
+        self.error_msg = "OK"
+        return True
+
+    def _mechanism(self, model, node_indices):
+        """Records a failed stability check on the given nodes."""
+        self.unstable_nodes = [model.nodes[i] for i in node_indices]
+        self.error_msg = f"Instabil: Mechanism ({len(self.unstable_nodes)} csomópont)"
+        return False
+
+    def _get_model(self):
+        """Returns the compiled array model, recompiling it if the bridge was edited."""
+        if self.model is None or not self.model.is_current(self.bridge):
+            self.model = CompiledModel(self.bridge)
+            self.factorization = None
+            self.removed = None
+            self.downdate = None
+        return self.model
+
+    def _active(self, model):
+        """Beams that carry load: active in the model and not removed by collapse."""
+        if self.removed is None:
+            return model.active
+        return model.active & ~self.removed
+
+    def _element_stiffness(self, model, table, intact=False):
+        """
+        Element stiffness matrices (n_beams, 6, 6) for the current materials.
         
-        K_global = np.zeros((dof, dof))
-        F_global = np.zeros(dof)
+        Removed beams (see remove_beams) get zero matrices unless intact is set.
+        """
+        props = model.section_properties(table)
+        k_elem = model.element_stiffness(props["E"], props["area"], props["inertia"])
+        if self.removed is not None and not intact:
+            k_elem[self.removed] = 0.0
+        return k_elem
 
-        # Dictionary to store Fixed End Moments (FEM) for post-processing stress
-        # Key: beam, Value: (Moment_at_A, Moment_at_B)
-        beam_fem_loads = {}
+    def _assemble_stiffness(self, model, table):
+        """Reduced stiffness matrix (COO, solver numbering) for the current materials."""
+        return model.assemble_stiffness(self._element_stiffness(model, table))
 
-        # 2. Build Stiffness Matrix
-        for beam in beams:
-            i = node_map[beam.node_a]
-            j = node_map[beam.node_b]
-            
-            props = MaterialManager.get_properties(beam.type, hollow_ratio=beam.hollow_ratio)
-            
-            E = props["E"]
-            A = props["area"]
-            I = props["inertia"]
-            
-            dx = beam.node_b.x - beam.node_a.x
-            dy = beam.node_b.y - beam.node_a.y
-            L = math.sqrt(dx*dx + dy*dy)
+    def ordering_report(self):
+        """
+        Bandwidth and fill-in of the reduced stiffness matrix in insertion
+        order versus the reordered (RCM) numbering the solver uses.
+        
+        Returns:
+            Dict from solvers.ordering.ordering_report()
+        """
+        model = self._get_model()
+        K = self._assemble_stiffness(model, model.material_table())
+        natural_order = model.dof_map[np.sort(model.free_dofs)]
+        return ordering_report(K, natural_order)
 
-            if L < 1e-6:
-                print(f"Warning: Skipping zero-length beam at ({beam.node_a.x}, {beam.node_a.y})")
-                continue
+    def _get_factorization(self, model, table):
+        """
+        Returns the factorized reduced stiffness matrix.
+        
+        After remove_beams this is the intact factorization with the removed
+        members downdated out of it (DowndatedFactorization).
+        """
+        base = self._intact_factorization(model, table)
+        if self.removed is None:
+            return base
+        if self.downdate is None or self.downdate.base is not base:
+            # The intact factor was rebuilt (e.g. a material change): all
+            # removed members are downdated from the new one at once
+            self.downdate = DowndatedFactorization(base)
+            removed = np.flatnonzero(self.removed)
+            self.downdate.remove(self._element_stiffness(model, table, intact=True)[removed],
+                                 model.dof_map[model.element_dofs[removed]])
+        return self.downdate
+
+    def _intact_factorization(self, model, table):
+        """
+        Returns the factorized reduced stiffness matrix of the intact structure.
+        
+        K only depends on geometry, topology and the stiffness-related material
+        values (E, A, I), while the agent and temperature only change the load
+        vector. The factorization is therefore kept until the model or one of
+        those values changes, and a frame's solve is one forward/back substitution.
+        """
+        key = tuple(table[k].tobytes() for k in ("E", "area", "inertia"))
+        if self.factorization is None or key != self._stiffness_key:
+            self.factorization = None
+            if self.panels is not None:
+                self.factorization = CondensedFactorization(
+                    model, self._element_stiffness(model, table, intact=True),
+                    model.section_properties(table),
+                    self._panel_indices(model), self.DENSE_DOF_LIMIT
+                )
+                self._stiffness_key = key
+                return self.factorization
             
-            c = dx / L
-            s = dy / L
+            K_coo = model.assemble_stiffness(self._element_stiffness(model, table, intact=True))
+            if self.iterative is not None:
+                self.factorization = IterativeSolver(K_coo, **self.iterative)
+            elif len(model.blocks) > 1:
+                # Independent parts are factorized separately
+                self.factorization = BlockFactorization(K_coo, model.blocks, self.DENSE_DOF_LIMIT)
+            else:
+                self.factorization = Factorization(K_coo, self.DENSE_DOF_LIMIT)
+            self._stiffness_key = key
+        return self.factorization
+
+    def remove_beams(self, beams):
+        """
+        Takes failed members out of the structure (progressive collapse).
+        
+        The design is not edited and nothing is recompiled: the members'
+        stiffness is removed from the cached factorization by a low-rank
+        (Woodbury) downdate, so a collapse step costs a few substitutions
+        instead of a refactorization. Their self-weight stays on their end
+        nodes, where the broken pieces hang. A running dynamic analysis
+        keeps its motion, so the released forces set the bridge swinging.
+        The removal lasts until the bridge is edited (recompiled).
+        
+        Args:
+            beams: Beams to remove (unknown or already removed ones are skipped)
+        
+        Returns:
+            True if the remaining structure is stable; False with error_msg
+            and unstable_nodes set if the removal formed a mechanism
+        """
+        model = self._get_model()
+        table = model.material_table()
+        if self.removed is None:
+            self.removed = np.zeros(model.n_beams, dtype=bool)
+        idx = np.array([model.beam_index[b] for b in beams if b in model.beam_index], dtype=int)
+        idx = np.unique(idx[self._active(model)[idx]])
+        
+        # Everything derived from the old stiffness is stale
+        self.influence = None
+        self.pdelta = None
+        self.modes = None
+        self._buckling_key = None
+        
+        try:
+            # Brought up to date with the earlier removals first
+            downdate = self._get_factorization(model, table)
+            self.removed[idx] = True
+            if len(idx):
+                k_removed = self._element_stiffness(model, table, intact=True)[idx]
+                rows = model.dof_map[model.element_dofs[idx]]
+                downdate.remove(k_removed, rows)
+                if self.dynamic is not None:
+                    k_elem = np.zeros((model.n_beams, 6, 6))
+                    k_elem[idx] = k_removed
+                    self.dynamic.remove(k_removed, rows, model.assemble_stiffness(k_elem))
+        except (np.linalg.LinAlgError, RuntimeError):
+            return self._mechanism(model, [])
+        
+        weak = downdate.weak_pivots(self.PIVOT_TOL)
+        if downdate.mechanism is not None:
+            return self._mechanism(model, np.unique(model.free_dofs[weak] // 3))
+        return True
+
+    def use_substructures(self, panels="auto"):
+        """
+        Condenses panel interiors out of the global system (superelements).
+        
+        Args:
+            panels: "auto" to cut the bridge into slices of whole periods
+                    (solvers.substructure.detect_panels), a list of beam
+                    lists to use as panels, or None to switch condensation off
+        """
+        self.panels = panels
+        self.factorization = None
+        self.influence = None
+
+    def set_recovery_window(self, window):
+        """
+        Limits the interior recovery of condensed panels to the rendered part.
+        
+        With panel condensation on (use_substructures) and a window set,
+        solve() recovers the interior displacements and member forces only
+        of the panels that overlap the window or carry a point load. The
+        beams of the other panels get zero forces, so they are not checked
+        for failure; recovery reports (recovered, total) panels of the last
+        solve. Influence tables are not used meanwhile, as building one
+        recovers every panel for every column.
+        
+        Args:
+            window: (x_min, x_max) in meters, or None to recover all panels
+        """
+        self.recovery_window = window
+        self.influence = None
+
+    def _recovered_panels(self, model, factorization, loaded):
+        """
+        Panels to recover in this solve (overlapping the recovery window or
+        carrying a point load), or None for all of them.
+        """
+        if self.recovery_window is None or not isinstance(factorization, CondensedFactorization):
+            return None
+        key = (model, self.recovery_window)
+        if self._window_beams is None or self._window_beams[0] != key:
+            x_min, x_max = self.recovery_window
+            x = model.xy[model.conn, 0]
+            self._window_beams = (key, (x.max(axis=1) >= x_min) & (x.min(axis=1) <= x_max))
+        wanted = self._window_beams[1].copy()
+        wanted[loaded] = True
+        return factorization.panels_of(wanted)
+
+    def use_iterative(self, preconditioner="ilu", rtol=1e-10, maxiter=None):
+        """
+        Solves with preconditioned conjugate gradients instead of factorizing.
+        
+        Meant for models too large to factorize. Each frame's solve is
+        warm-started from the recent frames' displacements; the iteration
+        count of the last solve is available as the iterations property.
+        Influence tables are not used with this backend: building one takes
+        a cold CG solve per deck DOF and stores what CG is meant to avoid.
+        Panel condensation (use_substructures) takes precedence if both are
+        set.
+        
+        Args:
+            preconditioner: "jacobi", "block" (per-node 3x3) or "ilu",
+                            or None to go back to the direct solver
+            rtol: Relative residual tolerance
+            maxiter: Iteration limit per right-hand side
+        """
+        if preconditioner is None:
+            self.iterative = None
+        else:
+            self.iterative = {"preconditioner": preconditioner, "rtol": rtol, "maxiter": maxiter}
+        self.factorization = None
+        self.influence = None
+
+    @property
+    def iterations(self):
+        """CG iterations of the last solve (0 for the direct solvers)."""
+        return getattr(self.factorization, "iterations", 0)
+
+    def _panel_indices(self, model):
+        """Panels of the current model as beam index arrays."""
+        if self.panels == "auto":
+            return detect_panels(model)
+        return [
+            np.array([model.beam_index[b] for b in group if b in model.beam_index], dtype=int)
+            for group in self.panels
+        ]
+
+    def _get_pdelta(self, model, table):
+        """
+        Returns the P-delta analysis for the current model and materials.
+        
+        It owns the tangent factorization and the previous frame's
+        displacements, so it is kept as long as K itself is unchanged.
+        """
+        key = (model,) + tuple(table[k].tobytes() for k in ("E", "area", "inertia"))
+        if self.pdelta is None or self._pdelta_key != key:
+            self.pdelta = None
+            self.pdelta = PDeltaAnalysis(model, self._element_stiffness(model, table),
+                                         self.DENSE_DOF_LIMIT)
+            self._pdelta_key = key
+        return self.pdelta
+
+    def _get_dynamic(self, model, table, F_global):
+        """
+        Returns the Newmark integrator for the current model and materials.
+        
+        It owns the factorized effective stiffness and the motion state, so
+        it is kept while K and the masses are unchanged. A new integrator
+        starts at rest in static equilibrium under F_global.
+        """
+        key = (model,) + tuple(table[k].tobytes() for k in ("E", "area", "inertia", "density"))
+        if self.dynamic is None or self._dynamic_key != key:
+            self.dynamic = None
+            props = model.section_properties(table)
+            free = model.free_dofs
+            integrator = NewmarkIntegrator(
+                self._assemble_stiffness(model, table), lumped_mass(model, props)[free],
+                self.DYNAMIC_DT, self.RAYLEIGH_DAMPING, self.DENSE_DOF_LIMIT
+            )
+            integrator.reset(self._get_factorization(model, table).solve(F_global[free]))
+            self.dynamic = integrator
+            self._dynamic_key = key
+        return self.dynamic
+
+    def reset_dynamic(self):
+        """Drops the motion state; the next solve_dynamic() starts at rest again."""
+        self.dynamic = None
+
+    def modal_analysis(self, n_modes=None):
+        """
+        Lowest natural frequencies and mode shapes of the bridge.
+        
+        Uses the lumped masses of the dynamic mode and the cached
+        factorization of K for a shift-invert Lanczos solve (see
+        solvers.modal). The result is kept until the design changes.
+        
+        Args:
+            n_modes: Number of modes (default MODAL_MODES)
+        
+        Returns:
+            Modes, or None with error_msg set if K is singular
+        """
+        n_modes = self.MODAL_MODES if n_modes is None else n_modes
+        model = self._get_model()
+        table = model.material_table()
+        key = (model, n_modes) + tuple(table[k].tobytes() for k in ("E", "area", "inertia", "density"))
+        if self.modes is not None and self._modes_key == key:
+            return self.modes
+        
+        props = model.section_properties(table)
+        free = model.free_dofs
+        try:
+            omega, shapes = natural_modes(
+                self._assemble_stiffness(model, table), lumped_mass(model, props)[free], n_modes,
+                self._get_factorization(model, table), self.DENSE_DOF_LIMIT
+            )
+        except (np.linalg.LinAlgError, RuntimeError):
+            self.error_msg = "Instabil: Szinguláris Mátrix"
+            return None
+        
+        shapes_global = np.zeros((model.n_dof, len(omega)))
+        shapes_global[free] = shapes
+        self.modes = Modes(model, omega, shapes_global)
+        self._modes_key = key
+        return self.modes
+
+    def buckling_analysis(self):
+        """
+        Global linear buckling of the design under its self-weight.
+        
+        Assembles the geometric stiffness of the dead-load axial forces and
+        finds the smallest critical load factor with a shift-invert
+        eigensolve on the cached factorization (see solvers.buckling). The
+        result is kept until the design or the materials change; every
+        solve rates its own axial forces with it (Buckling.rate: never
+        above the exact factor of the state; the members that drive its
+        mode share the frame's ratio, see _stress_ratio) and reports the
+        factor as result.buckling_factor.
+        
+        Returns:
+            Buckling, or None if K is singular or the eigensolve failed
+        """
+        model = self._get_model()
+        table = model.material_table()
+        key = (model,) + tuple(table[k].tobytes() for k in ("E", "area", "inertia", "density"))
+        if self._buckling_key == key:
+            return self.buckling
+        
+        # A failed analysis is remembered as well, so it is not retried every frame
+        self.buckling = None
+        self._buckling_key = key
+        
+        props = model.section_properties(table)
+        free = model.free_dofs
+        try:
+            factorization = self._get_factorization(model, table)
+            U_dead = np.zeros(model.n_dof)
+            U_dead[free] = factorization.solve(self._load_vector(model, props, 0.0)[free])
+            axial, _, _ = self._member_end_forces(model, props, U_dead)
             
-            # Local Stiffness (Frame element)
-            k_local = np.array([
-                [A*E/L, 0, 0, -A*E/L, 0, 0],
-                [0, 12*E*I/L**3, 6*E*I/L**2, 0, -12*E*I/L**3, 6*E*I/L**2],
-                [0, 6*E*I/L**2, 4*E*I/L, 0, -6*E*I/L**2, 2*E*I/L],
-                [-A*E/L, 0, 0, A*E/L, 0, 0],
-                [0, -12*E*I/L**3, -6*E*I/L**2, 0, 12*E*I/L**3, -6*E*I/L**2],
-                [0, 6*E*I/L**2, 2*E*I/L, 0, -6*E*I/L**2, 4*E*I/L]
-            ])
+            K = model.assemble_stiffness(self._element_stiffness(model, table))
+            K_G = model.assemble_stiffness(geometric_stiffness(model, axial))
+            factor, phi = critical_load_factor(K, K_G, factorization, self.DENSE_DOF_LIMIT)
             
-            # Rotation Matrix
-            T = np.zeros((6, 6))
-            T[0,0] = c;  T[0,1] = s
-            T[1,0] = -s; T[1,1] = c
-            T[2,2] = 1
-            T[3,3] = c;  T[3,4] = s
-            T[4,3] = -s; T[4,4] = c
-            T[5,5] = 1
+            mode = None
+            if phi is not None:
+                mode = np.zeros(model.n_dof)
+                mode[free] = phi
             
-            k_global_beam = T.T @ k_local @ T
+            # Other states are bounded against every member at its Euler load
+            L = np.where(model.active, model.length, 1.0)
+            capacity = math.pi**2 * props["E"] * props["inertia"] / L**2 * self._active(model)
+            self.buckling = Buckling(model, factor, axial, mode, K, capacity,
+                                     factorization, self.DENSE_DOF_LIMIT)
+        except (np.linalg.LinAlgError, RuntimeError):
+            return None
+        return self.buckling
+
+    def build_influence(self, beams):
+        """
+        Enables influence mode for point loads on the given (walkable) beams.
+        
+        Precomputes the dead-load, thermal and unit nodal-load responses with
+        one multi-column solve. Afterwards solve() superposes point loads on
+        these beams from the stored responses without any linear solve. The
+        table is rebuilt automatically if the model or material values change.
+        
+        Returns:
+            True if the table is available, False if the system is singular
+            or the deck is too large to store (solve() then solves directly).
+        """
+        self.influence_beams = list(beams)
+        self.influence = None
+        model = self._get_model()
+        return self._get_influence(model, model.material_table()) is not None
+
+    def _solve_loads(self, factorization, rhs, panels=None):
+        """
+        factorization.solve() for load states: condensed panels are recovered
+        selectively (see _recovered_panels) and conjugate gradients are
+        warm-started from the recent load states (see IterativeSolver).
+        """
+        if panels is not None:
+            return factorization.solve(rhs, panels=panels)
+        if isinstance(factorization, IterativeSolver):
+            return factorization.solve(rhs, recycle=True)
+        return factorization.solve(rhs)
+
+    def _get_influence(self, model, table):
+        """Returns the current InfluenceTable, (re)building it if needed, or None."""
+        if self.influence_beams is None:
+            return None
+        if self.panels is not None and self.recovery_window is not None:
+            return None  # Selective recovery solves per frame instead
+        if self.iterative is not None and self.panels is None:
+            return None  # One cold CG per deck DOF; warm per-frame solves are cheaper
+        
+        key = (model,) + tuple(values.tobytes() for values in table.values())
+        if self.influence is not None and self.influence.key == key:
+            return self.influence
+        self.influence = None
+        
+        # Unit responses for the vertical force and moment DOFs of every deck node
+        deck_nodes = sorted({
+            model.node_index[node]
+            for beam in self.influence_beams if beam in model.beam_index
+            for node in (beam.node_a, beam.node_b)
+        })
+        dofs = np.array([3*i + k for i in deck_nodes for k in (1, 2)], dtype=int)
+        if len(dofs) * model.n_dof > self.INFLUENCE_MAX_ENTRIES:
+            return None
+        
+        reduced = model.dof_map[dofs]
+        free = reduced >= 0
+        n_cols = int(np.count_nonzero(free))
+        columns = {int(dof): -1 for dof in dofs}
+        for col, dof in enumerate(dofs[free]):
+            columns[int(dof)] = col
+        
+        # Right-hand sides: [dead load | unit ΔT | unit nodal loads...]
+        props = model.section_properties(table)
+        free_dofs = model.free_dofs
+        RHS = np.zeros((model.n_free, 2 + n_cols))
+        RHS[:, 0] = self._load_vector(model, props, 0.0)[free_dofs]
+        RHS[:, 1] = self._load_vector(model, props, 1.0, gravity=False)[free_dofs]
+        RHS[reduced[free], 2 + np.arange(n_cols)] = 1.0
+        
+        try:
+            U_reduced = self._get_factorization(model, table).solve(RHS)
+        except (np.linalg.LinAlgError, RuntimeError):
+            return None
+        
+        U = np.zeros((model.n_dof, RHS.shape[1]))
+        U[free_dofs] = U_reduced
+        axial, moment_a, moment_b = self._member_end_forces(model, props, U)
+        
+        # The unit-ΔT column also carries the free thermal strain
+        axial[:, 1] -= props["E"] * props["area"] * props["alpha"] * self._active(model)
+        F = np.stack([axial, moment_a, moment_b])
+        
+        self.influence = InfluenceTable(
+            key, columns,
+            U[:, 0], U[:, 1], U[:, 2:],
+            F[:, :, 0], F[:, :, 1], F[:, :, 2:]
+        )
+        return self.influence
+
+    def _load_vector(self, model, props, temperature, gravity=True):
+        """Global load vector from thermal strain and (optionally) self-weight."""
+        E = props["E"]
+        A = props["area"]
+        L = model.length
+        
+        # Element load vectors in global coordinates, shape (n_beams, 6)
+        f_elem = np.zeros((model.n_beams, 6))
+
+        # Thermal Load
+        if temperature != 0:
+            therm_strain = props["alpha"] * temperature
+            f_therm = -E * A * therm_strain
             
-            indices = [3*i, 3*i+1, 3*i+2, 3*j, 3*j+1, 3*j+2]
-            for r in range(6):
-                for c_idx in range(6):
-                    K_global[indices[r], indices[c_idx]] += k_global_beam[r, c_idx]
-
-            # Thermal Load
-            alpha = props["alpha"]
-            if temperature != 0:
-                therm_strain = alpha * temperature
-                f_therm = -E * A * therm_strain
-                
-                f_local_therm = np.array([-f_therm, 0, 0, f_therm, 0, 0])
-                f_global_therm = T.T @ f_local_therm
-                
-                for idx_k, global_idx in enumerate(indices):
-                    F_global[global_idx] -= f_global_therm[idx_k]
-
-        # 3. Loads (Gravity + Custom)
-        g = 9.81
-        for beam in beams:
-            props = MaterialManager.get_properties(beam.type, hollow_ratio=beam.hollow_ratio)
-            mass = props["area"] * beam.length * props["density"]
-            weight = mass * g
-            L = beam.length
+            # Local (-f, 0, 0, f, 0, 0) rotated to global: T^T @ f_local
+            f_therm = np.where(self._active(model), f_therm, 0.0)
+            f_elem[:, 0] += f_therm * model.cos
+            f_elem[:, 1] += f_therm * model.sin
+            f_elem[:, 3] -= f_therm * model.cos
+            f_elem[:, 4] -= f_therm * model.sin
+
+        # Gravity
+        if gravity:
+            weight = props["area"] * L * props["density"] * self.GRAVITY
             
             # GRAVITY: SUBTRACT weight (Gravity acts DOWN, Y is UP)
-            idx_a_y = node_map[beam.node_a] * 3 + 1
-            idx_b_y = node_map[beam.node_b] * 3 + 1
-            F_global[idx_a_y] -= weight / 2.0
-            F_global[idx_b_y] -= weight / 2.0
+            f_elem[:, 1] -= weight / 2.0
+            f_elem[:, 4] -= weight / 2.0
             
-            # ADDED: Fixed-end moments from uniformly distributed self-weight
-            # For uniformly distributed load w (N/m): M_FEM = ± wL²/12
-            # This improves accuracy for long beams
-            if L > 1e-6:
-                w = weight / L  # Distributed load (N/m)
-                M_fem_gravity = (w * L**2) / 12.0
-                
-                idx_a_theta = node_map[beam.node_a] * 3 + 2
-                idx_b_theta = node_map[beam.node_b] * 3 + 2
-                
-                # Apply moments (CCW at A, CW at B)
-                F_global[idx_a_theta] -= M_fem_gravity
-                F_global[idx_b_theta] += M_fem_gravity
-        
-        # Point Load (Agent)
-        if point_load:
-            # {beam: (t, mass)}
-            for beam, (t, mass) in point_load.items():
-                P = mass * g
-                L = beam.length
-                
-                # Parameters for position
-                a = t * L
-                b = (1.0 - t) * L
-                
-                # --- Fixed End Moments & Reaction Forces (Exact Formulas) ---
-                # These ensure correct stress even when nodes are FIXED
-                
-                # Vertical Reaction Forces (Standard Fixed-Fixed Beam formulas)
-                # These act UP on the beam, so equivalent nodal loads act DOWN (-)
-                R_a = (P * b**2 * (3*a + b)) / L**3
-                R_b = (P * a**2 * (a + 3*b)) / L**3
-                
-                # Fixed End Moments (Standard formulas)
-                # Load P is Down.
-                # Reaction at A is CCW (+). Equivalent Load on Node A is CW (-).
-                # Reaction at B is CW (-). Equivalent Load on Node B is CCW (+).
-                M_a = (P * a * b**2) / L**2
-                M_b = (P * a**2 * b) / L**2
-                
-                # Apply to Global Force Vector (Signs inverted for Equivalent Nodal Loads)
-                idx_a = node_map[beam.node_a] * 3
-                idx_b = node_map[beam.node_b] * 3
+            # Fixed-end moments from uniformly distributed self-weight
+            # For uniformly distributed load w (N/m): M_FEM = ± wL²/12 = ± WL/12
+            # Applied CCW at A, CW at B (removed beams only hang on their nodes)
+            M_fem_gravity = np.where(self._active(model), weight * L / 12.0, 0.0)
+            f_elem[:, 2] -= M_fem_gravity
+            f_elem[:, 5] += M_fem_gravity
+        
+        return model.scatter_loads(f_elem)
+
+    def _point_load_fem(self, length, t, mass):
+        """
+        Reactions and fixed-end moments of a point load on a fixed-fixed beam.
+        
+        Works elementwise on arrays of lengths, positions and masses as well.
+        
+        Returns:
+            (R_a, R_b, M_a, M_b), all positive for a downward load
+        """
+        P = mass * self.GRAVITY
+        L = length
+        
+        # Parameters for position
+        a = t * L
+        b = (1.0 - t) * L
+        
+        # --- Fixed End Moments & Reaction Forces (Exact Formulas) ---
+        # These ensure correct stress even when nodes are FIXED
+        
+        # Vertical Reaction Forces (Standard Fixed-Fixed Beam formulas)
+        # These act UP on the beam, so equivalent nodal loads act DOWN (-)
+        R_a = (P * b**2 * (3*a + b)) / L**3
+        R_b = (P * a**2 * (a + 3*b)) / L**3
+        
+        # Fixed End Moments (Standard formulas)
+        # Load P is Down.
+        # Reaction at A is CCW (+). Equivalent Load on Node A is CW (-).
+        # Reaction at B is CW (-). Equivalent Load on Node B is CCW (+).
+        M_a = (P * a * b**2) / L**2
+        M_b = (P * a**2 * b) / L**2
+        
+        return R_a, R_b, M_a, M_b
+
+    def _point_load_vectors(self, model, point_load):
+        """
+        Equivalent nodal loads and fixed-end moments of all point loads at once.
+        
+        Args:
+            point_load: {beam: (t, mass)}, list of (beam, t, mass) or None
+                        (see point_load_items)
+        
+        Returns:
+            (dofs, values, loads): equivalent nodal loads as global DOFs and
+            values (DOFs repeat when loads share a node, so they are added
+            with np.add.at), and loads = (beam index, t, mass, fem_a, fem_b)
+            arrays of the carried loads with their internal fixed-end
+            moments for post-processing
+        """
+        items = point_load_items(point_load)
+        loaded = np.array([model.beam_index[beam] for beam, _, _ in items], dtype=int)
+        t = np.array([t for _, t, _ in items], dtype=float)
+        mass = np.array([mass for _, _, mass in items], dtype=float)
+        
+        # Degenerate, floating and removed beams carry no load
+        carried = self._active(model)[loaded]
+        loaded, t, mass = loaded[carried], t[carried], mass[carried]
+        
+        R_a, R_b, M_a, M_b = self._point_load_fem(model.length[loaded], t, mass)
+        idx_a = 3 * model.conn[loaded, 0]
+        idx_b = 3 * model.conn[loaded, 1]
+        
+        # Signs inverted for Equivalent Nodal Loads:
+        # Vertical Load (Y-axis is index +1)
+        # Moment Load (Theta-axis is index +2)
+        # Reaction A is CCW (+), so Eq Load is CW (-)
+        # Reaction B is CW (-), so Eq Load is CCW (+)
+        dofs = np.concatenate([idx_a + 1, idx_b + 1, idx_a + 2, idx_b + 2])
+        values = np.concatenate([-R_a, -R_b, -M_a, M_b])
+        
+        # The FEMs are added back during stress calculation as internal
+        # moments (reaction direction):
+        # Total Moment = Moment_from_Nodes + Moment_Fixed_End
+        return dofs, values, (loaded, t, mass, M_a, -M_b)
+
+    def _member_end_forces(self, model, props, U, temperature=0.0):
+        """
+        Axial forces and end moments of all beams from global displacements.
+        
+        This is a linear map of U (plus the thermal term), so it also works on
+        a matrix of displacement columns, shape (n_dof, m).
+        
+        Returns:
+            (axial, moment_a, moment_b), each of shape (n_beams,) or (n_beams, m)
+        """
+        # Local displacements of every element
+        u_elem = U[model.element_dofs]
+        u_local = np.einsum("nij,nj...->ni...", model.T, u_elem)
+        
+        shape = (-1,) + (1,) * (u_local.ndim - 2)
+        active = self._active(model).reshape(shape)
+        L = np.where(model.active, model.length, 1.0).reshape(shape)
+        E = props["E"].reshape(shape)
+        A = props["area"].reshape(shape)
+        I = props["inertia"].reshape(shape)
+        
+        # Axial Force (N = AE/L * delta_u_x)
+        axial_strain = (u_local[:, 3] - u_local[:, 0]) / L
+        therm_strain = props["alpha"].reshape(shape) * temperature
+        axial = np.where(active, E * A * (axial_strain - therm_strain), 0.0)
+        
+        # Bending Moment (Slope Deflection Equations)
+        # M_ab = 2EI/L * (2*theta_a + theta_b - 3*psi)
+        theta_a = u_local[:, 2]
+        theta_b = u_local[:, 5]
+        relative_disp = (u_local[:, 4] - u_local[:, 1]) / L # psi
+        
+        moment_a = np.where(active, (2*E*I/L) * (2*theta_a + theta_b - 3*relative_disp), 0.0)
+        moment_b = np.where(active, (2*E*I/L) * (2*theta_b + theta_a - 3*relative_disp), 0.0)
+        
+        return axial, moment_a, moment_b
+
+    def solve(self, temperature=0.0, point_load=None, nonlinear=False):
+        """
+        Solves for the current load state and publishes it as self.current.
+        
+        Args:
+            temperature: Temperature change ΔT (°C)
+            point_load: {beam: (t, mass)} or a list of (beam, t, mass)
+                        (several loads per beam allowed), or None
+            nonlinear: Include P-delta effects (geometric stiffness of the
+                       axial forces); see solvers.nonlinear. Iteration count
+                       and residual are reported in nonlinear_info.
+        
+        Returns:
+            True on success, False with error_msg set otherwise
+        """
+        self.current = None
+        self.recovery = None
+        
+        # 1. Degrees of Freedom (numbering and fixed-DOF elimination live in the model)
+        model = self._get_model()
+
+        # 2. Material/section properties (the stiffness matrix itself is
+        # assembled and factorized lazily in step 5)
+        table = model.material_table()
+        props = model.section_properties(table)
+
+        # 3. Point Loads (agents) as equivalent nodal loads
+        load_dofs, load_values, loads = self._point_load_vectors(model, point_load)
+
+        influence = None if nonlinear else self._get_influence(model, table)
+        if influence is not None and influence.covers(load_dofs):
+            # 4-5. Influence mode: superpose precomputed responses, no solve
+            U_global, axial, moment_a, moment_b = influence.combine(temperature, load_dofs,
+                                                                    load_values)
+        else:
+            # 4. Load vector (Thermal + Gravity + Point Loads)
+            F_global = self._load_vector(model, props, temperature)
+            np.add.at(F_global, load_dofs, load_values)
+            
+            if nonlinear:
+                # 5. Modified Newton on the P-delta equilibrium
+                try:
+                    analysis = self._get_pdelta(model, table)
+                    U_global, axial, moment_a, moment_b = analysis.solve(
+                        F_global,
+                        lambda U: self._member_end_forces(model, props, U, temperature)
+                    )
+                except (np.linalg.LinAlgError, RuntimeError):
+                    self.error_msg = "Instabil: Kihajlás (P-Delta)"
+                    return False
+                finally:
+                    if self.pdelta is not None:
+                        self.nonlinear_info = {
+                            "iterations": self.pdelta.iterations,
+                            "residual": self.pdelta.residual,
+                            "refactorizations": self.pdelta.refactorizations,
+                        }
+            else:
+                # Boundary Conditions (fixed DOFs were already dropped from K)
+                F_reduced = F_global[model.free_dofs]
                 
-                # Vertical Load (Y-axis is index +1)
-                F_global[idx_a + 1] -= R_a
-                F_global[idx_b + 1] -= R_b
+                # 5. Solve (reuses the cached factorization when K is unchanged)
+                try:
+                    factorization = self._get_factorization(model, table)
+                    recovered = self._recovered_panels(model, factorization, loads[0])
+                    U_reduced = self._solve_loads(factorization, F_reduced, recovered)
+                except (np.linalg.LinAlgError, RuntimeError):
+                    self.error_msg = "Instabil: Szinguláris Mátrix"
+                    return False 
                 
-                # Moment Load (Theta-axis is index +2)
-                # Reaction A is CCW (+), so Eq Load is CW (-)
-                F_global[idx_a + 2] -= M_a 
-                # Reaction B is CW (-), so Eq Load is CCW (+)
-                F_global[idx_b + 2] += M_b 
+                U_global = np.zeros(model.n_dof)
+                U_global[model.free_dofs] = U_reduced
+                axial, moment_a, moment_b = self._member_end_forces(model, props, U_global, temperature)
                 
-                # Store these FEMs to add them back during stress calculation
-                # (Superposition: Total Moment = Moment_from_Nodes + Moment_Fixed_End)
-                beam_fem_loads[beam] = (M_a, -M_b) # Store as Internal Moments (Reaction direction)
+                if recovered is not None:
+                    # Skipped panels have no interior displacements, so their
+                    # end forces would be wrong; they are left out instead
+                    skipped = factorization.skipped_beams(recovered)
+                    axial[skipped] = 0.0
+                    moment_a[skipped] = 0.0
+                    moment_b[skipped] = 0.0
+                    self.recovery = (len(recovered), factorization.n_panels)
+        
+        self._post_process(model, props, U_global, axial, moment_a, moment_b, loads)
+        return True
 
-        # 4. Boundary Conditions
-        fixed_dofs = []
-        for i, node in enumerate(nodes):
-            if node.fixed:
-                fixed_dofs.extend([3*i, 3*i+1, 3*i+2])
+    def solve_dynamic(self, dt, temperature=0.0, point_load=None):
+        """
+        Advances the transient analysis by dt seconds and publishes the state
+        at the end as self.current.
+        
+        The structure has lumped masses (self-weight of the beams) and
+        Rayleigh damping; the loads are the same as in solve() and are held
+        constant over the frame. Inertia lets a moving agent excite the
+        bridge, so stresses can overshoot the static values. Time is
+        integrated in fixed steps of DYNAMIC_DT (see solvers.dynamic).
         
-        free_dofs = [x for x in range(dof) if x not in fixed_dofs]
+        Returns:
+            True on success, False with error_msg set otherwise
+        """
+        self.current = None
+        model = self._get_model()
+        table = model.material_table()
+        props = model.section_properties(table)
         
-        K_reduced = K_global[np.ix_(free_dofs, free_dofs)]
-        F_reduced = F_global[free_dofs]
+        load_dofs, load_values, loads = self._point_load_vectors(model, point_load)
+        F_global = self._load_vector(model, props, temperature)
+        np.add.at(F_global, load_dofs, load_values)
         
-        # 5. Solve
         try:
-            U_reduced = np.linalg.solve(K_reduced, F_reduced)
-        except np.linalg.LinAlgError:
+            integrator = self._get_dynamic(model, table, F_global)
+            integrator.advance(dt, F_global[model.free_dofs])
+        except (np.linalg.LinAlgError, RuntimeError):
             self.error_msg = "Instabil: Szinguláris Mátrix"
-            return False 
+            return False
         
-        U_global = np.zeros(dof)
-        U_global[free_dofs] = U_reduced
+        if not np.all(np.isfinite(integrator.u)):
+            self.dynamic = None
+            self.error_msg = "Instabil: Szinguláris Mátrix"
+            return False
         
-        # --- POST PROCESSING ---
-        for i, node in enumerate(nodes):
-            self.displacements[node] = (U_global[3*i], U_global[3*i+1], U_global[3*i+2])
+        U_global = np.zeros(model.n_dof)
+        U_global[model.free_dofs] = integrator.u
+        axial, moment_a, moment_b = self._member_end_forces(model, props, U_global, temperature)
+        self._post_process(model, props, U_global, axial, moment_a, moment_b, loads)
+        return True
 
-        for beam in beams:
-            i = node_map[beam.node_a]
-            j = node_map[beam.node_b]
+    def solve_many(self, load_cases):
+        """
+        Solves several load cases with one factorization and one multi-column
+        substitution. Does not change the current result.
+        
+        Args:
+            load_cases: List of dicts with the optional keys
+                "temperature"  temperature change ΔT (°C), default 0.0
+                "point_load"   as in solve(), default None
+                "load_scale"   factor on the point-load masses, default 1.0
+                "gravity"      factor on the self-weight, default 1.0
+        
+        Returns:
+            ResultBatch with one row per load case, or None if the system is
+            singular (error_msg is set as in solve()).
+        """
+        model = self._get_model()
+        table = model.material_table()
+        props = model.section_properties(table)
+        n_cases = len(load_cases)
+        
+        temperatures = np.array([case.get("temperature", 0.0) for case in load_cases], dtype=float)
+        gravity = np.array([case.get("gravity", 1.0) for case in load_cases], dtype=float)
+        
+        # Self-weight and thermal loads are linear in their factors
+        F_dead = self._load_vector(model, props, 0.0)
+        F_therm = self._load_vector(model, props, 1.0, gravity=False)
+        F_global = np.outer(F_dead, gravity) + np.outer(F_therm, temperatures)
+        
+        case_loads = []
+        for i, case in enumerate(load_cases):
+            scale = case.get("load_scale", 1.0)
+            point_load = point_load_items(case.get("point_load"))
+            if scale != 1.0:
+                point_load = [(beam, t, mass * scale) for beam, t, mass in point_load]
+            load_dofs, load_values, loads = self._point_load_vectors(model, point_load)
+            np.add.at(F_global[:, i], load_dofs, load_values)
+            case_loads.append(loads)
+        
+        try:
+            U_reduced = self._solve_loads(self._get_factorization(model, table),
+                                          F_global[model.free_dofs])
+        except (np.linalg.LinAlgError, RuntimeError):
+            self.error_msg = "Instabil: Szinguláris Mátrix"
+            return None
+        
+        U_global = np.zeros((model.n_dof, n_cases))
+        U_global[model.free_dofs] = U_reduced
+        axial, moment_a, moment_b = self._member_end_forces(model, props, U_global)
+        axial -= np.outer(props["E"] * props["area"] * props["alpha"] * self._active(model), temperatures)
+        
+        moment = np.zeros((n_cases, model.n_beams))
+        stress_ratio = np.zeros((n_cases, model.n_beams))
+        for i in range(n_cases):
+            moment[i], stress_ratio[i] = self._evaluate_members(
+                model, props, axial[:, i], moment_a[:, i], moment_b[:, i], case_loads[i]
+            )
+        
+        return ResultBatch(model, U_global.T, axial.T, moment, stress_ratio)
+
+    def moving_load_envelope(self, beams, mass, temperature=0.0, samples=None, lock=None):
+        """
+        Sweeps a point load over every walkable beam and collects, per beam,
+        the extreme forces and stress ratio and the position that governs.
+        
+        A point load only enters the system as equivalent nodal loads on the
+        end nodes of its beam, so every position is a combination of the
+        responses to unit loads at the deck nodes. Those come from one
+        multi-column solve (split into column chunks on large decks) and
+        positions are then evaluated as arrays, without further solves.
+        
+        The forces are affine in the load's mass, so every stress ratio is
+        a maximum of affine functions of it and the mass at which it reaches
+        1.0 has a closed form (see _crossing_mass). Global buckling is rated
+        once per envelope rather than per position: Buckling.worst_position()
+        for the load's mass and Buckling.buckling_mass() for the safe mass,
+        both from the live load's eigenproblem on the few positions whose
+        bounds can govern.
+        
+        Args:
+            beams: Walkable beams
+            mass: Load mass of the envelope (kg)
+            temperature: Temperature change ΔT (°C)
+            samples: Positions per beam, ends included (default ENVELOPE_SAMPLES)
+            lock: Context held while the solver's state is used (the model,
+                  the factorization and the unit-load solves), not for the
+                  sweep, so a background envelope does not hold up the
+                  SolverWorker for long
+        
+        Returns:
+            Envelope, or None with error_msg set if the system is singular
+        """
+        samples = self.ENVELOPE_SAMPLES if samples is None else samples
+        
+        # The solver's own state (model, factorization, buckling analysis) is
+        # only used up to the unit-load forces; the sweep runs without lock
+        with lock if lock is not None else contextlib.nullcontext():
+            model = self._get_model()
+            table = model.material_table()
+            props = model.section_properties(table)
             
-            u_elem = np.concatenate((U_global[3*i:3*i+3], U_global[3*j:3*j+3]))
+            walk_beams = [b for b in beams if b in model.beam_index and self._active(model)[model.beam_index[b]]]
+            walk = np.repeat(np.array([model.beam_index[b] for b in walk_beams], dtype=int), samples)
+            t_samples = np.linspace(0.0, 1.0, samples)
+            t = np.tile(t_samples, len(walk_beams))
+            positions = [(beam, float(tk)) for beam in walk_beams for tk in t_samples]
             
-            dx = beam.node_b.x - beam.node_a.x
-            dy = beam.node_b.y - beam.node_a.y
-            L = math.sqrt(dx*dx + dy*dy)
-            c = dx/L; s = dy/L
+            # Equivalent nodal loads of a unit mass at every position
+            L = model.length[walk]
+            R_a, R_b, M_a, M_b = self._point_load_fem(L, t, 1.0)
+            ends = 3 * model.conn[walk]
+            load_dofs = np.stack([ends[:, 0] + 1, ends[:, 0] + 2, ends[:, 1] + 1, ends[:, 1] + 2], axis=1)
+            weights = np.stack([-R_a, -M_a, -R_b, M_b], axis=1)
+            unique_dofs, columns = np.unique(load_dofs, return_inverse=True)
+            columns = columns.reshape(-1, 4)
             
-            props = MaterialManager.get_properties(beam.type, hollow_ratio=beam.hollow_ratio)
-            E = props["E"]
-            A = props["area"]
-            I = props["inertia"]
-
-            # Local displacements
-            T = np.zeros((6, 6))
-            T[0,0] = c;  T[0,1] = s
-            T[1,0] = -s; T[1,1] = c
-            T[2,2] = 1
-            T[3,3] = c;  T[3,4] = s
-            T[4,3] = -s; T[4,4] = c
-            T[5,5] = 1
+            # End forces of the dead/thermal state (column 0) and of unit loads
+            n_cols = 1 + len(unique_dofs)
+            forces = np.zeros((3, model.n_beams, n_cols))
+            step = max(1, self.INFLUENCE_MAX_ENTRIES // max(model.n_dof, 1))
+            F_base = self._load_vector(model, props, temperature)
+            try:
+                factorization = self._get_factorization(model, table)
+                for start in range(0, n_cols, step):
+                    stop = min(start + step, n_cols)
+                    RHS = np.zeros((model.n_dof, stop - start))
+                    if start == 0:
+                        RHS[:, 0] = F_base
+                    cols = np.arange(max(start, 1), stop)
+                    RHS[unique_dofs[cols - 1], cols - start] = 1.0
+                
+                    U = np.zeros_like(RHS)
+                    U[model.free_dofs] = factorization.solve(RHS[model.free_dofs])
+                    forces[:, :, start:stop] = self._member_end_forces(model, props, U)
+            except (np.linalg.LinAlgError, RuntimeError):
+                self.error_msg = "Instabil: Szinguláris Mátrix"
+                return None
             
-            u_local = T @ u_elem
+            # The base column also carries the free thermal strain
+            forces[0, :, 0] -= props["E"] * props["area"] * props["alpha"] * temperature * self._active(model)
+            base, unit = forces[:, :, 0], forces[:, :, 1:]
             
-            # Axial Force (N = AE/L * delta_u_x)
-            axial_strain = (u_local[3] - u_local[0]) / L
-            therm_strain = props["alpha"] * temperature
-            mech_strain = axial_strain - therm_strain
-            axial_force = E * A * mech_strain
+            # Highest ratio without the load (the same for every position)
+            dead_ratio = self._stress_ratio(
+                model, props, base[0], np.maximum(np.abs(base[1]), np.abs(base[2]))
+            ).max(initial=0.0)
             
-            # Bending Moment (Slope Deflection Equations)
-            # M_ab = 2EI/L * (2*theta_a + theta_b - 3*psi)
-            theta_a = u_local[2]
-            theta_b = u_local[5]
-            relative_disp = (u_local[4] - u_local[1]) / L # psi
+            # Rated beside the solver from here on, on a copy of its own
+            buckling = self.buckling_analysis() if len(walk) else None
+            if buckling is not None:
+                buckling = buckling.detached()
+        
+        # Stress ratio per unit axial force, bending moment and compression
+        # (yield and member buckling, as in _stress_ratio)
+        L_beam = np.where(model.active, model.length, 1.0)
+        per_axial = 1.0 / (props["area"] * props["strength"])
+        per_moment = props["thickness"] / 2 / (props["inertia"] * props["strength"])
+        per_compression = L_beam**2 / (math.pi**2 * props["E"] * props["inertia"])
+        
+        def per_kg(f, p):
+            """End force f (0: axial, 1/2: moment at a/b) per kg of the load at positions p."""
+            return sum(unit[f][:, columns[p, k]] * weights[p, k] for k in range(4))
+        
+        # Positions are evaluated in chunks of about ENVELOPE_CHUNK_ENTRIES
+        # values, at most ENVELOPE_MAX_CHUNKS of them
+        chunk = max(self.ENVELOPE_CHUNK_ENTRIES // max(model.n_beams, 1),
+                    -(-len(walk) // self.ENVELOPE_MAX_CHUNKS), 1)
+        chunks = [np.arange(start, min(start + chunk, len(walk)))
+                  for start in range(0, len(walk), chunk)]
+        
+        # Global buckling is rated once, at the worst position (found from
+        # bounds of all of them, see Buckling.load_bounds), and shared by
+        # every position
+        rating = None
+        if buckling is not None:
+            bounds = buckling.load_bounds(unit[0], weights, columns)
+            live = lambda p: unit[0][:, columns[p]] @ weights[p]
+            frame_ratio, drives, worst = buckling.worst_position(base[0], live, bounds, float(mass))
+            rating = (1.0 / frame_ratio if frame_ratio > 0 else np.inf), drives[:, None]
+        
+        axial_max = np.full(model.n_beams, -np.inf)
+        axial_min = np.full(model.n_beams, np.inf)
+        moment_max = np.zeros(model.n_beams)
+        ratio_max = np.full(model.n_beams, -np.inf)
+        governing = np.zeros(model.n_beams, dtype=int)
+        crossing = np.zeros(len(walk))
+        
+        for p in chunks:
+            # Forces c + d·m per beam and position, d including the load's
+            # own fixed-end moments on its beam
+            d_axial, d_a, d_b = (per_kg(f, p) for f in range(3))
+            loaded = (walk[p], np.arange(len(p)))
+            d_a[loaded] += M_a[p]
+            d_b[loaded] -= M_b[p]
+            c_axial, c_a, c_b = (base[f][:, None] for f in range(3))
             
-            moment_a = (2*E*I/L) * (2*theta_a + theta_b - 3*relative_disp)
-            moment_b = (2*E*I/L) * (2*theta_b + theta_a - 3*relative_disp)
+            # Moment under the load: the line between the end moments plus
+            # the simply supported P·a·b/L
+            tp = t[p]
+            c_load = c_a[walk[p], 0] * (1 - tp) + c_b[walk[p], 0] * tp
+            d_load = d_a[loaded] * (1 - tp) + d_b[loaded] * tp + self.GRAVITY * tp * (1 - tp) * L[p]
             
-            # --- Superposition of Fixed End Moments ---
-            # If there is a point load, we must add the "Local" moments to the "Nodal" moments.
-            # Otherwise, a fixed-fixed beam shows 0 stress.
-            if beam in beam_fem_loads:
-                fem_a, fem_b = beam_fem_loads[beam]
-                moment_a += fem_a
-                moment_b += fem_b
-                
-                # --- Calculate moment at load point ---
-                # The maximum moment often occurs AT the load, not at the ends.
-                # Using shear force equilibrium to find the exact moment at load location.
-                t, mass = point_load[beam]
-                P = mass * g
-                a = t * L
-                b = (1 - t) * L
-                
-                # Shear force at left end from equilibrium: V_A = P*b/L + (M_B - M_A)/L
-                V_a = (P * b / L) + (moment_b - moment_a) / L
-                
-                # Moment at load point (distance 'a' from node_a): M = M_A + V_A * a
-                moment_at_load = moment_a + V_a * a
-                
-                # Use maximum of all three critical points
-                max_moment = max(abs(moment_a), abs(moment_b), abs(moment_at_load))
-            else:
-                # No point load on this beam - only check end moments
-                max_moment = max(abs(moment_a), abs(moment_b))
+            # Envelope of the given mass
+            axial = c_axial + mass * d_axial
+            max_moment = np.maximum(np.abs(c_a + mass * d_a), np.abs(c_b + mass * d_b))
+            max_moment[loaded] = np.maximum(max_moment[loaded], np.abs(c_load + mass * d_load))
+            ratio = self._stress_ratio(model, props, axial, max_moment, rating)
+            axial_max = np.maximum(axial_max, axial.max(axis=1))
+            axial_min = np.minimum(axial_min, axial.min(axis=1))
+            moment_max = np.maximum(moment_max, max_moment.max(axis=1))
+            best = ratio.argmax(axis=1)
+            better = ratio[np.arange(model.n_beams), best] > ratio_max
+            ratio_max = np.where(better, ratio[np.arange(model.n_beams), best], ratio_max)
+            governing = np.where(better, p[best], governing)
             
-            # --- STRESS CALCULATION (FIXED: Physically Accurate Combination) ---
-            # Calculate stresses at extreme fibers
-            sigma_axial = axial_force / A
-            sigma_bend = max_moment * (props["thickness"]/2) / I
+            if dead_ratio >= 1.0:
+                continue
             
-            # CORRECTED: Stress combines differently on top vs. bottom fiber
-            # Top fiber: σ_axial + σ_bending
-            # Bottom fiber: σ_axial - σ_bending
-            # Take maximum of both
-            stress_top_fiber = abs(sigma_axial + sigma_bend)
-            stress_bottom_fiber = abs(sigma_axial - sigma_bend)
-            max_stress = max(stress_top_fiber, stress_bottom_fiber)
+            # Mass at which yield (at both ends and under the load) or
+            # member buckling reaches 1.0
+            s_axial, s_moment, s_compression = (
+                x[:, None] for x in (per_axial, per_moment, per_compression))
+            u = (c_axial * s_axial, d_axial * s_axial)
+            at_ends = self._crossing_mass(
+                self._yield_pieces(u, (c_a * s_moment, d_a * s_moment))
+                + self._yield_pieces(u, (c_b * s_moment, d_b * s_moment))
+                + [(-c_axial * s_compression, -d_axial * s_compression)]
+            )
+            w = walk[p]
+            under_load = self._crossing_mass(self._yield_pieces(
+                (c_axial[w, 0] * per_axial[w], d_axial[loaded] * per_axial[w]),
+                (c_load * per_moment[w], d_load * per_moment[w])
+            ))
+            crossing[p] = np.minimum(at_ends.min(axis=0, initial=np.inf), under_load)
+        
+        if rating is not None:
+            # Members driving the mode share the frame's ratio at every
+            # position; the worst one governs them where that ratio does
+            governing[drives & (ratio_max == min(frame_ratio, 1.0))] = worst
+        
+        crossing[crossing > self.SAFE_MASS_LIMIT] = np.inf
+        if dead_ratio >= 1.0:
+            crossing[:] = 0.0
+        
+        if len(walk):
+            critical = int(np.argmin(crossing))
+            safe_mass = float(crossing[critical])
+            if buckling is not None and dead_ratio < 1.0:
+                buckled, position = buckling.buckling_mass(
+                    base[0], live, bounds, min(safe_mass, self.SAFE_MASS_LIMIT))
+                if buckled < safe_mass:
+                    safe_mass, critical = max(float(buckled), 0.0), int(position)
+            if not np.isfinite(safe_mass):
+                critical = -1
+        else:
+            critical, safe_mass = -1, np.inf
+            axial_max[:] = axial_min[:] = 0.0
+            ratio_max[:] = 0.0
+        
+        return Envelope(model, positions, mass, axial_max, axial_min, moment_max,
+                        ratio_max, governing, safe_mass, critical)
+
+    def _crossing_mass(self, pieces):
+        """
+        Mass at which the largest of affine ratios c + d·m reaches 1.0.
+        
+        All of them are below 1.0 without the load, so the largest one
+        reaches 1.0 where the first of the rising ones does: the smallest
+        (1 - c) / d with d > 0.
+        
+        Args:
+            pieces: List of (c, d) array pairs of one shape
+        
+        Returns:
+            Array of that shape, inf where none rises
+        """
+        crossing = np.inf
+        for c, d in pieces:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                crossing = np.minimum(crossing, np.where(d > 0, (1.0 - c) / d, np.inf))
+        return crossing
+
+    def _yield_pieces(self, axial, bending):
+        """
+        Affine pieces of a yield ratio |u| + |v| (see _stress_ratio) from
+        its axial and bending parts, each a (c, d) pair: the four ±u ± v.
+        """
+        return [(s * axial[0] + r * bending[0], s * axial[1] + r * bending[1])
+                for s in (1, -1) for r in (1, -1)]
+
+    def _post_process(self, model, props, U_global, axial, moment_a, moment_b, loads):
+        """Evaluates every beam and publishes the arrays as the current ResultSet."""
+        max_moment, stress_ratio = self._evaluate_members(
+            model, props, axial, moment_a, moment_b, loads
+        )
+        buckling = self.buckling_analysis()
+        factor = buckling.factor_for(axial) if buckling is not None else np.inf
+        self.current = ResultSet(model, U_global, axial, max_moment, stress_ratio, factor)
+
+    def _evaluate_members(self, model, props, axial, moment_a, moment_b, loads):
+        """
+        Governing bending moment and stress ratio of every beam.
+        
+        Args:
+            axial, moment_a, moment_b: Nodal end forces from _member_end_forces()
+            loads: (beam index, t, mass, fem_a, fem_b) from _point_load_vectors()
+        
+        Returns:
+            (max_moment, stress_ratio), arrays of shape (n_beams,)
+        """
+        max_moment = self._governing_moment(model, moment_a, moment_b, *loads)
+        return max_moment, self._stress_ratio(model, props, axial, max_moment)
+
+    def _governing_moment(self, model, moment_a, moment_b, loaded, t, mass, fem_a, fem_b,
+                          cases=None):
+        """
+        Largest bending moment of every beam, at its ends or under a point load.
+        
+        A beam may carry several point loads; the moment under each one
+        includes all loads of its beam (and load case).
+        
+        Args:
+            moment_a, moment_b: Nodal end moments, shape (n_beams,) or (n_beams, m)
+            loaded: Beam index of each point load
+            t, mass: Position and mass of each point load
+            fem_a, fem_b: Internal fixed-end moments of each point load
+            cases: Column of each point load when the moments have m columns
+        
+        Returns:
+            Array with the shape of moment_a
+        """
+        L = np.where(model.active, model.length, 1.0)
+        at = loaded if cases is None else (loaded, cases)
+        
+        # --- Superposition of Fixed End Moments ---
+        # If there is a point load, we must add the "Local" moments to the "Nodal" moments.
+        # Otherwise, a fixed-fixed beam shows 0 stress.
+        moment_a = np.array(moment_a, dtype=float)
+        moment_b = np.array(moment_b, dtype=float)
+        if len(loaded):
+            np.add.at(moment_a, at, fem_a)
+            np.add.at(moment_b, at, fem_b)
+        
+        # No point load on a beam - only its end moments matter
+        max_moment = np.maximum(np.abs(moment_a), np.abs(moment_b))
+        
+        if len(loaded):
+            # --- Calculate moment at load point ---
+            # The maximum moment often occurs AT the load, not at the ends.
+            # Using shear force equilibrium to find the exact moment at load location.
+            P = mass * self.GRAVITY
+            L_k = L[loaded]
+            a = t * L_k
+            b = (1 - t) * L_k
+            M_a = moment_a[at]
+            M_b = moment_b[at]
             
-            # Base ratio based on material strength
-            stress_ratio_yield = max_stress / props["strength"]
+            # Loads sharing a beam (and load case) form a group
+            group = loaded if cases is None else loaded * moment_a.shape[1] + cases
             
-            # Initialize final ratio
-            final_stress_ratio = stress_ratio_yield
-
-            # --- BUCKLING CHECK (Stability based) ---
-            if axial_force < 0:  # Compression
-                # Effective length factor K:
-                # K=1.0: Pinned-Pinned (conservative assumption used here)
-                # K=0.5: Fixed-Fixed (would be 4× stronger, but requires complex analysis)
-                # K=0.7: Fixed-Pinned
-                # We use K=1.0 for safety - this slightly underestimates buckling capacity
-                K = 1.0
-                
-                # Euler Buckling Formula: P_cr = (π² × E × I) / (K × L)²
-                P_cr = (math.pi**2 * E * I) / ((K*L)**2)
-                
-                # Calculate how close we are to buckling (0.0 to 1.0+)
-                buckling_ratio = abs(axial_force) / P_cr
-                
-                # The beam fails from whichever factor is higher
-                final_stress_ratio = max(stress_ratio_yield, buckling_ratio)
-                
-                # Instant failure if buckling limit exceeded
-                if buckling_ratio > 1.0:
-                    final_stress_ratio = 1.0
-
-            # Store the result
-            self.results[beam] = axial_force
-            self.bending_results[beam] = max_moment 
-            self.stress_ratios[beam] = final_stress_ratio
+            # Shear force at left end from equilibrium:
+            # V_A = sum(P*b)/L + (M_B - M_A)/L over the group's loads
+            Pb = np.zeros(moment_a.size)
+            np.add.at(Pb, group, P * b)
+            V_a = Pb[group] / L_k + (M_b - M_a) / L_k
+            
+            # Loads left of each load bend the beam back: sum(P_i * (a - a_i))
+            order = np.lexsort((a, group))
+            P_s, a_s, g_s = P[order], a[order], group[order]
+            sum_P = np.cumsum(P_s) - P_s
+            sum_Pa = np.cumsum(P_s * a_s) - P_s * a_s
+            first = np.flatnonzero(np.r_[True, g_s[1:] != g_s[:-1]])
+            start = np.repeat(first, np.diff(np.r_[first, len(g_s)]))
+            left = np.empty_like(P)
+            left[order] = a_s * (sum_P - sum_P[start]) - (sum_Pa - sum_Pa[start])
+            
+            # Moment at load point (distance 'a' from node_a): M = M_A + V_A * a - left loads
+            moment_at_load = M_a + V_a * a - left
+            
+            # Use maximum of all critical points
+            np.maximum.at(max_moment, at, np.abs(moment_at_load))
+        
+        return max_moment
 
-        return True
\ No newline at end of file
+    def _stress_ratio(self, model, props, axial, max_moment, rating=None):
+        """
+        Stress ratio of every beam (yield, member buckling and global buckling).
+        
+        Args:
+            axial, max_moment: Shape (n_beams,) or (n_beams, m) for m load cases
+            rating: (factor, drives) of global buckling, drives broadcasting
+                    against axial (default: Buckling.rate() of axial)
+        
+        Returns:
+            Array with the shape of axial
+        """
+        shape = (-1,) + (1,) * (np.ndim(axial) - 1)
+        L = np.where(model.active, model.length, 1.0).reshape(shape)
+        E = props["E"].reshape(shape)
+        A = props["area"].reshape(shape)
+        I = props["inertia"].reshape(shape)
+        
+        # --- STRESS CALCULATION (FIXED: Physically Accurate Combination) ---
+        # Calculate stresses at extreme fibers
+        sigma_axial = axial / A
+        sigma_bend = max_moment * (props["thickness"].reshape(shape)/2) / I
+        
+        # CORRECTED: Stress combines differently on top vs. bottom fiber
+        # Top fiber: σ_axial + σ_bending
+        # Bottom fiber: σ_axial - σ_bending
+        # Take maximum of both
+        stress_top_fiber = np.abs(sigma_axial + sigma_bend)
+        stress_bottom_fiber = np.abs(sigma_axial - sigma_bend)
+        max_stress = np.maximum(stress_top_fiber, stress_bottom_fiber)
+        
+        # Base ratio based on material strength
+        stress_ratio_yield = max_stress / props["strength"].reshape(shape)
+        
+        # --- BUCKLING CHECK (Stability based) ---
+        # Effective length factor K:
+        # K=1.0: Pinned-Pinned (conservative assumption used here)
+        # K=0.5: Fixed-Fixed (would be 4× stronger, but requires complex analysis)
+        # K=0.7: Fixed-Pinned
+        # We use K=1.0 for safety - this slightly underestimates buckling capacity
+        # (each beam is a single element, so the global analysis below cannot
+        # resolve buckling between a member's own ends)
+        K = 1.0
+        
+        # Euler Buckling Formula: P_cr = (π² × E × I) / (K × L)²
+        P_cr = (math.pi**2 * E * I) / ((K*L)**2)
+        
+        # Calculate how close we are to buckling (0.0 to 1.0+), compression only
+        compression = axial < 0
+        buckling_ratio = np.where(compression, np.abs(axial) / P_cr, 0.0)
+        
+        # Global buckling (frame interaction): the compressed members that
+        # drive the lowest mode share the frame's ratio 1 / load factor
+        if rating is None:
+            buckling = self.buckling_analysis()
+            if buckling is not None:
+                rating = buckling.rate(axial)
+        if rating is not None:
+            factor, drives = rating
+            buckling_ratio = np.where(drives, np.maximum(buckling_ratio, 1.0 / factor),
+                                      buckling_ratio)
+        
+        # The beam fails from whichever factor is higher
+        final_stress_ratio = np.maximum(stress_ratio_yield, buckling_ratio)
+        
+        # Instant failure if buckling limit exceeded
+        final_stress_ratio[buckling_ratio > 1.0] = 1.0
+        
+        return final_stress_ratio
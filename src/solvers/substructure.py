@@ -0,0 +1,333 @@
+"""
+Static condensation of repeated panels (superelements).
+
+A panel is a group of beams. Nodes whose beams all belong to one panel are
+its interior; their DOFs are condensed out with a Schur complement, so the
+global system only contains the boundary DOFs shared between panels (and
+the DOFs of beams outside any panel):
+
+    S = K_bb - K_bi K_ii^-1 K_ib
+
+Panels with the same shape, materials and boundary layout share one
+condensed matrix, so a long periodic bridge factorizes a handful of small
+interior blocks plus one narrow boundary system.
+"""
+from collections import OrderedDict
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+from solvers.factorization import Factorization
+
+
+# Coordinates are compared on this grid (meters) when matching panels
+GRID = 1e-4
+
+# Condensed panels shared by all models, most recently used last
+CACHE_SIZE = 64
+_cache = OrderedDict()
+
+
+def find_period(model, min_match=0.9):
+    """
+    Smallest horizontal translation that maps the structure onto itself.
+
+    Args:
+        min_match: Fraction of the overlapping nodes that must coincide
+
+    Returns:
+        Period in meters, or None if the structure is not periodic
+    """
+    used = ~model.floating
+    if np.count_nonzero(used) < 4:
+        return None
+
+    q = np.round(model.xy[used] / GRID).astype(np.int64)
+    keys = np.sort(q[:, 0] * (1 << 32) + q[:, 1])
+    columns = np.unique(q[:, 0])
+    x_min, x_max = columns[0], columns[-1]
+
+    # At least two periods must fit for the match to mean anything
+    for shift in columns[1:] - x_min:
+        if 2 * shift > x_max - x_min:
+            break
+        overlap = q[:, 0] + shift <= x_max
+        shifted = (q[overlap, 0] + shift) * (1 << 32) + q[overlap, 1]
+        pos = np.minimum(np.searchsorted(keys, shifted), len(keys) - 1)
+        if np.mean(keys[pos] == shifted) >= min_match:
+            return float(shift * GRID)
+    return None
+
+
+def detect_panels(model, panel_nodes=60):
+    """
+    Cuts the structure into vertical slices of about panel_nodes nodes.
+
+    For periodic designs the slice width is a whole number of periods, so
+    all inner slices are identical and share one condensed matrix.
+
+    Returns:
+        List of beam index arrays, one per panel
+    """
+    beams = np.flatnonzero(model.active)
+    if len(beams) == 0:
+        return []
+
+    xs = model.xy[~model.floating, 0]
+    x0, span = xs.min(), xs.max() - xs.min()
+    if span <= 0:
+        return [beams]
+
+    nodes_per_meter = len(xs) / span
+    period = find_period(model)
+    if period is not None:
+        width = period * max(1, round(panel_nodes / (nodes_per_meter * period)))
+    else:
+        width = panel_nodes / nodes_per_meter
+
+    # Beams on a cut line belong to the panel on their right
+    mid_x = model.xy[model.conn[beams], 0].mean(axis=1)
+    labels = np.floor((mid_x - x0) / width + 1e-9).astype(int)
+    return [beams[labels == label] for label in np.unique(labels)]
+
+
+class CondensedFactorization:
+    """
+    Factorization of the reduced stiffness matrix with panel interiors
+    condensed out. Same interface as Factorization.
+
+    solve() condenses the interior loads onto the boundary, solves the
+    boundary system and recovers the interior displacements. Recovery can
+    be limited to some panels (for example the loaded or visible ones);
+    the interiors of the others are then left at zero, and the forces of
+    their beams (skipped_beams()) must not be evaluated.
+    """
+
+    def __init__(self, model, k_elem, props, panels, dense_limit):
+        """
+        Args:
+            model: CompiledModel
+            k_elem: Element stiffness matrices, shape (n_beams, 6, 6)
+            props: Per-beam properties (section_properties())
+            panels: List of beam index arrays (see detect_panels)
+            dense_limit: Largest boundary system that is factorized densely
+
+        Raises:
+            np.linalg.LinAlgError / RuntimeError as Factorization
+        """
+        self.n = model.n_free
+        self.method = "condensed"
+
+        # Which panel owns each beam (-1: none); inactive beams are ignored
+        beam_panel = np.full(model.n_beams, -1)
+        for p, beams in enumerate(panels):
+            beam_panel[beams] = p
+        beam_panel[~model.active] = -2
+        self.beam_panel = beam_panel
+        self.n_beam_panels = len(panels)
+
+        # A node is interior if all its active beams are in the same panel
+        lo = np.full(model.n_nodes, model.n_beams)
+        hi = np.full(model.n_nodes, -3)
+        live = beam_panel > -2
+        for end in (0, 1):
+            np.minimum.at(lo, model.conn[live, end], beam_panel[live])
+            np.maximum.at(hi, model.conn[live, end], beam_panel[live])
+        interior_node = (lo == hi) & (lo >= 0) & ~model.fixed & ~model.floating
+
+        # Condense every panel (or fetch it from the cache) and group equal ones
+        groups = OrderedDict()
+        condensed_beams = np.zeros(model.n_beams, dtype=bool)
+        for p, beams in enumerate(panels):
+            panel = self._build_panel(model, k_elem, props, beams, interior_node)
+            if panel is None:
+                continue
+            key, entry, interior_rows, boundary_rows = panel
+            group = groups.setdefault(key, (entry, [], [], []))
+            group[1].append(interior_rows)
+            group[2].append(boundary_rows)
+            group[3].append(p)
+            condensed_beams[beams] = True
+
+        # Boundary system: every reduced row that is not a panel interior
+        is_interior = np.zeros(self.n, dtype=bool)
+        for entry, interior_rows, _, _ in groups.values():
+            for rows in interior_rows:
+                is_interior[rows] = True
+        self.boundary_rows = np.flatnonzero(~is_interior)
+        position = np.full(self.n, -1)
+        position[self.boundary_rows] = np.arange(len(self.boundary_rows))
+
+        # (entry, interior rows (P, n_i), boundary positions (P, n_b), panel ids)
+        self.groups = [
+            (entry, np.array(interior_rows), position[np.array(boundary_rows)],
+             np.array(panel_ids, dtype=int))
+            for entry, interior_rows, boundary_rows, panel_ids in groups.values()
+        ]
+        self.condensed_panels = np.sort(np.concatenate(
+            [g[3] for g in self.groups] or [np.zeros(0, dtype=int)]))
+        self.n_panels = len(self.condensed_panels)
+        self.n_unique = len(self.groups)
+
+        # Beams outside the condensed panels are assembled directly
+        direct = np.where(condensed_beams[:, None, None], 0.0, k_elem)
+        K = model.assemble_stiffness(direct).tocsr()
+        K_b = K[self.boundary_rows][:, self.boundary_rows].tocoo()
+
+        rows = [K_b.row]
+        cols = [K_b.col]
+        vals = [K_b.data]
+        for entry, _, bnd, _ in self.groups:
+            S = entry["S"]
+            rows.append(np.repeat(bnd, S.shape[1], axis=1).ravel())
+            cols.append(np.tile(bnd, (1, S.shape[0])).ravel())
+            vals.append(np.broadcast_to(S.ravel(), (len(bnd), S.size)).ravel())
+
+        n_b = len(self.boundary_rows)
+        K_b = sp.coo_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_b, n_b)
+        )
+        self.boundary = Factorization(K_b, dense_limit)
+
+    @staticmethod
+    def _build_panel(model, k_elem, props, beams, interior_node):
+        """
+        Local condensation data of one panel.
+
+        Returns:
+            (cache key, cache entry, interior reduced rows, boundary reduced
+            rows), or None if the panel has no free interior DOF
+        """
+        nodes, conn = np.unique(model.conn[beams], return_inverse=True)
+        conn = conn.reshape(-1, 2)
+        if not np.any(interior_node[nodes]):
+            return None
+
+        # Canonical node order: by position relative to the panel's left edge
+        q = np.round(model.xy[nodes] / GRID).astype(np.int64)
+        q[:, 0] -= q[:, 0].min()
+        order = np.lexsort((q[:, 1], q[:, 0]))
+        nodes, q = nodes[order], q[order]
+        rank = np.empty(len(order), dtype=int)
+        rank[order] = np.arange(len(order))
+        conn = rank[conn]
+
+        # Canonical beam order (conn keeps each beam's own a/b orientation)
+        pairs = np.sort(conn, axis=1)
+        beam_order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        beams, pairs, conn = beams[beam_order], pairs[beam_order], conn[beam_order]
+
+        dofs = 3 * np.repeat(nodes, 3) + np.tile([0, 1, 2], len(nodes))
+        reduced = model.dof_map[dofs]
+        is_free = reduced >= 0
+        is_int = np.repeat(interior_node[nodes], 3) & is_free
+        is_bnd = is_free & ~is_int
+
+        key = (
+            q.tobytes(), pairs.tobytes(), is_int.tobytes(), is_bnd.tobytes(),
+            props["E"][beams].tobytes(), props["area"][beams].tobytes(),
+            props["inertia"][beams].tobytes(),
+        )
+        interior_rows = reduced[is_int]
+        boundary_rows = reduced[is_bnd]
+
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            return key, entry, interior_rows, boundary_rows
+
+        # Local stiffness of the panel in canonical DOF order
+        n_local = 3 * len(nodes)
+        a, b = conn[:, 0], conn[:, 1]
+        elem_dofs = np.stack([3*a, 3*a + 1, 3*a + 2, 3*b, 3*b + 1, 3*b + 2], axis=1)
+        K = np.zeros((n_local, n_local))
+        np.add.at(K, (elem_dofs[:, :, None], elem_dofs[:, None, :]), k_elem[beams])
+
+        K_ii = K[np.ix_(is_int, is_int)]
+        K_ib = K[np.ix_(is_int, is_bnd)]
+        K_bb = K[np.ix_(is_bnd, is_bnd)]
+        cho = la.cho_factor(K_ii)
+        X = la.cho_solve(cho, K_ib)
+        entry = {
+            "cho": cho,
+            "X": X,                       # K_ii^-1 K_ib
+            "K_ib": K_ib,
+            "S": K_bb - K_ib.T @ X,       # Schur complement
+            "diagonal": np.diag(K_ii),
+        }
+
+        _cache[key] = entry
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+        return key, entry, interior_rows, boundary_rows
+
+    def panels_of(self, beams):
+        """Ids of the condensed panels containing any of the beams (bool mask)."""
+        return np.unique(self.beam_panel[beams & (self.beam_panel >= 0)])
+
+    def skipped_beams(self, panels):
+        """Beams (bool mask) of the condensed panels that are not in panels."""
+        # Two spare slots at the end take beam_panel -1 and -2 (no panel)
+        skipped = np.zeros(self.n_beam_panels + 2, dtype=bool)
+        skipped[self.condensed_panels] = True
+        skipped[panels] = False
+        return skipped[self.beam_panel]
+
+    def pivots(self):
+        """Pivots in the row order of K (interiors eliminated first)."""
+        pivots = np.zeros(self.n)
+        pivots[self.boundary_rows] = self.boundary.pivots()
+        for entry, interior, _, _ in self.groups:
+            pivots[interior] = np.diag(entry["cho"][0]) ** 2
+        return pivots
+
+    def weak_pivots(self, tol):
+        """Rows whose pivot is below tol times their diagonal entry."""
+        weak = [self.boundary_rows[self.boundary.weak_pivots(tol)]]
+        for entry, interior, _, _ in self.groups:
+            small = np.diag(entry["cho"][0]) ** 2 < tol * entry["diagonal"]
+            weak.append(interior[:, small].ravel())
+        return np.unique(np.concatenate(weak)).astype(int)
+
+    def solve(self, rhs, panels=None):
+        """
+        Solves K·U = rhs.
+
+        Args:
+            rhs: Vector (n,) or matrix (n, m) in reduced numbering
+            panels: Panel ids whose interior DOFs are recovered; all if None
+
+        Returns:
+            Displacements with the same shape as rhs
+        """
+        rhs = np.asarray(rhs, dtype=float)
+        R = rhs.reshape(self.n, -1)
+        m = R.shape[1]
+
+        # Condense interior loads: r_b -= K_bi K_ii^-1 r_i
+        r_b = R[self.boundary_rows].copy()
+        partial = []
+        for entry, interior, bnd, _ in self.groups:
+            P, n_i = interior.shape
+            r_i = R[interior].transpose(1, 0, 2).reshape(n_i, P * m)
+            y = la.cho_solve(entry["cho"], r_i).reshape(n_i, P, m).transpose(1, 0, 2)
+            np.add.at(r_b, bnd, -np.einsum("ib,pim->pbm", entry["K_ib"], y))
+            partial.append(y)
+
+        U = np.zeros_like(R)
+        u_boundary = self.boundary.solve(r_b)
+        U[self.boundary_rows] = u_boundary
+
+        # Recover interiors: u_i = K_ii^-1 r_i - X u_b
+        for (entry, interior, bnd, panel_ids), y in zip(self.groups, partial):
+            pick = slice(None)
+            if panels is not None:
+                pick = np.flatnonzero(np.isin(panel_ids, panels))
+                if len(pick) == 0:
+                    continue
+            u_b = u_boundary[bnd[pick]]
+            U[interior[pick]] = y[pick] - np.einsum("ib,pbm->pim", entry["X"], u_b)
+
+        if not np.all(np.isfinite(U)):
+            raise np.linalg.LinAlgError("Non-finite displacements")
+        return U.reshape(rhs.shape)
@@ -0,0 +1,192 @@
+"""
+Background solving: a StaticSolver driven from a worker thread.
+"""
+import threading
+import time
+from solvers.static_solver import point_load_items
+
+
+class Snapshot:
+    """
+    One completed solve, as published by SolverWorker (or SolverJob).
+
+        result      ResultSet of the solve (the last good one if it failed)
+        solved      False if the solve failed (error_msg says why)
+        error_msg   Solver error message after the solve
+        error       Exception raised by the solver, None if it returned
+        posted      time.perf_counter() when its load state was posted
+        solve_time  Duration of the solve (s)
+    """
+
+    def __init__(self, result, solved, error_msg, posted, solve_time, error=None):
+        self.result = result
+        self.solved = solved
+        self.error_msg = error_msg
+        self.posted = posted
+        self.solve_time = solve_time
+        self.error = error
+
+
+class SolverWorker:
+    """
+    Runs the solves of a StaticSolver in a background thread, so a slow
+    solve does not hold up the frame.
+
+    The main loop posts the newest load state with post(); the worker
+    solves only the newest one, states posted meanwhile are dropped (their
+    time steps still count in dynamic mode). Completed solves go into a
+    double buffer: the worker writes the back slot and then flips the
+    front index, so latest() always returns a complete snapshot without
+    waiting for a solve in progress.
+
+    A thread is used rather than a process: the solver keeps its model and
+    factorization between solves, and numpy/scipy release the GIL in the
+    heavy parts. Anything else that uses the solver (stability check,
+    modes, collapse, the envelope's solves) must hold `lock` while the
+    worker runs.
+
+    A solve that raises is published as a failed Snapshot (solved False,
+    with the exception in `error`) and the worker goes on with the next
+    request, so the main loop sees the failure instead of a stale result.
+    """
+
+    def __init__(self, solver, scheduler=None, lock=None):
+        """
+        Args:
+            solver: StaticSolver with a successful initial solve
+            scheduler: SolveScheduler of the solver, used for static solves
+            lock: RLock guarding the solver, if others share it (a new one
+                  by default)
+        """
+        self.solver = solver
+        self.scheduler = scheduler
+        self.lock = lock if lock is not None else threading.RLock()  # Guards the solver
+        self.solves = 0
+
+        # Double buffer of Snapshots, latest() reads _buffers[_front]
+        self._buffers = [None, None]
+        self._front = 0
+        self._swap = threading.Lock()
+
+        self._wake = threading.Condition()
+        self._request = None
+        self._elapsed = 0.0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="solver", daemon=True)
+        self._thread.start()
+
+    def post(self, dt, temperature=0.0, point_load=None, nonlinear=False, dynamic=False):
+        """
+        Posts the newest load state (replaces one that was not solved yet).
+
+        Args:
+            dt: Frame time since the last post (s), integrated in dynamic mode
+            temperature, point_load, nonlinear: As StaticSolver.solve()
+            dynamic: Use StaticSolver.solve_dynamic()
+        """
+        request = {
+            "temperature": temperature,
+            "point_load": point_load_items(point_load),
+            "nonlinear": nonlinear,
+            "dynamic": dynamic,
+            "posted": time.perf_counter(),
+        }
+        with self._wake:
+            self._elapsed += dt
+            self._request = request
+            self._wake.notify()
+
+    def latest(self):
+        """Newest completed Snapshot (front buffer), or None before the first one."""
+        with self._swap:
+            return self._buffers[self._front]
+
+    def age(self):
+        """Seconds since the load state of the displayed result was posted."""
+        snapshot = self.latest()
+        if snapshot is None:
+            return 0.0
+        return time.perf_counter() - snapshot.posted
+
+    def stop(self):
+        """Stops the thread after the solve in progress (if any)."""
+        with self._wake:
+            self._running = False
+            self._wake.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while self._running and self._request is None:
+                    self._wake.wait()
+                if not self._running:
+                    return
+                request, self._request = self._request, None
+                elapsed, self._elapsed = self._elapsed, 0.0
+
+            start = time.perf_counter()
+            with self.lock:
+                try:
+                    if request["dynamic"]:
+                        solved = self.solver.solve_dynamic(elapsed, request["temperature"],
+                                                           request["point_load"])
+                    else:
+                        solve = self.solver.solve if self.scheduler is None else self.scheduler.solve
+                        solved = solve(request["temperature"], request["point_load"],
+                                       request["nonlinear"])
+                    snapshot = Snapshot(self.solver.current, solved, self.solver.error_msg,
+                                        request["posted"], time.perf_counter() - start)
+                except Exception as e:
+                    # Keep the thread alive: report the failure with the last good result
+                    print(f"Solver error: {e!r}")
+                    snapshot = Snapshot(self.solver.current, False, f"Megoldó Hiba: {e}",
+                                        request["posted"], time.perf_counter() - start, error=e)
+            self.solves += 1
+
+            back = 1 - self._front
+            self._buffers[back] = snapshot
+            with self._swap:
+                self._front = back
+
+
+class SolverJob:
+    """
+    One long computation on a solver (the moving-load envelope) in a thread
+    of its own, so neither the frame nor the SolverWorker waits for all of
+    it: the function takes the solver lock itself, only for the parts that
+    use the solver's state (see StaticSolver.moving_load_envelope).
+
+    The main loop polls `snapshot`, None until the job is done; then a
+    Snapshot whose result is the function's return value (solved False with
+    the solver's error_msg if it returned None, or with the exception if it
+    raised).
+    """
+
+    def __init__(self, solver, lock, function, *args, **kwargs):
+        """
+        Args:
+            solver: StaticSolver the function uses (for its error_msg)
+            lock: The solver lock, passed on to the function as lock=
+            function, args, kwargs: The computation
+        """
+        self.solver = solver
+        self.lock = lock
+        self.snapshot = None
+        self._thread = threading.Thread(target=self._run, args=(function, args, kwargs),
+                                        name="solver-job", daemon=True)
+        self._thread.start()
+
+    def _run(self, function, args, kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, lock=self.lock, **kwargs)
+            with self.lock:
+                error_msg = self.solver.error_msg
+            snapshot = Snapshot(result, result is not None, error_msg, start,
+                                time.perf_counter() - start)
+        except Exception as e:
+            print(f"Solver job error: {e!r}")
+            snapshot = Snapshot(None, False, f"Megoldó Hiba: {e}", start,
+                                time.perf_counter() - start, error=e)
+        self.snapshot = snapshot
@@ -40,6 +40,10 @@ class Editor:
         self.hover_beam = None  # Beam under cursor
         self.drag_node = None   # Node being dragged
         
+        # Nodes of a mechanism found by the last stability check
+        self.unstable_nodes = set()
+        self.unstable_revision = None
+        
         # Arch tool state
         self.arch_mode = False
         self.arch_stage = 0  # 0: select start, 1: position control point
@@ -95,11 +99,13 @@ class Editor:
                 self.bridge.nodes.remove(self.hover_node)
                 self.audio.play_sfx("wood_place")
             
+            self.bridge.touch()
             self.hover_node = None
         
         elif self.hover_beam:
             if self.hover_beam in self.bridge.beams:
                 self.bridge.beams.remove(self.hover_beam)
+                self.bridge.touch()
                 self.audio.play_sfx("wood_place")
             self.hover_beam = None
 
@@ -142,6 +148,7 @@ class Editor:
         # Nodes at or above ground level become fixed anchors
         if self.drag_node.y <= 0:
             self.drag_node.fixed = True
+        self.bridge.touch()
     
     def _handle_right_click(self):
         """Handle right mouse button press."""
@@ -253,6 +260,7 @@ class Editor:
         if node_to_remove in self.bridge.nodes:
             self.bridge.nodes.remove(node_to_remove)
         
+        self.bridge.touch()
         self.audio.play_sfx("wood_place")
 
     def _handle_left_release(self, wx, wy, tool_type):
@@ -331,8 +339,16 @@ class Editor:
                 # If too close, skip this node and keep prev_node as-is
             # If same node, skip and keep prev_node as-is
 
+    def highlight_unstable(self, nodes):
+        """Highlight mechanism nodes until the bridge is edited."""
+        self.unstable_nodes = set(nodes)
+        self.unstable_revision = self.bridge.revision
+
     def draw(self, surface):
         """Draw all bridge elements and editor overlays."""
+        if self.unstable_revision != self.bridge.revision:
+            self.unstable_nodes.clear()
+        
         # Draw beams
         for beam in self.bridge.beams:
             self._draw_beam(surface, beam)
@@ -374,6 +390,8 @@ class Editor:
                 color_override = (200, 50, 50)
             else:
                 color_override = COLOR_CURSOR
+        elif node in self.unstable_nodes:
+            color_override = COLOR_UNSTABLE
         
         draw_node(surface, pos, node.fixed, node == self.hover_node, color_override)
 
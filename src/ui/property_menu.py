@@ -41,10 +41,12 @@ class Slider:
     """
     Slider UI element for adjusting numeric values.
     
-    Supports both linear and logarithmic scaling.
+    Supports both linear and logarithmic scaling. on_change, if given, is
+    called after every drag step that actually changes the value.
     """
     
-    def __init__(self, label, unit, min_v, max_v, parent_dict, dict_key, is_log=False):
+    def __init__(self, label, unit, min_v, max_v, parent_dict, dict_key, is_log=False,
+                 on_change=None):
         self.label = label
         self.unit = unit
         self.min_v = min_v
@@ -53,6 +55,7 @@ class Slider:
         self.dict_key = dict_key
         self.dragging = False
         self.is_log = is_log
+        self.on_change = on_change
 
     def update(self, rect, mouse_pos, mouse_down):
         """Update slider value based on mouse interaction."""
@@ -71,7 +74,10 @@ class Slider:
                 else:
                     new_val = self.min_v + ratio * (self.max_v - self.min_v)
                 
-                self.parent_dict[self.dict_key] = new_val
+                if self.parent_dict.get(self.dict_key) != new_val:
+                    self.parent_dict[self.dict_key] = new_val
+                    if self.on_change:
+                        self.on_change()
         else:
             self.dragging = False
 
@@ -207,7 +213,8 @@ class PropertyMenu:
         max_v = default_val * factor
         self.sliders.append(
             Slider(label, unit, min_v, max_v, 
-                   MaterialManager.MATERIALS[mat_key], prop_key, is_log=True)
+                   MaterialManager.MATERIALS[mat_key], prop_key, is_log=True,
+                   on_change=MaterialManager.mark_dirty)
         )
 
     def _setup_ui(self):
@@ -247,14 +254,16 @@ class PropertyMenu:
             label = f"{mat_name} Átmérő"
             self.sliders.append(
                 Slider(label, "m", d_thick/20.0, d_thick*20.0,
-                       MaterialManager.MATERIALS[mat_key], "thickness", is_log=True)
+                       MaterialManager.MATERIALS[mat_key], "thickness", is_log=True,
+                       on_change=MaterialManager.mark_dirty)
             )
             
             # Add hollowness slider
             label = f"{mat_name} Üregesség"
             self.sliders.append(
                 Slider(label, "%", 0.0, 0.99,
-                        MaterialManager.MATERIALS[mat_key], "hollow_ratio")
+                        MaterialManager.MATERIALS[mat_key], "hollow_ratio",
+                        on_change=MaterialManager.mark_dirty)
             )
         
         # Global settings
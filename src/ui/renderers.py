@@ -2,10 +2,10 @@
 Specialized renderers for analysis mode visualization.
 """
 import pygame
-import math
+import numpy as np
 from core.constants import *
-from core.material_manager import MaterialManager
-from utils.math_utils import hermite_spline_point, normalize_angle
+from solvers.deformed import deformed_geometry
+from solvers.results import ResultSet
 from utils.render_utils import (
     draw_curved_beam, draw_node, draw_broken_beam,
     interpolate_color, create_semi_transparent_surface
@@ -32,25 +32,52 @@ def draw_ixchel(surface, screen_x, screen_y):
                       (screen_x + 12, screen_y - 42))
 
 
+def draw_crowd(surface, grid, crowd):
+    """
+    Draw the walkers and vehicles of a Crowd at their visual positions.
+    
+    Args:
+        surface: Pygame surface
+        grid: Grid for the world-to-screen transform
+        crowd: entities.crowd.Crowd
+    """
+    if not len(crowd.owner):
+        return
+    points = np.stack([crowd.points_x(), crowd.visual_y], axis=1)
+    screen = grid.world_to_screen_array(points)
+    
+    walker = crowd.kind[crowd.owner] == crowd.WALKER
+    for sx, sy in screen[walker]:
+        draw_ixchel(surface, sx, sy)
+    
+    # Vehicles: a body spanning the axles, a wheel on each
+    for body in np.flatnonzero(crowd.kind == crowd.VEHICLE):
+        wheels = screen[crowd.owner == body]
+        left, right = wheels[:, 0].min() - 12, wheels[:, 0].max() + 12
+        top = wheels[:, 1].min() - 30
+        pygame.draw.rect(surface, (180, 60, 40), (left, top, right - left, 22),
+                         border_radius=4)
+        for sx, sy in wheels:
+            pygame.draw.circle(surface, (40, 40, 40), (sx, sy - 6), 6)
+
+
 class AnalysisRenderer:
     """
     Renders the deformed structure during analysis mode.
     
     Handles:
-    - Deformed beam curves using Hermite splines
+    - Deformed beam curves using Hermite splines (from the shared
+      deformed-geometry cache, see solvers.deformed)
     - Color coding based on view mode
     - Stress labels
     - Broken beam visualization
     """
     
-    # Number of segments for curved beam rendering
-    CURVE_SEGMENTS = 12
-    
     def __init__(self, grid, prop_menu):
         self.grid = grid
         self.prop_menu = prop_menu
 
-    def draw(self, surface, bridge, solver, broken_beams, exaggeration):
+    def draw(self, surface, bridge, solver, broken_beams, exaggeration, result=None):
         """
         Draw the complete deformed structure.
         
@@ -60,23 +87,38 @@ class AnalysisRenderer:
             solver: StaticSolver with current results
             broken_beams: Set of beams that have failed
             exaggeration: Displacement exaggeration factor
+            result: ResultSet to draw instead of solver.current (e.g. a
+                    mode shape from Modes.result())
         """
         if not solver:
             return
         
+        # Results are indexed by the solver model's node/beam order
+        if result is None:
+            result = solver.current
+        if result is None:
+            if solver.model is None:
+                return
+            result = ResultSet.zeros(solver.model)
+        model = result.model
+        
+        # Curves of all beams, sampled once and converted to pixels at once
+        geometry = deformed_geometry(result, exaggeration)
+        screen_points = self.grid.world_to_screen_array(geometry.points).tolist()
+        
         # Draw all nodes
-        for node in bridge.nodes:
-            self._draw_deformed_node(surface, node, solver, exaggeration)
+        for i, node in enumerate(model.nodes):
+            self._draw_deformed_node(surface, node, result.displacements[i], exaggeration)
         
         # Draw all beams
-        for beam in bridge.beams:
+        for k in range(model.n_beams):
             self._draw_deformed_beam(
-                surface, beam, solver, broken_beams, exaggeration
+                surface, k, result, broken_beams, screen_points[k]
             )
 
-    def _draw_deformed_node(self, surface, node, solver, exaggeration):
+    def _draw_deformed_node(self, surface, node, displacement, exaggeration):
         """Draw a single deformed node."""
-        dx, dy, _ = solver.displacements.get(node, (0, 0, 0))
+        dx, dy, _ = displacement
         def_x = node.x + dx * exaggeration
         def_y = node.y + dy * exaggeration
         pos = self.grid.world_to_screen(def_x, def_y)
@@ -84,67 +126,27 @@ class AnalysisRenderer:
         color = (180, 50, 50) if node.fixed else (80, 80, 80)
         pygame.draw.circle(surface, color, pos, 5)
 
-    def _draw_deformed_beam(self, surface, beam, solver, broken_beams, exaggeration):
-        """Draw a single deformed beam with appropriate styling."""
-        # Get node displacements
-        da_x, da_y, da_theta = solver.displacements.get(beam.node_a, (0, 0, 0))
-        db_x, db_y, db_theta = solver.displacements.get(beam.node_b, (0, 0, 0))
-        
-        # Calculate deformed endpoints
-        p1_x = beam.node_a.x + da_x * exaggeration
-        p1_y = beam.node_a.y + da_y * exaggeration
-        p2_x = beam.node_b.x + db_x * exaggeration
-        p2_y = beam.node_b.y + db_y * exaggeration
-        
-        # Calculate curve parameters
-        chord_dx = p2_x - p1_x
-        chord_dy = p2_y - p1_y
-        length = math.hypot(chord_dx, chord_dy)
-        psi = math.atan2(chord_dy, chord_dx)
-        
-        # Original beam angle
-        orig_dx = beam.node_b.x - beam.node_a.x
-        orig_dy = beam.node_b.y - beam.node_a.y
-        alpha = math.atan2(orig_dy, orig_dx)
-        
-        # Rotations relative to deformed chord
-        rot1 = normalize_angle((alpha + da_theta * exaggeration) - psi)
-        rot2 = normalize_angle((alpha + db_theta * exaggeration) - psi)
-        
-        # Generate curve points
-        points = self._generate_curve_points(
-            (p1_x, p1_y), (p2_x, p2_y), rot1, rot2, length
-        )
+    def _draw_deformed_beam(self, surface, k, result, broken_beams, points):
+        """Draw beam k of the result's model along its curve (screen points)."""
+        beam = result.model.beams[k]
         
         # Determine visual properties
-        props = MaterialManager.get_properties(beam.type, beam.hollow_ratio)
-        width = max(2, int(props['thickness'] * PPM))
-        color = self._get_beam_color(beam, solver)
+        props = result.model.section_properties()
+        width = max(2, int(props['thickness'][k] * PPM))
+        color = self._get_beam_color(beam, k, result)
         
         # Draw beam
         if beam in broken_beams:
             draw_broken_beam(surface, points, width)
         else:
             draw_curved_beam(surface, points, color, width,
-                           beam.type, beam.hollow_ratio)
+                           beam.type, props['hollow_ratio'][k])
         
         # Draw stress label
         if self.prop_menu.text_mode != 2:
-            self._draw_stress_label(surface, beam, solver, points, color)
-
-    def _generate_curve_points(self, p1, p2, rot1, rot2, length):
-        """Generate screen points along the deformed beam curve."""
-        points = []
-        
-        for i in range(self.CURVE_SEGMENTS + 1):
-            t = i / self.CURVE_SEGMENTS
-            wx, wy = hermite_spline_point(t, p1, p2, rot1, rot2, length)
-            screen_pos = self.grid.world_to_screen(wx, wy)
-            points.append(screen_pos)
-        
-        return points
+            self._draw_stress_label(surface, k, result, points, color)
 
-    def _get_beam_color(self, beam, solver):
+    def _get_beam_color(self, beam, k, result):
         """
         Determine beam color based on current view mode.
         
@@ -157,7 +159,7 @@ class AnalysisRenderer:
         
         if view_mode == 0:
             # Force view
-            force = solver.results.get(beam, 0)
+            force = result.axial[k]
             return COLOR_COMPRESSION if force < 0 else COLOR_TENSION
         
         elif view_mode == 1:
@@ -166,13 +168,12 @@ class AnalysisRenderer:
         
         elif view_mode == 2:
             # Stress gradient view
-            ratio = solver.stress_ratios.get(beam, 0.0)
-            ratio = min(1.0, ratio)  # Clamp to 1.0
+            ratio = min(1.0, result.stress_ratio[k])  # Clamp to 1.0
             return interpolate_color(beam.color, (255, 50, 50), ratio)
         
         return (100, 100, 100)  # Fallback
 
-    def _draw_stress_label(self, surface, beam, solver, points, color):
+    def _draw_stress_label(self, surface, k, result, points, color):
         """Draw stress value label at beam midpoint."""
         if not points:
             return
@@ -181,13 +182,12 @@ class AnalysisRenderer:
         text_mode = self.prop_menu.text_mode
         if text_mode == 0:
             # Show force values
-            axial = int(abs(solver.results.get(beam, 0)))
-            bending = int(abs(solver.bending_results.get(beam, 0)))
+            axial = int(abs(result.axial[k]))
+            bending = int(abs(result.moment[k]))
             label = f"{axial}N | {bending}N"
         elif text_mode == 1:
             # Show percentage
-            ratio = solver.stress_ratios.get(beam, 0)
-            label = f"{int(ratio * 100)}%"
+            label = f"{int(result.stress_ratio[k] * 100)}%"
         else:
             return
         
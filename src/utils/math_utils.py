@@ -42,6 +42,42 @@ def hermite_spline_point(t, p1, p2, rot1, rot2, length):
     return x, y
 
 
+def hermite_spline_points(t, p1, p2, rot1, rot2, length):
+    """
+    Vectorized hermite_spline_point: samples many curves at once.
+    
+    Args:
+        t: Parameters along the curves (0 to 1), shape (m,)
+        p1, p2: Start and end points, shape (n, 2)
+        rot1, rot2: Rotations at endpoints (radians, relative to chord), shape (n,)
+        length: Deformed lengths, shape (n,)
+        
+    Returns:
+        Points on the curves, shape (n, m, 2)
+    """
+    t = np.asarray(t, dtype=float)[None, :]
+    p1 = np.asarray(p1, dtype=float)
+    p2 = np.asarray(p2, dtype=float)
+    length = np.asarray(length, dtype=float)[:, None]
+    
+    # Hermite basis functions for tangent control
+    h1 = t**3 - 2*t**2 + t
+    h2 = t**3 - t**2
+    
+    # Perpendicular deflection from chord and distance along it
+    v = length * (h1 * np.asarray(rot1)[:, None] + h2 * np.asarray(rot2)[:, None])
+    u = t * length
+    
+    # Chord angle, once per curve
+    psi = np.arctan2(p2[:, 1] - p1[:, 1], p2[:, 0] - p1[:, 0])[:, None]
+    cp, sp = np.cos(psi), np.sin(psi)
+    
+    points = np.empty(v.shape + (2,))
+    points[..., 0] = p1[:, 0, None] + u * cp - v * sp
+    points[..., 1] = p1[:, 1, None] + u * sp + v * cp
+    return points
+
+
 def normalize_angle(angle):
     """Normalize angle to range [-π, π]."""
     while angle > math.pi:
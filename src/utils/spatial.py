@@ -0,0 +1,160 @@
+"""
+Spatial lookup structures for geometry queries.
+"""
+import math
+import numpy as np
+
+
+class IntervalBuckets:
+    """
+    Uniform buckets over a set of x-intervals [lo, hi].
+
+    Every interval is listed in each bucket it overlaps, so query(x) only
+    looks at one bucket: O(1 + k) for k intervals near x. Suited to decks,
+    where intervals are about as long as the bucket width and rarely overlap.
+    """
+
+    def __init__(self, lo, hi, width):
+        """
+        Args:
+            lo, hi: Interval bounds, arrays of shape (n,)
+            width: Bucket width (about the typical interval length)
+        """
+        lo = np.asarray(lo, dtype=float)
+        hi = np.asarray(hi, dtype=float)
+        self.width = float(width)
+        self.origin = float(lo.min()) if len(lo) else 0.0
+
+        first = np.floor((lo - self.origin) / self.width).astype(int)
+        last = np.floor((hi - self.origin) / self.width).astype(int)
+        n_buckets = int(last.max()) + 1 if len(lo) else 0
+
+        # Bucket k lists the intervals with first <= k <= last
+        spans = last - first + 1
+        ids = np.repeat(np.arange(len(lo)), spans)
+        offsets = np.arange(len(ids)) - np.repeat(np.cumsum(spans) - spans, spans)
+        buckets = np.repeat(first, spans) + offsets
+        order = np.argsort(buckets, kind="stable")
+        self._ids = ids[order]
+        self._starts = np.searchsorted(buckets[order], np.arange(n_buckets + 1))
+
+    def query(self, x):
+        """Ids of the intervals that may contain x (a superset, no false negatives)."""
+        k = math.floor((x - self.origin) / self.width)
+        if k < 0 or k >= len(self._starts) - 1:
+            return self._ids[:0]
+        return self._ids[self._starts[k]:self._starts[k + 1]]
+
+    def query_many(self, x):
+        """
+        query() for an array of x at once.
+        
+        Returns:
+            (points, ids): every candidate pair, the index into x and the
+            interval id, grouped by point
+        """
+        k = np.floor((np.asarray(x, dtype=float) - self.origin) / self.width)
+        valid = (k >= 0) & (k < len(self._starts) - 1)
+        points = np.flatnonzero(valid)
+        k = k[valid].astype(int)
+        
+        start = self._starts[k]
+        count = self._starts[k + 1] - start
+        offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        return np.repeat(points, count), self._ids[np.repeat(start, count) + offsets]
+
+
+class DeckIndex:
+    """
+    The walkable deck of a bridge, shared by everything that walks on it
+    (the agent, the crowd):
+
+        beams       walkable beams (wood, not zero-length); deck index i
+        rows        (n,) row of each beam in the compiled model, -1 if the
+                    model left it out (or there is no model)
+        x           (n, 2) undeformed end x
+        x_range     (min x, max x) of the deck beams in the model
+        neighbors   neighbors[i] lists the deck beams sharing a node with i
+        width       bucket width, the median beam x-extent
+        margin      padding of the indexed x-extents
+
+    Built once per beam list and compiled model: the beams only change in
+    build mode, which recompiles the model (a new bridge revision), so
+    is_current() compares identities in O(1) instead of the beams.
+    Candidate beams under x are looked up in an IntervalBuckets index over
+    the padded deformed x-extents; one is kept per geometry scale and only
+    rebuilt once an end has moved further than the padding.
+    """
+
+    # Padding as a share of the median beam x-extent
+    MARGIN = 0.25
+
+    def __init__(self, beams, model=None):
+        """
+        Args:
+            beams: Beams of the bridge
+            model: CompiledModel of the result walked on (None: undeformed)
+        """
+        self.model = model
+        self._list = beams
+        self._count = len(beams)
+
+        beam_index = model.beam_index if model is not None else {}
+        self.beams = [
+            beam for beam in beams
+            if beam.type == "wood" and (abs(beam.node_b.x - beam.node_a.x) >= 0.001
+                                        or abs(beam.node_b.y - beam.node_a.y) >= 0.001)
+        ]
+        self.x = np.array([(b.node_a.x, b.node_b.x) for b in self.beams],
+                          dtype=float).reshape(-1, 2)
+        self.rows = np.array([beam_index.get(b, -1) for b in self.beams], dtype=int)
+
+        solved = self.x[self.rows >= 0] if model is not None else self.x
+        self.x_range = (float(solved.min()), float(solved.max())) if len(solved) else (0.0, 0.0)
+
+        # Deck graph: beams are adjacent through shared nodes
+        at_node = {}
+        for i, beam in enumerate(self.beams):
+            at_node.setdefault(beam.node_a, []).append(i)
+            at_node.setdefault(beam.node_b, []).append(i)
+        self.neighbors = [
+            [j for j in at_node[beam.node_a] + at_node[beam.node_b] if j != i]
+            for i, beam in enumerate(self.beams)
+        ]
+
+        width = float(np.median(np.abs(self.x[:, 1] - self.x[:, 0]))) if self.beams else 1.0
+        self.width = max(width, 0.01)
+        self.margin = self.MARGIN * self.width
+        self._indices = {}
+
+    def is_current(self, beams, model=None):
+        """True if this deck was built from these beams and this model."""
+        return self._list is beams and self._count == len(beams) and self.model is model
+
+    def ends(self, geometry=None):
+        """(n, 2) end x of the deck beams, deformed where the geometry has them."""
+        if geometry is None or not len(self.rows):
+            return self.x
+        rows = self.rows
+        ends = np.stack([geometry.p1[rows, 0], geometry.p2[rows, 0]], axis=1)
+        return np.where(rows[:, None] >= 0, ends, self.x)
+
+    def query(self, x, geometry=None):
+        """Deck indices of the beams whose deformed x-extent may contain x."""
+        return self._buckets(geometry).query(x)
+
+    def query_many(self, x, geometry=None):
+        """query() for an array of x at once, as IntervalBuckets.query_many()."""
+        return self._buckets(geometry).query_many(x)
+
+    def _buckets(self, geometry):
+        x = self.ends(geometry)
+        scale = None if geometry is None else geometry.scale
+        entry = self._indices.get(scale)
+        if entry is None or (len(x) and np.abs(x - entry[1]).max() > self.margin):
+            index = IntervalBuckets(x.min(axis=1) - self.margin,
+                                    x.max(axis=1) + self.margin, self.width)
+            if len(self._indices) >= 4:
+                self._indices.clear()  # Exaggeration slider moved on
+            entry = self._indices[scale] = (index, x)
+        return entry[0]
@@ -53,7 +53,7 @@ exit /b
 :: -----------------------------------------------------
 :CHECK_DEPS
 :: We use the detected command (python or py) to check libraries
-"%PYTHON_CMD%" -c "import pygame; import numpy" >nul 2>&1
+"%PYTHON_CMD%" -c "import pygame; import numpy; import scipy" >nul 2>&1
 if %errorlevel% neq 0 (
     echo [STATUS] Könyvtárak letöltése...
     :: We use -m pip to ensure we install to the correct Python